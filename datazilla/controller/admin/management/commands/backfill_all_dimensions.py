@@ -19,6 +19,23 @@ class Command(ProjectBatchCommand):
             dest='numdays',
             default=1,
             help='Number of days ago to start the backfill from'),
+
+        make_option(
+            '--chunk_size',
+            action='store',
+            dest='chunk_size',
+            default=MetricsTestModel.BACKFILL_CHUNK_SIZE,
+            help='Number of test_run ids to backfill at a time '
+                 '(default {0})'.format(
+                    MetricsTestModel.BACKFILL_CHUNK_SIZE)),
+
+        make_option(
+            '--restart',
+            action='store_true',
+            dest='restart',
+            default=False,
+            help='Ignore the watermark of the previous backfill and '
+                 'start over from --numdays'),
             )
 
 
@@ -28,41 +45,19 @@ class Command(ProjectBatchCommand):
             return (td.microseconds + (td.seconds + td.days * 24 * 3600) * 10**6) / 10**6
 
         numdays = int(options.get("numdays", 1))
+        chunk_size = int(options.get("chunk_size"))
+        restart = options.get("restart", False)
+
         now = int(time.time())
         time_constraint = now - to_seconds(timedelta(numdays))
 
         mtm = MetricsTestModel(project)
-
-        test_run_ids = mtm.get_test_runs_not_in_all_dimensions(time_constraint)
-        self.stdout.write("test run ids {0}\n".format(str(len(test_run_ids))))
-
-        #Make a list of test_run_id chunks to iterate over
-        chunk_size = 20
-        test_run_id_chunks = [
-            test_run_ids[i:i + chunk_size] for i in range(0, len(test_run_ids), chunk_size)
-            ]
-
         plm = PushLogModel()
 
-        for ids in test_run_id_chunks:
+        loaded = mtm.backfill_all_dimensions(
+            time_constraint, plm, chunk_size, restart)
 
-            self.stdout.write("Processing ids {0}\n".format(str(ids)))
-
-            revisions_without_push_data = mtm.load_test_data_all_dimensions(ids)
-
-            if revisions_without_push_data:
-
-                revision_nodes = {}
-
-                for revision in revisions_without_push_data:
-
-                    node = plm.get_node_from_revision(
-                        revision, revisions_without_push_data[revision])
-
-                    revision_nodes[revision] = node
-
-                mtm.set_push_data_all_dimensions(revision_nodes)
+        self.stdout.write("test runs loaded {0}\n".format(loaded))
 
         plm.disconnect()
         mtm.disconnect()
-
@@ -0,0 +1,54 @@
+import time
+
+from datetime import timedelta
+from optparse import make_option
+
+from datazilla.model import PerformanceTestModel
+from base import ProjectBatchCommand
+
+class Command(ProjectBatchCommand):
+    LOCK_FILE = "backfill_b2g_value_summary"
+
+    help = "Backfill the b2g_value_summary table of a b2g project"
+
+    option_list = ProjectBatchCommand.option_list + (
+
+        make_option(
+            '--numdays',
+            action='store',
+            dest='numdays',
+            default=90,
+            help='Number of days ago to start the backfill from'),
+
+        make_option(
+            '--chunk_size',
+            action='store',
+            dest='chunk_size',
+            default=100,
+            help='Number of test runs to summarize at a time'),
+            )
+
+
+    def handle_project(self, project, **options):
+
+        numdays = int(options.get("numdays", 90))
+        chunk_size = int(options.get("chunk_size", 100))
+
+        time_constraint = int(time.time()) - int(
+            timedelta(numdays).total_seconds())
+
+        ptm = PerformanceTestModel(project)
+
+        test_run_ids = ptm.get_test_run_ids_since(time_constraint)
+        self.stdout.write("test run ids {0}\n".format(str(len(test_run_ids))))
+
+        for i in range(0, len(test_run_ids), chunk_size):
+
+            ids = test_run_ids[i:i + chunk_size]
+
+            self.stdout.write("Processing ids {0} to {1}\n".format(
+                ids[0], ids[-1]))
+
+            ptm.set_b2g_value_summary(ids)
+
+        ptm.disconnect()
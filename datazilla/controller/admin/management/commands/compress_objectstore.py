@@ -0,0 +1,46 @@
+from optparse import make_option
+
+from datazilla.model import PerformanceTestModel
+from base import ProjectBatchCommand
+
+
+class Command(ProjectBatchCommand):
+    LOCK_FILE = "compress_objectstore"
+
+    help = (
+            "Compress the json blobs already stored in the objectstore "
+            "of a project."
+            )
+
+    option_list = ProjectBatchCommand.option_list + (
+
+        make_option(
+            '--chunk_size',
+            action='store',
+            dest='chunk_size',
+            default=PerformanceTestModel.COMPRESS_CHUNK_SIZE,
+            help='Number of objectstore rows to compress at once '
+                 '(default {0})'.format(
+                    PerformanceTestModel.COMPRESS_CHUNK_SIZE)),
+
+        make_option(
+            '--start_id',
+            action='store',
+            dest='start_id',
+            default=0,
+            help='Only compress the rows with a greater objectstore id'),
+        )
+
+    def handle_project(self, project, **options):
+
+        chunk_size = int(options.get("chunk_size"))
+        start_id = int(options.get("start_id", 0))
+
+        ptm = PerformanceTestModel(project)
+
+        compressed = ptm.compress_objects(chunk_size, start_id)
+
+        self.stdout.write(
+            "{0}: compressed {1} json blobs\n".format(project, compressed))
+
+        ptm.disconnect()
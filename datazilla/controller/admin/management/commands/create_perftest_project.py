@@ -54,6 +54,15 @@ class Command(ProjectCommand):
                           "execution as cron jobs."
                           "Choices are: {0}.  Default to None."
                           ).format(", ".join(CRON_BATCH_NAMES))),
+
+        make_option("--partitioned",
+                    action="store_true",
+                    dest="partitioned",
+                    default=False,
+                    help=("Range partition the test_value, "
+                          "test_data_all_dimensions and objectstore tables "
+                          "so expired data can be dropped a partition at a "
+                          "time with the maintain_partitions command.")),
         )
 
     def handle_project(self, project, **options):
@@ -76,6 +85,7 @@ class Command(ProjectCommand):
             hosts=hosts,
             types=types,
             cron_batch=cron_batch,
+            partitioned=options.get("partitioned", False),
             )
         self.stdout.write("Perftest project created: {0}\n".format(project))
         dm.disconnect()
@@ -27,6 +27,32 @@ class Command(ProjectBatchCommand):
             dest='iterations',
             default=50,
             help='Number of delete iterations to do in one run '),
+
+        make_option(
+            '--chunk_size',
+            action='store',
+            dest='chunk_size',
+            default=None,
+            help='Number of test runs deleted per iteration (default {0})'.format(
+                PerformanceTestModel.CYCLE_CHUNK_SIZE)),
+
+        make_option(
+            '--max_rows_per_second',
+            action='store',
+            dest='max_rows_per_second',
+            default=None,
+            help='Throttle deletes to this many rows per second, 0 to '
+                 'disable (default {0})'.format(
+                    PerformanceTestModel.CYCLE_MAX_ROWS_PER_SECOND)),
+
+        make_option(
+            '--max_replication_lag',
+            action='store',
+            dest='max_replication_lag',
+            default=None,
+            help='Pause while the read host lags more than this many '
+                 'seconds, 0 to disable (default {0})'.format(
+                    PerformanceTestModel.CYCLE_MAX_REPLICATION_LAG)),
         )
 
     def handle_project(self, project, **options):
@@ -34,6 +60,12 @@ class Command(ProjectBatchCommand):
         debug = options.get("debug", None)
         max_iterations = int(options.get("iterations", 50))
 
+        throttle = {}
+        for option in ["chunk_size", "max_rows_per_second",
+                       "max_replication_lag"]:
+            if options.get(option) is not None:
+                throttle[option] = int(options[option])
+
         ptm = PerformanceTestModel(project)
 
         sql_targets = {}
@@ -42,7 +74,7 @@ class Command(ProjectBatchCommand):
 
         while cycle_iterations > 0:
 
-            sql_targets = ptm.cycle_data(sql_targets)
+            sql_targets = ptm.cycle_data(sql_targets, **throttle)
 
             if debug:
                 print "Iterations: {0}".format(str(cycle_iterations))
@@ -2,7 +2,7 @@ import json
 
 from operator import itemgetter
 from optparse import make_option
-from datazilla.model import PerformanceTestModel
+from datazilla.model import PerformanceTestModel, utils
 from base import ProjectBatchCommand
 
 check_for_idx = """
@@ -95,7 +95,8 @@ class Command(ProjectBatchCommand):
         for obj in data_objects:
 
             tr_id = obj['test_run_id']
-            json_obj = json.loads(obj['json_blob'])
+            json_obj = json.loads(
+                utils.decompress_json_blob(obj['json_blob']))
             m_name = json_obj['test_machine']['name']
             m_type = json_obj['test_machine']['type']
             os_name = json_obj['test_machine']['os']
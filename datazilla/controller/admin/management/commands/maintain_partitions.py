@@ -0,0 +1,56 @@
+from optparse import make_option
+
+from datazilla.model import PerformanceTestModel
+from base import ProjectBatchCommand
+
+
+class Command(ProjectBatchCommand):
+    LOCK_FILE = "maintain_partitions"
+
+    help = (
+            "Seal new partitions and drop expired ones in the partitioned "
+            "perftest and objectstore tables of a project."
+            )
+
+    option_list = ProjectBatchCommand.option_list + (
+
+        make_option(
+            '--partition_days',
+            action='store',
+            dest='partition_days',
+            default=7,
+            help='Number of days of data held by each partition'),
+
+        make_option(
+            '--retention_days',
+            action='store',
+            dest='retention_days',
+            default=None,
+            help='Drop partitions sealed more than this many days ago '
+                 '(default {0})'.format(
+                    PerformanceTestModel.CYCLE_RETENTION_PERIOD / 86400)),
+        )
+
+    def handle_project(self, project, **options):
+
+        partition_period = int(options.get("partition_days", 7)) * 86400
+
+        retention_period = None
+        if options.get("retention_days") is not None:
+            retention_period = int(options["retention_days"]) * 86400
+
+        ptm = PerformanceTestModel(project)
+
+        results = ptm.maintain_partitions(partition_period, retention_period)
+
+        for table in sorted(results):
+            self.stdout.write(
+                "{0} {1}: added {2}, dropped {3}\n".format(
+                    project,
+                    table,
+                    ", ".join(results[table]['added']) or "none",
+                    ", ".join(results[table]['dropped']) or "none",
+                    )
+                )
+
+        ptm.disconnect()
@@ -0,0 +1,248 @@
+import signal
+import time
+
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+
+from datazilla.model import PerformanceTestModel, MetricsTestModel, PushLogModel
+from datazilla.model.sql.models import CRON_BATCH_NAMES
+from datazilla.controller.admin.objectstore import load_objects, get_loadlimit
+
+
+class Command(BaseCommand):
+    """
+    Long running worker that loads the objectstore of a set of projects.
+
+    One set of models, and so one set of database connections, is kept
+    per project for the life of the worker.  Each pass over the projects
+    measures the objectstore backlog and sizes the claim to it, a pass
+    that finds no work sleeps for ``poll_interval`` seconds.  SIGTERM or
+    SIGINT let the current claim finish before the worker exits.
+
+    """
+    help = (
+            "Continuously transfer json blobs from the objectstore of "
+            "one or more projects into their perftest schema."
+            )
+
+    option_list = BaseCommand.option_list + (
+
+        make_option(
+            '-p',
+            '--project',
+            action='append',
+            dest='projects',
+            default=None,
+            help="Project to process, can be used multiple times."),
+
+        make_option(
+            '--cron_batch',
+            action='append',
+            dest='cron_batches',
+            choices=CRON_BATCH_NAMES,
+            help=(
+                "Process all projects with this cron_batch value, can be "
+                "used multiple times.  Choices are: {0}".format(
+                    ", ".join(CRON_BATCH_NAMES))
+                )),
+
+        make_option(
+            '--min_loadlimit',
+            action='store',
+            dest='min_loadlimit',
+            default=5,
+            help='Smallest number of JSON blobs claimed at once'),
+
+        make_option(
+            '--max_loadlimit',
+            action='store',
+            dest='max_loadlimit',
+            default=200,
+            help='Largest number of JSON blobs claimed at once'),
+
+        make_option(
+            '--poll_interval',
+            action='store',
+            dest='poll_interval',
+            default=5,
+            help='Seconds to wait when no project has a backlog'),
+
+        make_option(
+            '--max_passes',
+            action='store',
+            dest='max_passes',
+            default=0,
+            help='Exit after this many passes over the projects '
+                 '(default 0, run until terminated)'),
+
+        make_option(
+            '--batch',
+            action='store_true',
+            dest='batch',
+            default=False,
+            help='Load the claimed JSON blobs together using bulk inserts'),
+
+        make_option(
+            '--group_commit',
+            action='store',
+            dest='group_commit',
+            default=1,
+            help='Number of JSON blobs loaded per transaction when they '
+                 'are loaded one at a time (default 1)'),
+
+        make_option(
+            '--pushlog_project',
+            action='store',
+            dest='pushlog_project',
+            default=None,
+            help="Push log project name (defaults to pushlog)"),
+        )
+
+
+    def println(self, val):
+        self.stdout.write("{0}\n".format(str(val)))
+
+
+    def handle(self, *args, **options):
+
+        projects = options.get("projects")
+        cron_batches = options.get("cron_batches")
+        verbosity = int(options.get("verbosity", 1))
+
+        if not (projects or cron_batches):
+            raise CommandError(
+                "You must provide either a project or cron_batch value."
+            )
+
+        if projects and cron_batches:
+            raise CommandError(
+                "You must provide either project or cron_batch, but not both.")
+
+        if cron_batches:
+            projects = PerformanceTestModel.get_cron_batch_projects(
+                cron_batches)
+
+        try:
+            min_loadlimit = int(options.get("min_loadlimit"))
+            max_loadlimit = int(options.get("max_loadlimit"))
+            poll_interval = float(options.get("poll_interval"))
+            max_passes = int(options.get("max_passes"))
+            group_commit = int(options.get("group_commit"))
+        except ValueError:
+            raise CommandError(
+                "min_loadlimit, max_loadlimit, poll_interval, max_passes and "
+                "group_commit must be numbers.")
+
+        batch = options.get("batch", False)
+
+        self.stopping = False
+        for signum in [ signal.SIGTERM, signal.SIGINT ]:
+            signal.signal(signum, self.stop)
+            # restart database calls interrupted by the signal, the
+            # loop checks self.stopping once they are done
+            signal.siginterrupt(signum, False)
+
+        self.models = {}
+        self.plm = PushLogModel(options.get("pushlog_project"))
+
+        self.println(
+            "Starting worker for projects: {0}".format(", ".join(projects)))
+
+        passes = 0
+
+        try:
+            while not self.stopping:
+
+                found_work = False
+
+                for project in projects:
+
+                    if self.stopping:
+                        break
+
+                    try:
+                        loaded = self.process_project(
+                            project, min_loadlimit, max_loadlimit, batch,
+                            group_commit)
+                    except Exception as e:
+                        ###
+                        #Keep serving the other projects, the models of
+                        #this one are rebuilt on the next pass
+                        ###
+                        self.stderr.write(
+                            "Error processing project {0}: {1}: {2}\n".format(
+                                project, e.__class__.__name__, e))
+                        self.drop_models(project)
+                        continue
+
+                    if loaded is not None:
+                        found_work = True
+
+                        if verbosity > 1:
+                            self.println(
+                                "{0}: loaded {1} test runs".format(
+                                    project, len(loaded)))
+
+                passes += 1
+                if max_passes and passes >= max_passes:
+                    break
+
+                if not found_work:
+                    self.sleep(poll_interval)
+
+        finally:
+            for project in self.models.keys():
+                self.drop_models(project)
+            self.plm.disconnect()
+
+        self.println("Worker stopped after {0} passes.".format(passes))
+
+
+    def process_project(
+        self, project, min_loadlimit, max_loadlimit, batch, group_commit=1):
+        """
+        Load the objectstore backlog of ``project``, up to one claim.
+
+        Returns the loaded test_run_ids, or None if there was no backlog.
+
+        """
+        if project not in self.models:
+            self.models[project] = (
+                PerformanceTestModel(project), MetricsTestModel(project)
+                )
+
+        ptm, mtm = self.models[project]
+
+        backlog = ptm.get_objectstore_backlog(max_loadlimit)
+
+        if not backlog:
+            return None
+
+        loadlimit = get_loadlimit(backlog, min_loadlimit, max_loadlimit)
+
+        return load_objects(
+            ptm, mtm, self.plm, loadlimit, batch=batch,
+            group_commit=group_commit)
+
+
+    def drop_models(self, project):
+        """Disconnect and forget the models of ``project``."""
+        for model in self.models.pop(project, ()):
+            try:
+                model.disconnect()
+            except Exception:
+                # the connection is already gone
+                pass
+
+
+    def sleep(self, seconds):
+        """Sleep for ``seconds`` unless asked to stop first."""
+        stop_time = time.time() + seconds
+        while (not self.stopping) and (time.time() < stop_time):
+            time.sleep(min(1, max(0, stop_time - time.time())))
+
+
+    def stop(self, signum, frame):
+        """Signal handler, finish the current claim and exit."""
+        self.println("Received signal {0}, stopping.".format(signum))
+        self.stopping = True
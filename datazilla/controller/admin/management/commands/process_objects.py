@@ -1,9 +1,15 @@
+import multiprocessing
+
 from optparse import make_option
+from django.db import connection
 
 from datazilla.model import PerformanceTestModel, MetricsTestModel, PushLogModel
 from base import ProjectBatchCommand
 
 from datazilla.controller.admin.metrics.perftest_metrics import compute_test_run_metrics
+from datazilla.controller.admin.objectstore import (
+    load_objects, load_project_objects
+    )
 
 class Command(ProjectBatchCommand):
     LOCK_FILE = "process_objects"
@@ -24,6 +30,30 @@ class Command(ProjectBatchCommand):
             help='Number of JSON blobs to fetch per '
                  'single iteration of uncompacting'),
 
+        make_option(
+            '--batch',
+            action='store_true',
+            dest='batch',
+            default=False,
+            help='Load the claimed JSON blobs together using bulk '
+                 'inserts instead of one at a time'),
+
+        make_option(
+            '--group_commit',
+            action='store',
+            dest='group_commit',
+            default=1,
+            help='Number of JSON blobs loaded per transaction when they '
+                 'are loaded one at a time (default 1)'),
+
+        make_option(
+            '--workers',
+            action='store',
+            dest='workers',
+            default=1,
+            help='Number of worker processes, each claiming up to '
+                 'loadlimit JSON blobs'),
+
         make_option(
             '--debug',
             action='store_true',
@@ -48,11 +78,28 @@ class Command(ProjectBatchCommand):
         pushlog_project = options.get("pushlog_project", 'pushlog')
         loadlimit = int(options.get("loadlimit", 1))
         debug = options.get("debug", None)
+        batch = options.get("batch", False)
+        workers = int(options.get("workers", 1))
+        group_commit = int(options.get("group_commit", 1))
+
+        if workers > 1:
+            self.handle_workers(
+                project, pushlog_project, loadlimit, batch, workers,
+                group_commit)
+            return
 
-        test_run_ids = []
         ptm = PerformanceTestModel(project)
-        test_run_ids = ptm.process_objects(loadlimit)
-        ptm.disconnect()
+        mtm = MetricsTestModel(project)
+        plm = PushLogModel(pushlog_project)
+
+        test_run_ids = load_objects(
+            ptm, mtm, plm, loadlimit, batch=batch, group_commit=group_commit)
+
+        if debug:
+            self.stdout.write(
+                "Reference id cache hits: {hits}, misses: {misses}\n".format(
+                    **ptm.get_ref_id_cache_stats())
+                )
 
         """
         metrics_exclude_projects = set(['b2g', 'games', 'jetperf', 'marketapps', 'microperf', 'stoneridge', 'test', 'webpagetest'])
@@ -65,25 +112,36 @@ class Command(ProjectBatchCommand):
                 )
         """
 
-        mtm = MetricsTestModel(project)
-        revisions_without_push_data = mtm.load_test_data_all_dimensions(
-            test_run_ids)
-
-        if revisions_without_push_data:
-
-            revision_nodes = {}
-            plm = PushLogModel(pushlog_project)
-
-            for revision in revisions_without_push_data:
-
-                node = plm.get_node_from_revision(
-                    revision, revisions_without_push_data[revision])
+        ptm.disconnect()
+        mtm.disconnect()
+        plm.disconnect()
 
-                revision_nodes[revision] = node
 
-            plm.disconnect()
-            mtm.set_push_data_all_dimensions(revision_nodes)
+    def handle_workers(
+        self, project, pushlog_project, loadlimit, batch, workers,
+        group_commit=1):
+        """
+        Load ``workers`` claims of ``loadlimit`` rows in parallel.
 
-        mtm.disconnect()
+        Every process claims its own rows with its own claim token, so the
+        claims never overlap.
 
+        """
+        # forked children must not share the parent's database connection
+        connection.close()
+
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(
+                load_project_objects,
+                [ (project, pushlog_project, loadlimit, batch,
+                   group_commit) ] * workers
+                )
+        finally:
+            pool.close()
+            pool.join()
 
+        self.stdout.write(
+            "Loaded {0} test runs with {1} workers\n".format(
+                sum(len(r) for r in results), workers)
+            )
@@ -64,6 +64,21 @@ class Command(BaseCommand):
                     default=None,
                     help=("The project name for the the pushlog database " +
                           "storage (default to 'pushlog')")),
+
+        make_option("--workers",
+                    action="store",
+                    dest="workers",
+                    default=None,
+                    help=("Number of branches to fetch pushlogs for " +
+                          "concurrently (default 4)")),
+
+        make_option("--full_sync",
+                    action="store_true",
+                    dest="full_sync",
+                    default=False,
+                    help=("Fetch the whole numdays or hours window for " +
+                          "every branch, instead of only the pushes " +
+                          "after the last one stored")),
         )
 
 
@@ -80,6 +95,8 @@ class Command(BaseCommand):
         branch = options.get("branch")
         verbosity = options.get("verbosity")
         project = options.get("project")
+        workers = options.get("workers")
+        full_sync = options.get("full_sync")
 
         if not repo_host:
             raise CommandError("You must supply a host name for the repo pushlogs " +
@@ -101,6 +118,12 @@ class Command(BaseCommand):
                 except ValueError:
                     raise CommandError("hours must be an integer.")
 
+        if workers:
+            try:
+                workers = int(workers)
+            except ValueError:
+                raise CommandError("workers must be an integer.")
+
         pidfile = "{0}.pid".format(self.LOCK_FILE)
 
         if os.path.isfile(pidfile):
@@ -162,7 +185,9 @@ class Command(BaseCommand):
         plm = PushLogModel(project=project, out=self.stdout, verbosity=verbosity)
 
         # store the pushlogs for the branch specified, or all branches
-        summary = plm.store_pushlogs(repo_host, numdays, hours, enddate, branch)
+        summary = plm.store_pushlogs(
+            repo_host, numdays, hours, enddate, branch, workers=workers,
+            incremental=not full_sync)
         self.println(("Branches: {0}\nPushlogs stored: {1}, skipped: {2}\n" +
                       "Changesets stored: {3}, skipped: {4}").format(
                         summary["branches"],
@@ -31,18 +31,7 @@ def compute_test_run_metrics(
     plm = PushLogModel(pushlog_project)
     mtm = MetricsTestModel(project)
 
-    #####
-    #We don't know if we need the pushlog, or for what branches
-    #it will be required.  Make sure to only retrieve once for each
-    #branch encountered and only when we need it.
-    ####
-    pushlog = {}
-
-    #####
-    #This data structure is used to lookup up the index position
-    #of a revision in the push log to start walking from
-    #####
-    pushlog_lookup = {}
+    test_run_data = []
 
     for test_run_id in test_run_ids:
 
@@ -55,16 +44,33 @@ def compute_test_run_metrics(
             println(msg, debug)
             continue
 
+        test_run_data.append((test_run_id, child_test_data))
+
+    ##
+    #Get the pushlog nodes of all the test runs with one query
+    ##
+    push_nodes = plm.get_nodes_from_revisions([
+        _get_revision_and_branch(
+            child_test_data, _get_first_mkey(child_test_data)
+            )
+        for test_run_id, child_test_data in test_run_data
+        ])
+
+    for test_run_id, child_test_data in test_run_data:
+
         first_key = _get_first_mkey(child_test_data)
 
         rep_count = len(child_test_data[first_key]['values'])
 
         test_name = child_test_data[first_key]['ref_data']['test_name']
 
-        child_revision, push_node, branch = _get_revision_and_push_node(
-            plm, child_test_data, first_key
+        child_revision, branch = _get_revision_and_branch(
+            child_test_data, first_key
             )
 
+        #Get the pushlog node associated with this branch and revision
+        push_node = push_nodes.get((child_revision, branch), {})
+
         base_message = u"{0} {1}".format(child_revision, str(test_run_id))
 
         if not check_run_conditions(
@@ -81,9 +87,8 @@ def compute_test_run_metrics(
         try:
 
             stored_metric_keys = _run_metrics(
-                test_run_id, mtm, plm, child_test_data, pushlog,
-                pushlog_lookup, child_revision, push_node, branch,
-                test_name, debug
+                test_run_id, mtm, plm, child_test_data, child_revision,
+                push_node, branch, test_name, debug
                 )
 
         except Exception as e:
@@ -162,31 +167,20 @@ def check_run_conditions(
 
     return True
 
-def _build_push_lookup(mtm, branch_id, pushlog, pushlog_lookup):
-    for index, node in enumerate(pushlog[branch_id]):
-        if branch_id not in pushlog_lookup:
-            pushlog_lookup[ branch_id ] = {}
-        pushlog_lookup[ branch_id ][ mtm.truncate_revision( node['node'] ) ] = index
-
-def _get_revision_and_push_node(plm, data, first_key):
+def _get_revision_and_branch(data, first_key):
 
     revision = data[first_key]['ref_data']['revision']
 
     branch = data[first_key]['ref_data']['branch']
 
-    #Get the pushlog node associated with this branch and revision
-    push_node = plm.get_node_from_revision(
-        revision, branch
-    )
-
-    return revision, push_node, branch
+    return revision, branch
 
 def _get_first_mkey(data):
     return data.keys()[0]
 
 def _run_metrics(
-    test_run_id, mtm, plm, child_test_data, pushlog, pushlog_lookup,
-    child_revision, push_node, branch, test_name, debug
+    test_run_id, mtm, plm, child_test_data, child_revision, push_node,
+    branch, test_name, debug
     ):
     """
     Run all metrics tests on the test_run_id provided.
@@ -196,6 +190,11 @@ def _run_metrics(
 
     stored_metric_keys = []
 
+    #Metric datums with a threshold, their t-tests are run together once
+    #all of them are known
+    threshold_keys = []
+    threshold_lookup = {}
+
     for mkey in child_test_data:
 
         ####
@@ -213,7 +212,6 @@ def _run_metrics(
 
             if debug:
                 println(u"\tThreshold data found for metric datum", debug)
-                println(u"\t\tCalling run_metric_method() with:", debug)
 
                 println(
                     u"\t\tchild values:{0}".format(
@@ -236,41 +234,8 @@ def _run_metrics(
                     debug
                     )
 
-            #Run the metric method
-            try:
-                test_result = mtm.run_metric_method(
-                    child_test_data[mkey]['ref_data'],
-                    child_test_data[mkey]['values'],
-                    threshold_data[mkey]['values'],
-                    threshold_data[mkey]['metric_values'],
-                    )
-            except MetricMethodError as e:
-                ###
-                #If we get an exception here, skip the test_run_id
-                ###
-                _handle_exception(
-                    mtm, e, test_name, child_revision, test_run_id,
-                    compute_test_run_metrics.__name__, debug
-                    )
-
-                continue
-
-            if debug:
-                #avoid formatting data if possible
-                println(
-                    u"\t\tStoring results:{0}".format(str(test_result)),
-                    debug
-                    )
-
-            #Store the results
-            mtm.store_metric_results(
-                child_revision,
-                child_test_data[mkey]['ref_data'],
-                test_result,
-                threshold_data[mkey]['ref_data']['test_run_id']
-                )
-
-            stored_metric_keys.append(mkey)
+            threshold_keys.append(mkey)
+            threshold_lookup[mkey] = threshold_data[mkey]
 
         else:
             #No threshold for the metrics datum
@@ -286,21 +251,15 @@ def _run_metrics(
             # the threshold will be set.
             branch_id = push_node['branch_id']
 
-            if branch_id not in pushlog:
-                #Get the last five days of the pushlog for
-                #this branch.
-                pushlog[ branch_id ] = plm.get_branch_pushlog(
-                    branch_id, 5, 0
-                    )
+            #The index is shared by all test runs in the process, it
+            #picks up new pushes when the child isn't in it yet
+            pushlog = plm.get_branch_pushlog_index(
+                branch_id, child_revision
+                )
 
-                _build_push_lookup(
-                    mtm, branch_id,
-                    pushlog, pushlog_lookup
-                    )
+            index = pushlog.get_position(child_revision)
 
-            if child_revision in pushlog_lookup[branch_id]:
-                index = pushlog_lookup[branch_id][child_revision]
-            else:
+            if index is None:
                 #revision is not found in the pushlog, we cannot
                 #proceed without an index at this point
                 println(
@@ -317,7 +276,7 @@ def _run_metrics(
 
                 msg = u"\t\tPush log: branch:{0},".format(branch)
                 msg = u"{0} index:{1} push log length:{2}".format(
-                        msg, str(index), str(len(pushlog[ branch_id ]))
+                        msg, str(index), str(len(pushlog))
                         )
 
                 println(msg, debug)
@@ -334,7 +293,7 @@ def _run_metrics(
             #for the metric datum.
             ####
             parent_data, test_result = mtm.get_parent_test_data(
-                pushlog[ branch_id ], index, mkey,
+                pushlog, index, mkey,
                 child_test_data[mkey]['ref_data'],
                 child_test_data[mkey]['values']
             )
@@ -391,6 +350,54 @@ def _run_metrics(
             else:
                 println(u"\t\tNo parent found", debug)
 
+    if threshold_keys:
+
+        println(
+            u"\t\tCalling run_metric_method_many() with {0} datums".format(
+                len(threshold_keys)
+                ),
+            debug
+            )
+
+        #Run the metric method on all datums with a threshold
+        test_results = mtm.run_metric_method_many(
+            test_name,
+            [ ( child_test_data[mkey]['values'],
+                threshold_lookup[mkey]['values'],
+                threshold_lookup[mkey]['metric_values'] )
+              for mkey in threshold_keys ]
+            )
+
+        for mkey, test_result in zip(threshold_keys, test_results):
+
+            if isinstance(test_result, MetricMethodError):
+                ###
+                #If we get an exception here, skip the metric datum
+                ###
+                _handle_exception(
+                    mtm, test_result, test_name, child_revision,
+                    test_run_id, compute_test_run_metrics.__name__, debug
+                    )
+
+                continue
+
+            if debug:
+                #avoid formatting data if possible
+                println(
+                    u"\t\tStoring results:{0}".format(str(test_result)),
+                    debug
+                    )
+
+            #Store the results
+            mtm.store_metric_results(
+                child_revision,
+                child_test_data[mkey]['ref_data'],
+                test_result,
+                threshold_lookup[mkey]['ref_data']['test_run_id']
+                )
+
+            stored_metric_keys.append(mkey)
+
     return stored_metric_keys
 
 def _run_summary(
@@ -400,6 +407,10 @@ def _run_summary(
 
     println(u"\tStarting _run_summary()", debug)
 
+    #Metric datums with metrics data, their summaries are run together
+    summary_keys = []
+    summary_lookup = {}
+
     for mkey in stored_metric_keys:
 
         child_metrics_data = mtm.get_metrics_data_from_ref_data(
@@ -429,10 +440,23 @@ def _run_summary(
                 debug
                 )
 
-        summary_results = mtm.run_metric_summary(
-            child_metrics_data[mkey]['ref_data'],
-            child_metrics_data[mkey]['values']
-            )
+        summary_keys.append(mkey)
+        summary_lookup[mkey] = child_metrics_data
+
+    if not summary_keys:
+        return
+
+    first_key = summary_keys[0]
+    test_name = summary_lookup[first_key][first_key]['ref_data']['test_name']
+
+    all_summary_results = mtm.run_metric_summary_many(
+        test_name,
+        [ summary_lookup[mkey][mkey]['values'] for mkey in summary_keys ]
+        )
+
+    for mkey, summary_results in zip(summary_keys, all_summary_results):
+
+        child_metrics_data = summary_lookup[mkey]
 
         if debug:
             println(
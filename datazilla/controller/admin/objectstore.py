@@ -0,0 +1,64 @@
+"""
+Functions for loading objectstore data into the perftest schema.
+
+"""
+from datazilla.model import PerformanceTestModel, MetricsTestModel, PushLogModel
+
+
+def load_objects(ptm, mtm, plm, loadlimit, batch=False, group_commit=1):
+    """
+    Process up to ``loadlimit`` objectstore rows of ``ptm.project``.
+
+    ``batch`` and ``group_commit`` are passed on to ``process_objects``.
+
+    The loaded test runs are summarized into test_data_all_dimensions and
+    associated with their push data.  Returns the loaded test_run_ids.
+
+    """
+    test_run_ids = ptm.process_objects(
+        loadlimit, batch=batch, group_commit=group_commit)
+
+    # the summary is computed from the replicates that were just loaded
+    revisions_without_push_data = mtm.load_test_data_all_dimensions(
+        test_run_ids, replicates=ptm.pop_loaded_replicates(test_run_ids))
+
+    if revisions_without_push_data:
+
+        nodes = plm.get_nodes_from_revisions(
+            revisions_without_push_data.items())
+
+        mtm.set_push_data_all_dimensions(dict(
+            (revision, nodes.get((revision, branch), {}))
+            for revision, branch in revisions_without_push_data.items()
+            ))
+
+    return test_run_ids
+
+
+def load_project_objects(args):
+    """
+    Process one claim of objectstore rows with a private set of models.
+
+    ``args`` is a (project, pushlog_project, loadlimit, batch,
+    group_commit) tuple so this can be handed to ``multiprocessing.Pool.map``,
+    each worker process opens and closes its own database connections.
+
+    """
+    project, pushlog_project, loadlimit, batch, group_commit = args
+
+    ptm = PerformanceTestModel(project)
+    mtm = MetricsTestModel(project)
+    plm = PushLogModel(pushlog_project)
+
+    try:
+        return load_objects(
+            ptm, mtm, plm, loadlimit, batch=batch, group_commit=group_commit)
+    finally:
+        ptm.disconnect()
+        mtm.disconnect()
+        plm.disconnect()
+
+
+def get_loadlimit(backlog, min_loadlimit, max_loadlimit):
+    """Size the next claim to the backlog, within the given bounds."""
+    return max(min_loadlimit, min(max_loadlimit, backlog))
@@ -3,6 +3,7 @@ Functions for walking the push log and populating
 the metrics schema
 """
 from datazilla.model import PushLogModel, MetricsTestModel
+from datazilla.model.pushlog_index import PushLogIndex
 
 # Branches that require special handling
 SPECIAL_HANDLING_BRANCHES = set(['Try', 'Try-Non-PGO'])
@@ -68,13 +69,14 @@ def run_metrics(project, pushlog_project, numdays, daysago):
         if b['name'] in SPECIAL_HANDLING_BRANCHES:
             continue
 
-        pushlog = plm.get_branch_pushlog(
+        pushlog = PushLogIndex(plm.get_branch_pushlog(
             b['id'], numdays, daysago
-            )
+            ))
 
-        for index, node in enumerate(pushlog):
+        for index in range(len(pushlog)):
 
-            revision = mtm.truncate_revision(node['node'])
+            node = pushlog[index]
+            revision = node['node']
 
             #Get the test value data for this revision
             child_test_data = mtm.get_test_values_by_revision(revision)
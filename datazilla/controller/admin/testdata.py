@@ -259,6 +259,46 @@ def get_test_data_all_dimensions(
 
     return data
 
+def iter_test_data_all_dimensions_json(
+    project, product, branch, os, os_version, test, page,
+    start_time, stop_time, compact=False):
+    """
+    Return the json of ``get_test_data_all_dimensions`` as an iterator.
+
+    The rows are read from a server side cursor and encoded while the
+    iterator is consumed.  If ``compact`` is set the rows are lists of
+    the values of the "columns" listed once in the response.
+
+    """
+    mtm = factory.get_mtm(project)
+
+    columns = None
+    if compact:
+        columns = mtm.ALL_DIMENSION_COLUMNS
+
+    try:
+        data = mtm.get_data_all_dimensions(
+            product, branch, os, os_version, test, page, start_time,
+            stop_time, stream=True
+            )
+    except:
+        mtm.disconnect()
+        raise
+
+    return _disconnect_after(
+        mtm, data['data'], utils.iter_json(data, 'data', columns=columns))
+
+def _disconnect_after(model, rows, pieces):
+    """Pass on ``pieces``, then release the rows and the connection."""
+    try:
+        for piece in pieces:
+            yield piece
+    finally:
+        # an unfinished server side cursor has to go before the connection
+        if hasattr(rows, 'close'):
+            rows.close()
+        model.disconnect()
+
 def get_platforms_and_tests(project, product, branch, min_timestamp, max_timestamp):
 
     mtm = factory.get_mtm(project)
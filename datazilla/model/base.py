@@ -8,11 +8,14 @@
 access.
 
 """
+import calendar
 import datetime
+import hashlib
+import logging
 import time
 import json
 import urllib
-import socket
+import uuid
 import zlib
 import MySQLdb
 
@@ -25,9 +28,15 @@ from django.core.cache import cache
 
 
 from . import utils
+from .fetcher import HttpFetcher
+from .pushlog_index import PushLogIndex
+from .response_cache import response_cache
 from .sql.models import SQLDataSource
 
 
+logger = logging.getLogger(__name__)
+
+
 class DatazillaModelBase(object):
     """Base model class for all Datazilla models"""
 
@@ -61,6 +70,33 @@ class PushLogModel(DatazillaModelBase):
     CONTENT_TYPES = ["hgmozilla"]
     DEFAULT_PROJECT = "pushlog"
 
+    # Concurrent json-pushes requests, socket timeout in seconds of each
+    # request and retries of a failed request after 1, 2, 4... seconds.
+    # In production the json-pushes web service occasionally hangs on a
+    # TCP CLOSE_WAIT state, the timeout keeps that from stalling the
+    # other branches.
+    FETCH_WORKERS = 4
+    FETCH_TIMEOUT = 120
+    FETCH_RETRIES = 2
+    FETCH_BACKOFF = 1
+
+    # Rows per multi-row insert of pushlogs and changesets
+    INSERT_CHUNK_SIZE = 500
+
+    # Seconds a shared PushLogIndex is extended with new pushes before it
+    # is rebuilt from scratch
+    PUSHLOG_INDEX_MAX_AGE = 3600
+
+    # (project, branch_id) -> (PushLogIndex, time built), shared by the
+    # instances of a process
+    _pushlog_indexes = {}
+
+    # (project, revision, branch) -> push node of the revisions looked up
+    # most recently, shared by the instances of a process.  Only nodes
+    # that were found are kept, a push never changes once stored.
+    NODE_CACHE_SIZE = 10000
+    _node_cache = utils.LRUCache(NODE_CACHE_SIZE)
+
     # The "project" defaults to "pushlog" but you can pass in any
     # project name you like.
 
@@ -249,6 +285,44 @@ class PushLogModel(DatazillaModelBase):
 
         return data
 
+    def get_branch_pushlog_index(self, branch_id, revision=None):
+        """
+        Return a ``PushLogIndex`` of all pushes of branch ``branch_id``.
+
+        The index is shared by every instance in the process.  If
+        ``revision`` isn't in it yet the pushes stored since it was built
+        are added, once it's older than ``PUSHLOG_INDEX_MAX_AGE`` it's
+        rebuilt.
+
+        """
+        key = (self.project, branch_id)
+        now = time.time()
+
+        index, built = self._pushlog_indexes.get(key, (None, None))
+
+        if (index is None) or (now - built > self.PUSHLOG_INDEX_MAX_AGE):
+
+            index = PushLogIndex(self.get_branch_pushlog(branch_id))
+            self._pushlog_indexes[key] = (index, now)
+
+        elif revision and index.get_position(revision) is None:
+
+            index.extend(self.hg_ds.dhub.execute(
+                proc='hgmozilla.selects.get_branch_pushlog_after',
+                debug_show=self.DEBUG,
+                return_type='tuple',
+                placeholders=[branch_id, index.last_push_id]
+                ))
+
+        return index
+
+
+    @classmethod
+    def clear_pushlog_indexes(cls):
+        """Drop the pushlog indexes of all projects."""
+        cls._pushlog_indexes.clear()
+
+
     def get_branch_pushlog_by_revision(
         self, revision, branch_name, pushes_before, pushes_after
         ):
@@ -371,7 +445,8 @@ class PushLogModel(DatazillaModelBase):
 
 
     def store_pushlogs(
-        self, repo_host, numdays, hours=None, enddate=None, branch=None
+        self, repo_host, numdays, hours=None, enddate=None, branch=None,
+        workers=None, incremental=True
         ):
         """
         Main entry point to store pushlogs for branches.
@@ -381,51 +456,94 @@ class PushLogModel(DatazillaModelBase):
 
         If enddate is None, then use today as the enddate.
 
-        """
+        The json-pushes documents of the branches are fetched with up to
+        ``workers`` concurrent requests (default ``FETCH_WORKERS``), and
+        stored as they arrive.  ``repo_host`` can include the url scheme,
+        it defaults to https.
 
-        ###
-        #This sets the socket timeout globally for all socket operations.
-        #Its default setting is None.  In production, the /json-pushes
-        #web service call will occasionally hang on a TCP CLOSE_WAIT state.
-        ###
-        socket.setdefaulttimeout(120)
+        With ``incremental``, branches that already have a gap free run of
+        pushes in the numdays or hours window only request the pushes
+        after the last one stored, see ``get_push_high_water_marks``.  The
+        other branches, and all of them when an enddate is given, fetch
+        the whole window.
 
+        """
         # fetch the list of known branches.
         branch_list = self.get_branch_list(branch)
 
         # parameters sent to the requests for pushlog data
         params = {}
+        since = None
         if numdays:
             params = self.get_params(numdays, enddate)
+            since = int(time.mktime(
+                time.strptime(params["startdate"], "%m/%d/%Y")))
 
         if hours:
             params = {
                 "full": 1,
                 "maxhours": hours,
                 }
+            since = utils.get_now_timestamp() - int(hours) * 3600
+
+        high_water_marks = {}
+        if incremental and since and not enddate:
+            high_water_marks = self.get_push_high_water_marks(since)
+
+        if "://" not in repo_host:
+            repo_host = "https://{0}".format(repo_host)
+
+        branches = {}
+        requests = []
 
         for br in branch_list:
-            self.println(u"Branch: pushlogs for {0}".format(
-                unicode(br["name"])).encode("UTF-8"),
-                1
-            )
+
+            branch_params = params
+
+            if br["id"] in high_water_marks:
+                # pushes with an id greater than startID
+                branch_params = {
+                    "full": 1,
+                    "startID": high_water_marks[ br["id"] ]["push_id"],
+                    }
 
             uri = "{0}/json-pushes".format(br["uri"])
-            url = "https://{0}/{1}?{2}".format(
+            url = "{0}/{1}?{2}".format(
                 repo_host,
                 uri,
-                urllib.urlencode(params),
+                urllib.urlencode(branch_params),
                 )
             self.println("URL: {0}".format(url), 1)
-            # fetch the JSON content from the constructed URL.
 
-            json_data = ''
+            branches[ br["id"] ] = br
+            requests.append( (br["id"], url) )
 
-            try:
-                res = urllib.urlopen(url)
-                json_data = res.read()
+        fetcher = HttpFetcher(
+            workers=workers or self.FETCH_WORKERS,
+            timeout=self.FETCH_TIMEOUT,
+            retries=self.FETCH_RETRIES,
+            backoff=self.FETCH_BACKOFF,
+            )
+
+        ###
+        #The fetcher threads only do the http requests, the pushlogs are
+        #stored here as each branch arrives so all database access stays
+        #on this thread's connection.
+        ###
+        for branch_id, json_data, error in fetcher.fetch(requests):
+
+            br = branches[branch_id]
 
-            except socket.timeout:
+            self.println(u"Branch: pushlogs for {0}".format(
+                unicode(br["name"])).encode("UTF-8"),
+                1
+            )
+
+            if error:
+                self.println("--Skip branch {0}: {1}".format(
+                    br["name"],
+                    error,
+                    ))
                 continue
 
             try:
@@ -435,7 +553,7 @@ class PushLogModel(DatazillaModelBase):
 
             except ValueError as e:
                 self.println("--Skip branch {0}: push data not valid JSON: {1}".format(
-                    branch,
+                    br["name"],
                     json_data,
                     ))
 
@@ -447,47 +565,129 @@ class PushLogModel(DatazillaModelBase):
             "changesets_skipped": self.changeset_skipped_count,
         }
 
+    def get_push_high_water_marks(self, since):
+        """
+        Return the last push stored for the branches that pushed since
+        ``since``.
+
+        The result maps branch ids to a dict with the ``push_id`` and
+        ``date`` of the newest push.  json-pushes numbers the pushes of a
+        branch consecutively, branches with a gap in the push ids stored
+        since ``since`` are left out so they are synced over the whole
+        window again.
+
+        """
+        data = self.hg_ds.dhub.execute(
+            proc='hgmozilla.selects.get_push_ranges',
+            debug_show=self.DEBUG,
+            placeholders=[since],
+            return_type='tuple',
+            )
+
+        high_water_marks = {}
+
+        for row in data:
+
+            expected = row["max_push_id"] - row["min_push_id"] + 1
+
+            if row["push_count"] != expected:
+                self.println("--Gap in pushes of branch id {0}: {1}".format(
+                    row["branch_id"],
+                    expected - row["push_count"],
+                    ), 1)
+                continue
+
+            high_water_marks[ row["branch_id"] ] = {
+                "push_id": row["max_push_id"],
+                "date": row["max_date"],
+                }
+
+        return high_water_marks
+
     def get_node_from_revision(self, revision, branch):
+        """Return the push node of ``revision`` on ``branch``, or {}."""
+        return self.get_nodes_from_revisions(
+            [ (revision, branch) ]).get((revision, branch), {})
+
+    def get_nodes_from_revisions(self, pairs):
+        """
+        Return the push nodes of many (revision, branch) ``pairs`` at once.
+
+        A branch matches its name or an alt_name of the branch_map.
+        Returns a dict of (revision, branch) to node, pairs without a push
+        are left out.  The nodes found are kept in a process wide cache,
+        only the pairs that aren't in it are looked up, with one query.
+
+        """
+        pairs = set([ (r, b) for r, b in pairs if r and b ])
 
-        proc = 'hgmozilla.selects.get_node_from_revision'
+        nodes = {}
+        for pair in pairs:
+            node = self._node_cache.get((self.project,) + pair)
+            if node is not None:
+                nodes[pair] = node
 
+        pairs.difference_update(nodes)
+
+        if not pairs:
+            return nodes
+
+        revisions = sorted(set([ revision for revision, branch in pairs ]))
+        branches = sorted(set([ branch for revision, branch in pairs ]))
+
+        # revisions are node prefixes, a LIKE on them uses the node index
         data = self.hg_ds.dhub.execute(
-            proc=proc,
+            proc='hgmozilla.selects.get_nodes_from_revisions',
             debug_show=self.DEBUG,
             return_type='tuple',
-            placeholders=[revision, branch, branch]
+            placeholders=[ r + '%' for r in revisions ] + branches + branches,
+            replace=[
+                ' OR '.join( ['c.node LIKE %s'] * len(revisions) ),
+                ','.join( ['%s'] * len(branches) ),
+                ]
             )
 
-        node = {}
-        if data:
-            node = data[0]
+        revision_lengths = set([ len(revision) for revision in revisions ])
+
+        for row in data:
+            for length in revision_lengths:
+                revision = (row['node'] or '')[0:length]
+
+                for branch in (row['name'], row['alt_name']):
+                    key = (revision, branch)
+                    # rows come in push order, keep the first push
+                    if key in pairs and key not in nodes:
+                        nodes[key] = row
+                        self._node_cache.set((self.project,) + key, row)
 
-        return node
+        return nodes
+
+    @classmethod
+    def clear_node_cache(cls):
+        """Drop the push nodes cached by get_nodes_from_revisions."""
+        cls._node_cache.clear()
 
     def _insert_branch_pushlogs(self, branch_id, pushlog_dict):
-        """Loop through all the pushlogs and insert them."""
-        for pushlog_json_id, pushlog in pushlog_dict.items():
-            # make sure the pushlog_id isn't confused with a previous iteration
-            self.println("    Pushlog {0}".format(pushlog_json_id), 1)
+        """
+        Insert the pushlogs of ``pushlog_dict`` not yet stored for the branch.
 
-            placeholders = [
-                pushlog_json_id,
-                pushlog["date"],
-                pushlog["user"],
-                branch_id,
-                ]
-            try:
-                pushlog_id = self._insert_data_and_get_id(
-                    "set_pushlog",
-                    placeholders=placeholders,
-                    )
+        The push ids already stored for the branch are found with one
+        query, only the new pushes and their changesets are inserted, with
+        multi-row inserts.  Duplicates that remain, a changeset listed
+        twice or a push stored by a concurrent run, are dropped by the
+        unique keys and counted as skipped.
+
+        """
+        if not pushlog_dict:
+            return
+
+        stored_ids = self._get_pushlog_ids(branch_id, pushlog_dict.keys())
+
+        new_pushlogs = []
 
-                # process the nodes of the pushlog
-                self._insert_pushlog_changesets(pushlog_id, pushlog["changesets"])
-                self.pushlog_count += 1
+        for pushlog_json_id, pushlog in sorted(pushlog_dict.items()):
 
-            except MySQLdb.IntegrityError as e:
-                self.println(e)
+            if int(pushlog_json_id) in stored_ids:
                 self.println("--Skip dup- pushlog: {0}".format(
                     pushlog_json_id,
                 ), 1)
@@ -495,36 +695,93 @@ class PushLogModel(DatazillaModelBase):
                 # if a pushlog is skipped, then all its changesets are
                 # also skipped as a result.
                 self.changeset_skipped_count += len(pushlog["changesets"])
+                continue
 
+            self.println("    Pushlog {0}".format(pushlog_json_id), 1)
+            new_pushlogs.append( (int(pushlog_json_id), pushlog) )
 
-    def _insert_pushlog_changesets(self, pushlog_id, changeset_list):
-        """Loop through all the changesets in a pushlog, and insert them."""
+        if not new_pushlogs:
+            return
 
-        for cs in changeset_list:
-            self.println("        Changeset {0}".format(cs["node"]), 2)
-            placeholders = [
-                cs["node"],
-                cs["author"],
-                cs["branch"],
-                cs["desc"],
-                pushlog_id,
-                ]
+        stored = self._insert_rows(
+            "set_pushlog",
+            [ [ push_id, pushlog["date"], pushlog["user"], branch_id ]
+              for push_id, pushlog in new_pushlogs ]
+            )
 
-            try:
-                self._insert_data_and_get_id(
-                    "set_node",
-                    placeholders=placeholders,
-                    )
-                self.changeset_count += 1
+        self.pushlog_count += stored
+        self.pushlog_skipped_count += len(new_pushlogs) - stored
+
+        pushlog_ids = self._get_pushlog_ids(
+            branch_id, [ push_id for push_id, pushlog in new_pushlogs ])
 
-            except MySQLdb.IntegrityError:
-                self.println("--Skip changeset dup- pushlog: {0}, node: {1}".format(
-                    pushlog_id,
+        changesets = []
+
+        for push_id, pushlog in new_pushlogs:
+            for cs in pushlog["changesets"]:
+                self.println("        Changeset {0}".format(cs["node"]), 2)
+                changesets.append([
                     cs["node"],
-                    ))
-                self.changeset_skipped_count += 1
+                    cs["author"],
+                    cs["branch"],
+                    cs["desc"],
+                    pushlog_ids[push_id],
+                    ])
+
+        stored = self._insert_rows("set_node", changesets)
+
+        self.changeset_count += stored
+        self.changeset_skipped_count += len(changesets) - stored
+
+
+    def _get_pushlog_ids(self, branch_id, push_ids):
+        """Return a dict of pushlogs.id by push_id of stored ``push_ids``."""
+
+        pushlog_ids = {}
+        push_ids = list(push_ids)
+
+        for i in range(0, len(push_ids), self.INSERT_CHUNK_SIZE):
+
+            chunk = push_ids[i:i + self.INSERT_CHUNK_SIZE]
+
+            data = self.hg_ds.dhub.execute(
+                proc='hgmozilla.selects.get_pushlog_ids',
+                debug_show=self.DEBUG,
+                placeholders=[branch_id] + chunk,
+                replace=[ ','.join( ['%s'] * len(chunk) ) ],
+                return_type='tuple',
+                )
+
+            for row in data:
+                pushlog_ids[ row['push_id'] ] = row['id']
+
+        return pushlog_ids
 
 
+    def _insert_rows(self, statement, rows):
+        """
+        Insert ``rows`` with multi-row inserts.
+
+        Returns the number of rows stored, rows rejected as duplicates by
+        a unique key are not counted.  The statements only skip duplicate
+        keys, any other problem with a row is reported by MySQL.
+
+        """
+        stored = 0
+
+        for i in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+
+            self._insert_data(
+                statement,
+                rows[i:i + self.INSERT_CHUNK_SIZE],
+                executemany=True,
+                )
+
+            # a duplicate left as it is counts as 0 affected rows
+            stored += self.hg_ds.dhub.connection['master_host']['cursor'].rowcount
+
+        return stored
+
 
     def _insert_data(self, statement, placeholders, executemany=False):
 
@@ -537,19 +794,6 @@ class PushLogModel(DatazillaModelBase):
             )
 
 
-    def _insert_data_and_get_id(self, statement, placeholders):
-
-        self._insert_data(statement, placeholders)
-
-        id_iter = self.hg_ds.dhub.execute(
-            proc='hgmozilla.selects.get_last_insert_id',
-            debug_show=settings.DEBUG,
-            return_type='iter',
-            )
-
-        return id_iter.get_column_data('id')
-
-
     def println(self, val, level=0):
         """Write to out (possibly stdout) if verbosity meets the level."""
         if settings.DEBUG and self.out and self.verbosity >= level:
@@ -566,8 +810,92 @@ class PerformanceTestModel(DatazillaModelBase):
     # single test suite associated with a JSON object
     REPLICATE_LIMIT = 5000
 
+    # Natural key columns of the reference tables resolved in bulk
+    # by load_test_data_batch, the table names match the
+    # set_*_ref_data_batch and get_*_ids_batch procs
+    BATCH_REF_KEYS = {
+        'test':['name', 'version'],
+        'os':['name', 'version'],
+        'product':['product', 'branch', 'version'],
+        'machine':['name', 'operating_system_id'],
+        'b2g_machine':['name', 'operating_system_id', 'type'],
+        'option':['name'],
+        'pages':['test_id', 'url'],
+        'aux':['test_id', 'name'],
+        'build':['product_id', 'test_build_id', 'processor', 'build_type'],
+        }
+
+    # Reference tables whose natural key to id mapping is kept in the
+    # process wide reference id cache, see get_ref_id_cache
+    REF_ID_CACHE_TABLES = set(
+        ['test', 'os', 'product', 'machine', 'b2g_machine', 'option',
+         'pages', 'aux']
+        )
+
+    # Maximum number of ids held per project and dataset
+    REF_ID_CACHE_SIZE = 20000
+
+    # (project, dataset) -> utils.LRUCache
+    _ref_id_caches = {}
+
+    # Test runs older than this many seconds (6 months) are deleted by
+    # cycle_data, CYCLE_CHUNK_SIZE test runs at a time
+    CYCLE_RETENTION_PERIOD = 15552000
+    CYCLE_CHUNK_SIZE = 500
+
+    # cycle_data throttling, deleted rows per second across all tables,
+    # seconds of read host replication lag tolerated and the longest
+    # time to wait for the lag to go down
+    CYCLE_MAX_ROWS_PER_SECOND = 5000
+    CYCLE_MAX_REPLICATION_LAG = 10
+    CYCLE_MAX_LAG_WAIT = 600
+
+    # (contenttype, table, partitioning column) of the tables that are
+    # range partitioned in projects created with partitioned=True
+    PARTITIONED_TABLES = [
+        ('perftest', 'test_value', 'test_run_id'),
+        ('perftest', 'test_data_all_dimensions', 'test_run_id'),
+        ('objectstore', 'objectstore', 'id'),
+        ]
+
+    # Sealed partitions are named after their seal date
+    PARTITION_NAME_FORMAT = 'p%Y%m%d'
+
+    # summary_cache (item_id, item_data) holding the cycle_data checkpoint,
+    # there is no product with id 0
+    CYCLE_CHECKPOINT_KEY = (0, 'cycle_data_checkpoint')
+
+    def __init__(self, project):
+
+        super(PerformanceTestModel, self).__init__(project)
+
+        # test_run_id -> list of (page_id, page, replicates) of the test
+        # runs loaded by the last process_objects call, so their summary
+        # can be computed without reading test_value back
+        self.loaded_replicates = {}
+
+        # revisions of the test runs loaded by the last process_objects
+        # call, their cached API responses are invalidated
+        self.loaded_revisions = set()
+
+        # (reference table, natural key) -> id of the reference rows seen
+        # in the open load_test_data transaction, they only go into the
+        # process wide reference id cache once it's committed
+        self.uncommitted_ref_ids = None
+
+    # Default lease in seconds on claimed objectstore rows, rows still
+    # loading once their lease expires are stolen by the next claim
+    CLAIM_LEASE_TIMEOUT = 3600
+
+    # Objectstore rows read and rewritten at once by compress_objects
+    COMPRESS_CHUNK_SIZE = 100
+
+    # Json blobs per multi-row insert of store_test_data_bulk
+    STORE_CHUNK_SIZE = 100
+
     @classmethod
-    def create(cls, project, hosts=None, types=None, cron_batch=None):
+    def create(cls, project, hosts=None, types=None, cron_batch=None,
+               partitioned=False):
         """
         Create all the datasource tables for this project.
 
@@ -590,6 +918,10 @@ class PerformanceTestModel(DatazillaModelBase):
         management command may spend on the projects of that size.)
         This only applies to the contenttype of "perftest".
 
+        ``partitioned`` creates the tables in ``PARTITIONED_TABLES`` range
+        partitioned so ``maintain_partitions`` can drop expired data a
+        partition at a time.
+
         """
         hosts = hosts or {}
         types = types or {}
@@ -601,6 +933,7 @@ class PerformanceTestModel(DatazillaModelBase):
                 host=hosts.get(ct),
                 db_type=types.get(ct),
                 cron_batch=cron_batch if ct == "perftest" else None,
+                partitioned=partitioned,
                 )
 
         return cls(project=project)
@@ -931,6 +1264,39 @@ class PerformanceTestModel(DatazillaModelBase):
         cache.set(cache_key, default_project)
 
 
+    def get_ref_id_cache(self):
+        """
+        Return the reference id cache for this project and dataset.
+
+        The cache maps (reference table, natural key) to the id of the
+        reference row.  It is shared by every instance in the process and
+        is warmed from the reference data getters when it is created.
+
+        """
+        cache_key = (
+            self.project, self.sources["perftest"].datasource.dataset
+            )
+
+        ref_id_cache = self._ref_id_caches.get(cache_key)
+
+        if ref_id_cache is None:
+            ref_id_cache = utils.LRUCache(self.REF_ID_CACHE_SIZE)
+            self._warm_ref_id_cache(ref_id_cache)
+            self._ref_id_caches[cache_key] = ref_id_cache
+
+        return ref_id_cache
+
+
+    def get_ref_id_cache_stats(self):
+        """Return the hit/miss counters of the reference id cache."""
+        return self.get_ref_id_cache().get_stats()
+
+
+    @classmethod
+    def clear_ref_id_caches(cls):
+        """Drop the reference id caches of all projects."""
+        cls._ref_id_caches.clear()
+
 
     def get_test_run_ids(
         self, branch, revisions, product_name=None, os_name=None,
@@ -1147,6 +1513,9 @@ class PerformanceTestModel(DatazillaModelBase):
         error_flag = "N" if error is None else "Y"
         error_msg = error or ""
 
+        if settings.DATAZILLA_OBJECTSTORE_COMPRESSION:
+            json_data = utils.compress_json_blob(json_data)
+
         self.sources["objectstore"].dhub.execute(
             proc='objectstore.inserts.store_json',
             placeholders=[ date_loaded, json_data, error_flag, error_msg ],
@@ -1155,6 +1524,72 @@ class PerformanceTestModel(DatazillaModelBase):
 
         return self._get_last_insert_id(source='objectstore')
 
+    def store_test_data_bulk(self, json_blobs):
+        """
+        Write many JSON blobs to the objectstore in one transaction.
+
+        The blobs are queued for processing like ``store_test_data`` does,
+        with multi-row inserts of ``STORE_CHUNK_SIZE`` rows.  Returns the
+        objectstore ids of ``json_blobs``, in order.
+
+        """
+        dhub = self.sources["objectstore"].dhub
+
+        date_loaded = utils.get_now_timestamp()
+        ids = []
+
+        try:
+            for i in range(0, len(json_blobs), self.STORE_CHUNK_SIZE):
+
+                chunk = json_blobs[i:i + self.STORE_CHUNK_SIZE]
+
+                placeholders = []
+                digests = []
+                for json_data in chunk:
+                    if settings.DATAZILLA_OBJECTSTORE_COMPRESSION:
+                        json_data = utils.compress_json_blob(json_data)
+                    elif isinstance(json_data, unicode):
+                        json_data = json_data.encode("utf-8")
+                    placeholders.extend([ date_loaded, json_data, "N", "" ])
+                    digests.append(hashlib.md5(json_data).hexdigest())
+
+                dhub.execute(
+                    proc='objectstore.inserts.store_json_bulk',
+                    placeholders=placeholders,
+                    replace=[ ",".join(
+                        ["(%s, _binary %s, %s, %s)"] * len(chunk)) ],
+                    debug_show=self.DEBUG,
+                    nocommit=True
+                    )
+
+                # A multi-row insert is allocated consecutive auto
+                # increment ids starting at LAST_INSERT_ID(), confirm that
+                # before relying on it
+                first_id = self._get_last_insert_id(
+                    source='objectstore', nocommit=True)
+
+                rows = dhub.execute(
+                    proc='objectstore.selects.get_json_blob_digests',
+                    placeholders=[ first_id, first_id + len(chunk) ],
+                    debug_show=self.DEBUG,
+                    return_type='tuple',
+                    nocommit=True
+                    )
+
+                if [ row['digest'] for row in rows ] != digests:
+                    raise ValueError(
+                        "Objectstore ids of the bulk insert are not consecutive.")
+
+                ids.extend([ row['id'] for row in rows ])
+
+        except Exception:
+            dhub.rollback('master_host')
+            raise
+
+        dhub.commit('master_host')
+
+        return ids
+
     def pre_process_data(self, unquoted_json_data, deserialized_json):
         """Carry out project specific pre-processing of JSON objects."""
 
@@ -1198,86 +1633,293 @@ class PerformanceTestModel(DatazillaModelBase):
             return_type='tuple'
             )
 
-        return json_blobs
+        return utils.decompress_json_blobs(json_blobs)
+
+    def get_objectstore_backlog(self, limit):
+        """
+        Return the number of objectstore rows waiting to be processed.
+
+        Counting stops at ``limit`` so a deep backlog is cheap to measure.
+
+        """
+        return self.sources["objectstore"].dhub.execute(
+            proc="objectstore.selects.get_ready_count",
+            placeholders=[ limit ],
+            debug_show=self.DEBUG,
+            return_type='iter'
+            ).get_column_data('ready_count')
+
+
+    def compress_objects(self, chunk_size=None, start_id=0):
+        """
+        Compress the uncompressed json blobs of the objectstore.
+
+        Rows are read and rewritten ``chunk_size`` at a time (defaults to
+        ``COMPRESS_CHUNK_SIZE``) in id order, starting after ``start_id``.
+        Blobs that don't get smaller are left as they are.
+
+        Returns the number of rows compressed.
+
+        """
+        chunk_size = chunk_size or self.COMPRESS_CHUNK_SIZE
+        dhub = self.sources["objectstore"].dhub
+
+        compressed = 0
+        last_id = start_id
+
+        while True:
+
+            rows = dhub.execute(
+                proc="objectstore.selects.get_uncompressed",
+                placeholders=[
+                    last_id, utils.JSON_BLOB_ZLIB_MARKER + '%', chunk_size ],
+                debug_show=self.DEBUG,
+                return_type='tuple'
+                )
+
+            if not rows:
+                break
+
+            last_id = rows[-1]['id']
+
+            updates = []
+            for row in rows:
+                blob = utils.compress_json_blob(row['json_blob'])
+                if blob != row['json_blob']:
+                    updates.append([ blob, row['id'] ])
+
+            if updates:
+                dhub.execute(
+                    proc="objectstore.updates.set_json_blob",
+                    placeholders=updates,
+                    executemany=True,
+                    debug_show=self.DEBUG,
+                    )
+
+            compressed += len(updates)
+
+        return compressed
+
+
+    def load_test_data(self, data, commit=True):
+        """
+        Load TestData instance into perftest db, return test_run_id.
+
+        The reference data, build, test run and all its values are
+        written in one transaction.  It's committed unless ``commit`` is
+        False, callers loading several test runs per transaction end it
+        with ``commit_test_data``.  On any error the open transaction is
+        rolled back, test runs loaded into it earlier without a commit
+        included.
+
+        """
+        if self.uncommitted_ref_ids is None:
+            self.uncommitted_ref_ids = {}
+
+        try:
+            test_run_id = self._load_test_run(data)
+        except Exception:
+            self.rollback_test_data()
+            raise
+
+        if commit:
+            self.commit_test_data()
+
+        return test_run_id
+
+
+    def commit_test_data(self):
+        """Commit the test runs loaded with ``load_test_data``."""
+        self.sources["perftest"].dhub.commit('master_host')
+
+        if self.uncommitted_ref_ids:
+            ref_id_cache = self.get_ref_id_cache()
+            for key, ref_id in self.uncommitted_ref_ids.items():
+                ref_id_cache.set(key, ref_id)
+
+        self.uncommitted_ref_ids = None
+
+
+    def rollback_test_data(self):
+        """Roll back the test runs loaded since the last commit."""
+        self.sources["perftest"].dhub.rollback('master_host')
+
+        # reference rows created in the transaction are gone
+        self.uncommitted_ref_ids = None
+
 
-    def load_test_data(self, data):
-        """Load TestData instance into perftest db, return test_run_id."""
+    def _load_test_run(self, data):
+        """Write the test run of ``data`` without committing it."""
 
         # Apply all platform specific hacks to account for mozilla
         # production test environment problems
         self._adapt_production_data(data)
 
         # Get/Set reference info, all inserts use ON DUPLICATE KEY
-        test_id = self._get_or_create_test_id(data)
-        os_id = self._get_or_create_os_id(data)
-        product_id = self._get_or_create_product_id(data)
+        test_id = self._get_or_create_test_id(data, nocommit=True)
+        os_id = self._get_or_create_os_id(data, nocommit=True)
+        product_id = self._get_or_create_product_id(data, nocommit=True)
 
         machine_id = 0
         if self.project == 'b2g' or self.project == 'b2gtw':
-            machine_id = self._get_or_create_b2g_machine_id(data, os_id)
+            machine_id = self._get_or_create_b2g_machine_id(
+                data, os_id, nocommit=True)
         else:
-            machine_id = self._get_or_create_machine_id(data, os_id)
+            machine_id = self._get_or_create_machine_id(
+                data, os_id, nocommit=True)
 
         # Insert build and test_run data.
-        build_id = self._get_or_create_build_id(data, product_id)
+        build_id = self._get_or_create_build_id(
+            data, product_id, nocommit=True)
 
         test_run_id = self._set_test_run_data(
             data,
             test_id,
             build_id,
-            machine_id
+            machine_id,
+            nocommit=True
             )
 
-        self._set_option_data(data, test_run_id)
-        self._set_test_values(data, test_id, test_run_id)
-        self._set_test_aux_data(data, test_id, test_run_id)
+        self.loaded_revisions.add(data['test_build']['revision'])
+
+        self._set_option_data(data, test_run_id, nocommit=True)
+        self._set_test_values(data, test_id, test_run_id, nocommit=True)
+        self._set_test_aux_data(data, test_id, test_run_id, nocommit=True)
 
         # Make project specific changes
-        self._adapt_project_specific_data(data, test_run_id)
+        self._adapt_project_specific_data(data, test_run_id, nocommit=True)
 
         return test_run_id
 
 
-    def process_objects(self, loadlimit):
-        """Processes JSON blobs from the objectstore into perftest schema."""
-        rows = self.claim_objects(loadlimit)
-        test_run_ids_loaded = []
-
-        for row in rows:
-            row_id = int(row['id'])
-            try:
-                data = TestData.from_json(row['json_blob'])
-                test_run_id = self.load_test_data(data)
-            except TestDataError as e:
-                self.mark_object_error(row_id, str(e))
-            except Exception as e:
-                self.mark_object_error(
-                    row_id,
-                    u"Unknown error: {0}: {1}".format(
-                        e.__class__.__name__, unicode(e))
-                    )
-            else:
-                self.mark_object_complete(row_id, test_run_id)
-                test_run_ids_loaded.append(test_run_id)
+    def load_test_data_batch(self, data_list):
+        """
+        Load a list of TestData instances into perftest db in bulk.
 
-        return test_run_ids_loaded
+        Reference data for the whole list is resolved with one lookup and
+        at most one multi-row insert per table, then the test_run,
+        test_value, test_option_values and test_aux_data rows are written
+        with one statement each.  Returns the test_run_ids in the order
+        of ``data_list``.
 
-    def claim_objects(self, limit):
         """
-        Claim & return up to ``limit`` unprocessed blobs from the objectstore.
+        run_data_list = []
+        for data in data_list:
+            self._adapt_production_data(data)
+            run_data_list.append(self._get_batch_run_data(data))
 
-        Returns a tuple of dictionaries with "json_blob" and "id" keys.
+        return self._load_test_run_batch(data_list, run_data_list)
 
-        May return more than ``limit`` rows if there are existing orphaned rows
-        that were claimed by an earlier connection with the same connection ID
-        but never completed.
 
+    def process_objects(self, loadlimit, batch=False, group_commit=1):
         """
-        proc_mark = 'objectstore.updates.mark_loading'
-        proc_get  = 'objectstore.selects.get_claimed'
+        Processes JSON blobs from the objectstore into perftest schema.
 
-        # Note: There is a bug in MySQL http://bugs.mysql.com/bug.php?id=42415
-        # that causes the following warning to be generated in the production
+        If ``batch`` is set the claimed blobs are loaded together with
+        ``load_test_data_batch`` instead of one at a time.  Otherwise each
+        blob is loaded in a transaction of its own, or ``group_commit``
+        blobs share one transaction and commit.
+
+        """
+        self.loaded_replicates = {}
+        self.loaded_revisions = set()
+
+        rows = self.claim_objects(loadlimit)
+
+        if batch:
+            test_run_ids_loaded = self._process_objects_batch(rows)
+
+        elif group_commit > 1:
+            test_run_ids_loaded = self._process_objects_grouped(
+                rows, group_commit)
+
+        else:
+            test_run_ids_loaded = []
+
+            for row in rows:
+                test_run_id = self._process_object(row)
+                if test_run_id is not None:
+                    test_run_ids_loaded.append(test_run_id)
+
+        if self.project == 'b2g' or self.project == 'b2gtw':
+            # The test runs are committed, a failed summary refresh is
+            # repaired by the backfill_b2g_value_summary command
+            try:
+                self.set_b2g_value_summary(test_run_ids_loaded)
+            except Exception:
+                logger.exception(
+                    "Failed to refresh the b2g_value_summary of {0}".format(
+                        self.project)
+                    )
+
+        response_cache.invalidate_revisions(
+            self.project, self.loaded_revisions)
+
+        return test_run_ids_loaded
+
+
+    def pop_loaded_replicates(self, test_run_ids):
+        """
+        Return and forget the replicates loaded for ``test_run_ids``.
+
+        Returns a dict of test_run_id to a list of (page_id, page,
+        replicates) tuples, test runs that weren't loaded by this instance
+        are left out.
+
+        """
+        replicates = {}
+
+        for test_run_id in test_run_ids:
+            if test_run_id in self.loaded_replicates:
+                replicates[test_run_id] = self.loaded_replicates.pop(
+                    test_run_id)
+
+        return replicates
+
+
+    @property
+    def claim_token(self):
+        """
+        Token identifying the objectstore rows claimed by this instance.
+
+        Unlike the MySQL connection id it is unique across processes and
+        survives reconnects, so any number of workers can claim rows.
+
+        """
+        if getattr(self, '_claim_token', None) is None:
+            self._claim_token = uuid.uuid4().hex
+        return self._claim_token
+
+
+    def claim_objects(self, limit, lease_duration=None):
+        """
+        Claim & return up to ``limit`` unprocessed blobs from the objectstore.
+
+        Returns a tuple of dictionaries with "json_blob" and "id" keys.
+
+        Claimed rows are leased for ``lease_duration`` seconds (defaults to
+        ``CLAIM_LEASE_TIMEOUT``).  Rows whose lease has expired without
+        being completed are orphans of a dead worker, they are stolen
+        before any new rows are claimed.
+
+        Stolen rows count against ``limit``, new rows are only claimed for
+        what is left of it.  May return more than ``limit`` rows if there
+        are existing rows that were claimed by this instance earlier but
+        never completed.
+
+        """
+        proc_steal = 'objectstore.updates.steal_expired'
+        proc_mark = 'objectstore.updates.mark_loading'
+        proc_get  = 'objectstore.selects.get_claimed'
+
+        if lease_duration is None:
+            lease_duration = self.CLAIM_LEASE_TIMEOUT
+
+        now = utils.get_now_timestamp()
+        lease = [ self.claim_token, now, lease_duration, now + lease_duration ]
+
+        # Note: There is a bug in MySQL http://bugs.mysql.com/bug.php?id=42415
+        # that causes the following warning to be generated in the production
         # environment:
         #
         # _mysql_exceptions.Warning: Unsafe statement written to the binary
@@ -1301,33 +1943,46 @@ class PerformanceTestModel(DatazillaModelBase):
         # should be removed. Holy Hackery! -Jeads
         filterwarnings('ignore', category=MySQLdb.Warning)
 
-        # Note: this claims rows for processing. Failure to call load_test_data
-        # on this data will result in some json blobs being stuck in limbo
-        # until another worker comes along with the same connection ID.
+        # Expired leases are taken over in place, the rows never go back
+        # to 'ready' so two workers can't both pick up the same orphan.
+        # The lease_expires range scan keeps this off the ready rows.
         self.sources["objectstore"].dhub.execute(
-            proc=proc_mark,
-            placeholders=[ limit ],
+            proc=proc_steal,
+            placeholders=lease + [ now, limit ],
             debug_show=self.DEBUG,
             )
 
-        # Return all JSON blobs claimed by this connection ID (could possibly
-        # include orphaned rows from a previous run).
+        stolen_count = self.sources["objectstore"].dhub.connection['master_host']['cursor'].rowcount
+
+        # Note: this claims rows for processing. Failure to call load_test_data
+        # on this data will leave the json blobs in limbo until the lease
+        # expires.
+        if stolen_count < limit:
+            self.sources["objectstore"].dhub.execute(
+                proc=proc_mark,
+                placeholders=lease + [ limit - stolen_count ],
+                debug_show=self.DEBUG,
+                )
+
+        # Return all JSON blobs claimed with this token (could possibly
+        # include unfinished rows from a previous claim).
         json_blobs = self.sources["objectstore"].dhub.execute(
             proc=proc_get,
+            placeholders=[ self.claim_token ],
             debug_show=self.DEBUG,
             return_type='tuple'
             )
 
         resetwarnings()
 
-        return json_blobs
+        return utils.decompress_json_blobs(json_blobs)
 
 
     def mark_object_complete(self, object_id, test_run_id):
         """ Call to database to mark the task completed """
         self.sources["objectstore"].dhub.execute(
             proc="objectstore.updates.mark_complete",
-            placeholders=[test_run_id, object_id],
+            placeholders=[test_run_id, object_id, self.claim_token],
             debug_show=self.DEBUG
             )
 
@@ -1336,7 +1991,23 @@ class PerformanceTestModel(DatazillaModelBase):
         """ Call to database to mark the task completed """
         self.sources["objectstore"].dhub.execute(
             proc="objectstore.updates.mark_error",
-            placeholders=[error, object_id],
+            placeholders=[error, object_id, self.claim_token],
+            debug_show=self.DEBUG
+            )
+
+
+    def mark_objects_complete(self, object_ids, test_run_ids):
+        """Mark a list of objects complete with one call to the database."""
+        if not object_ids:
+            return
+
+        self.sources["objectstore"].dhub.execute(
+            proc="objectstore.updates.mark_complete",
+            placeholders=[
+                (test_run_id, object_id, self.claim_token)
+                for test_run_id, object_id in zip(test_run_ids, object_ids)
+                ],
+            executemany=True,
             debug_show=self.DEBUG
             )
 
@@ -1361,6 +2032,7 @@ class PerformanceTestModel(DatazillaModelBase):
             test_ids.append( begin_date )
             test_ids.append( end_date )
 
+            # the summaries are kept up to date by set_b2g_value_summary
             data = self.sources["perftest"].dhub.execute(
                 proc=proc,
                 debug_show=self.DEBUG,
@@ -1368,20 +2040,23 @@ class PerformanceTestModel(DatazillaModelBase):
                 replace=[ r_string ]
                 )
 
-            for index, row in enumerate(data):
+            for row in data:
+                # the median is stored unrounded, round it like the
+                # replicate medians always were
+                row['median'] = round(row['median'], 0)
 
-                median = self._get_median_from_sorted_list(
-                    # convert string containing comma delimited list of
-                    # values to a list of integers
-                    map( lambda x:float(x or 0), row['replicates'].split(',') )
-                    )
+        return data
 
-                data[index]['median'] = median
+    def get_test_run_ids_since(self, date_run):
+        """Return the ids of the test runs run at or after ``date_run``."""
 
-                # remove list of replicates before returning
-                del data[index]['replicates']
+        data = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_test_run_ids_since',
+            debug_show=self.DEBUG,
+            placeholders=[ date_run ]
+            )
 
-        return data
+        return [ row['id'] for row in data ]
 
     def get_test_run_ids_by_revisions(
         self, branch, revision, gecko_revision, test_id, test_type):
@@ -1408,96 +2083,314 @@ class PerformanceTestModel(DatazillaModelBase):
 
         return test_run_ids
 
-    def cycle_data(self, sql_targets={}):
+    def cycle_data(self, sql_targets=None, chunk_size=None,
+                   max_rows_per_second=None, max_replication_lag=None):
+        """
+        Delete the next chunk of test runs older than the retention period.
+
+        Test runs are walked in primary key order starting after the
+        checkpoint stored in summary_cache, ``chunk_size`` test runs are
+        deleted per call along with their objectstore and child rows.  The
+        checkpoint is advanced after every chunk so an interrupted run
+        resumes where it stopped, and reset once no expired test runs are
+        left.  The b2g_value_summary rows of b2g projects are summarized
+        again from the test runs left after every chunk.
+
+        Instead of a fixed pause after every statement the deletes are
+        throttled to ``max_rows_per_second`` and held back while the read
+        host lags more than ``max_replication_lag`` seconds behind.
+
+        Returns ``sql_targets`` with the rows deleted by each proc for this
+        chunk and their sum in "total_count", which is 0 once there is
+        nothing left to delete.
+
+        """
+        if sql_targets is None:
+            sql_targets = {}
+
+        if chunk_size is None:
+            chunk_size = self.CYCLE_CHUNK_SIZE
+        if max_rows_per_second is None:
+            max_rows_per_second = self.CYCLE_MAX_ROWS_PER_SECOND
+        if max_replication_lag is None:
+            max_replication_lag = self.CYCLE_MAX_REPLICATION_LAG
 
-        # Compute 6 month old timestamp
-        min_date = int(time.time() - 15552000)
+        min_date = int(time.time() - self.CYCLE_RETENTION_PERIOD)
+
+        checkpoint = self.get_cycle_checkpoint()
 
         data = self.sources['perftest'].dhub.execute(
             proc='perftest.selects.get_test_run_rows_to_cycle',
-            placeholders=[min_date],
+            placeholders=[checkpoint, min_date, chunk_size],
             debug_show=self.DEBUG
             )
 
         test_run_ids = map(lambda x:x['id'], data)
 
-        where_in_clause = [ ','.join( map( lambda v:'%s', test_run_ids ) ) ]
+        sql_targets['total_count'] = 0
 
         if len(test_run_ids) == 0:
-            sql_targets['total_count'] = 0
+            # Walked past the last expired test run, start over next time
+            if checkpoint:
+                self.set_cycle_checkpoint(0)
             return sql_targets
 
+        where_in_clause = [ ','.join( map( lambda v:'%s', test_run_ids ) ) ]
+
         objectstore_sql_to_execute = [
-            { 'sql':'objectstore.deletes.cycle_objectstore_by_test_run_ids',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause }
+            'objectstore.deletes.cycle_objectstore_by_test_run_ids'
             ]
 
+        # children first, test_run rows are referenced by foreign keys
         perftest_sql_to_execute = [
-            { 'sql':'perftest.deletes.cycle_test_aux_data',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause },
-
-            { 'sql':'perftest.deletes.cycle_test_option_values',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause },
-
-            { 'sql':'perftest.deletes.cycle_test_value',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause },
-
-            { 'sql':'perftest.deletes.cycle_test_data_all_dimensions',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause },
-
-            { 'sql':'perftest.deletes.cycle_test_run',
-              'placeholders':test_run_ids,
-              'replace':where_in_clause }
+            'perftest.deletes.cycle_test_aux_data',
+            'perftest.deletes.cycle_test_option_values',
+            'perftest.deletes.cycle_test_value',
+            'perftest.deletes.cycle_test_data_all_dimensions',
+            'perftest.deletes.cycle_test_run'
             ]
 
-        sql_targets['total_count'] = 0
+        b2g_summary_keys = []
+        if self.project == 'b2g' or self.project == 'b2gtw':
+            b2g_summary_keys = self.sources['perftest'].dhub.execute(
+                proc='perftest.selects.get_b2g_value_summary_keys',
+                placeholders=test_run_ids,
+                replace=where_in_clause,
+                debug_show=self.DEBUG,
+                return_type='tuple'
+                )
+
+        start = time.time()
 
-        # remove data from specified objectstore and perftest tables that is
-        # older than 6 months
         self._execute_table_deletes(
-            min_date, 'objectstore', objectstore_sql_to_execute, sql_targets
+            'objectstore', objectstore_sql_to_execute, test_run_ids,
+            where_in_clause, sql_targets
             )
 
         self._execute_table_deletes(
-            min_date, 'perftest', perftest_sql_to_execute, sql_targets
+            'perftest', perftest_sql_to_execute, test_run_ids,
+            where_in_clause, sql_targets
+            )
+
+        # summarize what is left of the cycled test runs' summaries
+        self.refresh_b2g_value_summary(b2g_summary_keys)
+
+        self.set_cycle_checkpoint(max(test_run_ids))
+
+        self._throttle_cycle(
+            sql_targets['total_count'], time.time() - start,
+            max_rows_per_second, max_replication_lag
             )
 
         return sql_targets
 
-    def _execute_table_deletes(self, min_date, source, sql_to_execute, sql_targets):
 
-        for sql_obj in sql_to_execute:
+    def get_cycle_checkpoint(self):
+        """Return the last test_run id deleted by ``cycle_data``, or 0."""
+        item_id, item_data = self.CYCLE_CHECKPOINT_KEY
 
-            sql = sql_obj['sql']
-            placeholders = sql_obj['placeholders']
-            replace = sql_obj['replace']
+        data = self.get_summary_cache(item_id, item_data)
 
-            if sql not in sql_targets:
-                sql_targets[sql] = None
+        if data:
+            return int(data[0]['value'])
 
-            if (sql_targets[sql] == None) or (sql_targets[sql] > 0):
+        return 0
 
-                self.sources[source].dhub.execute(
-                    proc=sql,
-                    placeholders=placeholders,
-                    replace=replace,
-                    debug_show=self.DEBUG
-                    )
 
-                row_count = self.sources[source].dhub.connection['master_host']['cursor'].rowcount
+    def set_cycle_checkpoint(self, test_run_id):
+        """Store the last test_run id deleted by ``cycle_data``."""
+        item_id, item_data = self.CYCLE_CHECKPOINT_KEY
+
+        self.set_summary_cache(item_id, item_data, str(test_run_id))
 
-                self.sources[source].dhub.commit('master_host')
 
-                sql_targets[sql] = row_count
-                sql_targets['total_count'] += row_count
+    def get_replication_lag(self):
+        """
+        Return the seconds the perftest read host is behind its master.
+
+        Returns None if there is no separate read host, it isn't a
+        replication slave or its status can't be read.
+
+        """
+        dhub = self.sources['perftest'].dhub
+
+        if 'read_host' not in dhub.conf:
+            return None
+
+        try:
+            data = dhub.execute(
+                proc='perftest.selects.get_slave_status',
+                host_type='read_host',
+                debug_show=self.DEBUG,
+                return_type='tuple'
+                )
+        except MySQLdb.Error:
+            return None
+
+        if not data:
+            return None
+
+        return data[0].get('Seconds_Behind_Master')
+
+
+    def _throttle_cycle(self, row_count, elapsed, max_rows_per_second,
+                        max_replication_lag):
+        """Pause ``cycle_data`` between chunks to spare the replicas."""
+
+        if max_rows_per_second:
+            wait = float(row_count) / max_rows_per_second - elapsed
+            if wait > 0:
+                time.sleep(wait)
+
+        if not max_replication_lag:
+            return
+
+        waited = 0
+        lag = self.get_replication_lag()
+
+        while (lag is not None) and (lag > max_replication_lag) and \
+              (waited < self.CYCLE_MAX_LAG_WAIT):
+
+            wait = min(lag - max_replication_lag, 5)
+            time.sleep(wait)
+            waited += wait
+
+            lag = self.get_replication_lag()
+
+
+    def _execute_table_deletes(self, source, procs, test_run_ids,
+                               where_in_clause, sql_targets):
+
+        for proc in procs:
+
+            self.sources[source].dhub.execute(
+                proc=proc,
+                placeholders=test_run_ids,
+                replace=where_in_clause,
+                debug_show=self.DEBUG
+                )
+
+            row_count = self.sources[source].dhub.connection['master_host']['cursor'].rowcount
+
+            self.sources[source].dhub.commit('master_host')
+
+            sql_targets[proc] = row_count
+            sql_targets['total_count'] += row_count
+
+    def get_partitions(self, contenttype, table):
+        """
+        Return the partitions of ``table`` in ``contenttype`` in order.
+
+        Each partition is a dict with "name" and "description", the upper
+        bound of the partition.  Returns an empty list if the table is not
+        partitioned.
+
+        """
+        return self.sources[contenttype].dhub.execute(
+            proc='generic.selects.get_partitions',
+            placeholders=[table],
+            debug_show=self.DEBUG,
+            return_type='tuple',
+            )
+
+
+    def maintain_partitions(self, partition_period, retention_period=None,
+                            now=None):
+        """
+        Seal new partitions and drop expired ones in ``PARTITIONED_TABLES``.
+
+        Rows are partitioned on a column that grows with the load date, so
+        the bounds of future partitions aren't known in advance.  Instead
+        new rows go to the catch-all partition p_future, which is split at
+        the current maximum value into a partition named after the current
+        date once the newest sealed partition is ``partition_period``
+        seconds old.  Partitions sealed more than ``retention_period``
+        seconds (defaults to ``CYCLE_RETENTION_PERIOD``) ago only hold rows
+        loaded before that and are dropped, which is far cheaper than
+        deleting their rows.
+
+        Tables that are not partitioned are skipped.  Returns a dict of
+        "contenttype.table" to a dict with the "added" and "dropped"
+        partition names.
+
+        """
+        if retention_period is None:
+            retention_period = self.CYCLE_RETENTION_PERIOD
+
+        if now is None:
+            now = utils.get_now_timestamp()
+
+        results = {}
+
+        for contenttype, table, column in self.PARTITIONED_TABLES:
+
+            partitions = self.get_partitions(contenttype, table)
+
+            if not partitions:
+                continue
+
+            dhub = self.sources[contenttype].dhub
+
+            sealed = [ p for p in partitions if p['name'] != 'p_future' ]
+
+            added = []
+            dropped = []
+
+            last_sealed = None
+            last_bound = 0
+            if sealed:
+                last_sealed = self._get_partition_date(sealed[-1]['name'])
+                last_bound = int(sealed[-1]['description'])
+
+            if (last_sealed is None) or (last_sealed <= now - partition_period):
+
+                max_value = dhub.execute(
+                    proc='generic.selects.get_max_value',
+                    replace=[table, column],
+                    debug_show=self.DEBUG,
+                    return_type='tuple',
+                    )[0]['max_value']
+
+                name = time.strftime(
+                    self.PARTITION_NAME_FORMAT, time.gmtime(now))
+
+                # skip the seal if nothing was loaded since the last one
+                if (max_value is not None) and (max_value >= last_bound) and \
+                   (name not in [ p['name'] for p in sealed ]):
+
+                    dhub.execute(
+                        proc='generic.db_control.add_partition',
+                        replace=[table, name, str(max_value + 1)],
+                        debug_show=self.DEBUG,
+                        )
+
+                    added.append(name)
+
+            for partition in sealed:
+
+                if self._get_partition_date(partition['name']) < \
+                   now - retention_period:
+
+                    dhub.execute(
+                        proc='generic.db_control.drop_partition',
+                        replace=[table, partition['name']],
+                        debug_show=self.DEBUG,
+                        )
+
+                    dropped.append(partition['name'])
+
+            results["{0}.{1}".format(contenttype, table)] = {
+                'added':added, 'dropped':dropped
+                }
+
+        return results
+
+
+    def _get_partition_date(self, name):
+        """Return the seal timestamp encoded in partition ``name``."""
+        return calendar.timegm(
+            time.strptime(name, self.PARTITION_NAME_FORMAT))
 
-                # Allow some time for other queries to get through
-                time.sleep(5)
 
     def _adapt_production_data(self, data):
 
@@ -1530,7 +2423,7 @@ class PerformanceTestModel(DatazillaModelBase):
                     data[new_key] = results_aux
                     del data['results_aux']
 
-    def _adapt_project_specific_data(self, data, test_run_id):
+    def _adapt_project_specific_data(self, data, test_run_id, nocommit=False):
 
         ###
         #TODO: This should be moved into a derived class
@@ -1540,13 +2433,565 @@ class PerformanceTestModel(DatazillaModelBase):
             #b2g has two unique test run fields, gecko_revision and
             #build_revision, they need to be loaded here
             ###
-            self._update_b2g_test_run(data, test_run_id)
+            self._update_b2g_test_run(data, test_run_id, nocommit=nocommit)
+
+
+    def _process_object(self, row):
+        """Load a claimed objectstore row, return test_run_id or None."""
+        row_id = int(row['id'])
+        try:
+            data = TestData.from_json(row['json_blob'])
+            test_run_id = self.load_test_data(data)
+        except TestDataError as e:
+            self.mark_object_error(row_id, str(e))
+        except Exception as e:
+            self.mark_object_error(
+                row_id,
+                u"Unknown error: {0}: {1}".format(
+                    e.__class__.__name__, unicode(e))
+                )
+        else:
+            self.mark_object_complete(row_id, test_run_id)
+            return test_run_id
+
+
+    def _process_objects_grouped(self, rows, group_commit):
+        """
+        Load claimed objectstore rows ``group_commit`` per transaction.
+
+        The objects of a group are marked complete together once the
+        group is committed.  An object that fails to load rolls back the
+        whole group, the other objects of the group are then loaded one
+        at a time so the error is only recorded against the object that
+        caused it.
+
+        """
+        test_run_ids = []
+        group = []
+
+        def commit_group():
+            self.commit_test_data()
+            self.mark_objects_complete(
+                [ int(row['id']) for row, test_run_id in group ],
+                [ test_run_id for row, test_run_id in group ]
+                )
+            test_run_ids.extend([ test_run_id for row, test_run_id in group ])
+            del group[:]
+
+        for row in rows:
+            try:
+                data = TestData.from_json(row['json_blob'])
+                test_run_id = self.load_test_data(data, commit=False)
+            except Exception:
+                # the group's test runs can't be committed any more, a
+                # failed load rolled them back already
+                self.rollback_test_data()
+
+                for group_row in [ r for r, t in group ] + [ row ]:
+                    test_run_id = self._process_object(group_row)
+                    if test_run_id is not None:
+                        test_run_ids.append(test_run_id)
+
+                del group[:]
+                continue
+
+            group.append((row, test_run_id))
+
+            if len(group) >= group_commit:
+                commit_group()
+
+        if group:
+            commit_group()
+
+        return test_run_ids
+
 
+    def _process_objects_batch(self, rows):
+        """Load claimed objectstore rows in bulk, return test_run_ids."""
+        batch_rows = []
+        data_list = []
+        run_data_list = []
+
+        # Parse and check every blob up front so bad data is reported
+        # against the object it came from and does not spoil the batch
+        for row in rows:
+            row_id = int(row['id'])
+            try:
+                data = TestData.from_json(row['json_blob'])
+                self._adapt_production_data(data)
+                run_data = self._get_batch_run_data(data)
+            except TestDataError as e:
+                self.mark_object_error(row_id, str(e))
+            except Exception as e:
+                self.mark_object_error(
+                    row_id,
+                    u"Unknown error: {0}: {1}".format(
+                        e.__class__.__name__, unicode(e))
+                    )
+            else:
+                batch_rows.append(row)
+                data_list.append(data)
+                run_data_list.append(run_data)
+
+        if not batch_rows:
+            return []
+
+        try:
+            test_run_ids = self._load_test_run_batch(data_list, run_data_list)
+        except Exception:
+            ###
+            #Anything the up front checks could not catch, fall back
+            #to loading one object at a time so the error is recorded
+            #against the object that caused it
+            ###
+            self.sources["perftest"].dhub.rollback('master_host')
+
+            test_run_ids = []
+            for row in batch_rows:
+                test_run_id = self._process_object(row)
+                if test_run_id is not None:
+                    test_run_ids.append(test_run_id)
+        else:
+            self.mark_objects_complete(
+                [ int(row['id']) for row in batch_rows ], test_run_ids
+                )
+
+        return test_run_ids
+
+
+    def _get_batch_run_data(self, data):
+        """
+        Return the reference keys and values a test run needs from ``data``.
 
-    def _set_test_aux_data(self, data, test_id, test_run_id):
+        Raises ``TestDataError`` on bad data.
+
+        """
+        testrun = data['testrun']
+
+        try:
+            # TODO: version should be required; currently defaults to 1
+            version = int(testrun.get('suite_version', 1))
+        except ValueError:
+            raise TestDataError(
+                "Bad value: ['testrun']['suite_version'] is not an integer.")
+
+        machine = data['test_machine']
+        build = data['test_build']
+
+        try:
+            run_date = int(testrun['date'])
+        except ValueError:
+            raise TestDataError(
+                "Bad value: ['testrun']['date'] is not an integer.")
+
+        machine_type = None
+        if self.project == 'b2g' or self.project == 'b2gtw':
+            machine_type = machine['type']
+
+        options = []
+        for option, value in testrun.get('options', {}).items():
+            # See _set_option_data, extensions are not stored yet
+            if option == 'extensions':
+                continue
+            options.append((option, value))
+
+        return {
+            'test':(testrun['suite'], version),
+            'os':(machine['os'], machine['osversion']),
+            'product':(build['name'], build['branch'], build['version']),
+            'machine_name':machine['name'],
+            'machine_type':machine_type,
+            'test_build_id':build['id'],
+            'processor':machine['platform'],
+            'revision':build['revision'],
+            'date_run':run_date,
+            'results':data['results'],
+            'results_aux':data.get('results_aux', {}),
+            'options':options,
+            }
+
+
+    def _load_test_run_batch(self, data_list, run_data_list):
+        """Write the test runs described by ``run_data_list`` in bulk."""
+
+        # TODO: Need to get the build type into the json
+        build_type = 'opt'
+        now = utils.get_now_timestamp()
+        b2g = self.project == 'b2g' or self.project == 'b2gtw'
+
+        # Reference data, each table is resolved in one pass
+        test_ids = self._get_or_create_ref_ids_batch(
+            'test', [ rd['test'] for rd in run_data_list ])
+        os_ids = self._get_or_create_ref_ids_batch(
+            'os', [ rd['os'] for rd in run_data_list ])
+        product_ids = self._get_or_create_ref_ids_batch(
+            'product', [ rd['product'] for rd in run_data_list ])
+        option_ids = self._get_or_create_ref_ids_batch(
+            'option',
+            [ (o,) for rd in run_data_list for o, v in rd['options'] ])
+
+        for rd in run_data_list:
+            rd['test_id'] = test_ids[ self._get_batch_key(rd['test']) ]
+            rd['os_id'] = os_ids[ self._get_batch_key(rd['os']) ]
+            rd['product_id'] = product_ids[ self._get_batch_key(rd['product']) ]
+
+            if b2g:
+                rd['machine'] = (
+                    rd['machine_name'], rd['os_id'], rd['machine_type'])
+            else:
+                rd['machine'] = (rd['machine_name'], rd['os_id'])
+
+            rd['build'] = (
+                rd['product_id'], rd['test_build_id'], rd['processor'],
+                build_type
+                )
+
+        machine_ids = self._get_or_create_ref_ids_batch(
+            'b2g_machine' if b2g else 'machine',
+            [ rd['machine'] + (now,) for rd in run_data_list ])
+        build_ids = self._get_or_create_ref_ids_batch(
+            'build',
+            # TODO: need to get the build date into the json
+            [ rd['build'] + (rd['revision'], now) for rd in run_data_list ])
+        page_ids = self._get_or_create_ref_ids_batch(
+            'pages',
+            [ (rd['test_id'], page)
+              for rd in run_data_list for page in rd['results'] ])
+        aux_ids = self._get_or_create_ref_ids_batch(
+            'aux',
+            [ (rd['test_id'], aux)
+              for rd in run_data_list for aux in rd['results_aux'] ])
+
+        # Test runs, written in one transaction so a failure leaves
+        # nothing behind for the caller to clean up
+        dhub = self.sources["perftest"].dhub
+
+        placeholders = []
+        for rd in run_data_list:
+            rd['machine_id'] = machine_ids[ self._get_batch_key(rd['machine']) ]
+            rd['build_id'] = build_ids[ self._get_batch_key(rd['build']) ]
+            placeholders.extend([
+                rd['test_id'],
+                rd['build_id'],
+                rd['machine_id'],
+                # denormalization; avoid join to build table to get revision
+                rd['revision'],
+                rd['date_run'],
+                ])
+
+        dhub.execute(
+            proc='perftest.inserts.set_test_run_data_batch',
+            debug_show=self.DEBUG,
+            placeholders=placeholders,
+            replace=[ self._get_batch_values_string(len(run_data_list), 5) ],
+            nocommit=True,
+            )
+
+        self.loaded_revisions.update(
+            [ rd['revision'] for rd in run_data_list ])
+
+        ###
+        #A multi-row insert is allocated consecutive auto increment ids
+        #starting at LAST_INSERT_ID(), confirm that before relying on it
+        ###
+        first_id = dhub.execute(
+            proc='generic.selects.get_last_insert_id',
+            debug_show=self.DEBUG,
+            return_type='iter',
+            nocommit=True,
+            ).get_column_data('id')
+
+        test_run_rows = dhub.execute(
+            proc='perftest.selects.get_test_run_batch',
+            debug_show=self.DEBUG,
+            placeholders=[ first_id, first_id + len(run_data_list) ],
+            return_type='tuple',
+            nocommit=True,
+            )
+
+        if len(test_run_rows) != len(run_data_list):
+            raise ValueError(
+                "Test run ids of the batch insert are not consecutive.")
+
+        test_run_ids = []
+        for rd, row in zip(run_data_list, test_run_rows):
+            if (row['build_id'] != rd['build_id']) or \
+               (row['machine_id'] != rd['machine_id']) or \
+               (row['test_id'] != rd['test_id']) or \
+               (row['date_run'] != rd['date_run']):
+                raise ValueError(
+                    "Test run ids of the batch insert are not consecutive.")
+            test_run_ids.append(row['id'])
+
+        value_placeholders = []
+        aux_placeholders = []
+        option_placeholders = []
+
+        for rd, test_run_id in zip(run_data_list, test_run_ids):
+
+            total_replicates = 0
+            loaded_replicates = []
+            for page, values in rd['results'].items():
+                page_id = page_ids[ self._get_batch_key((rd['test_id'], page)) ]
+                page_replicates = []
+                for index, value in enumerate(values, 1):
+                    total_replicates += 1
+                    if total_replicates > self.REPLICATE_LIMIT:
+                        #Replicate limit reached
+                        break
+                    value_placeholders.append(
+                        (test_run_id, index, page_id, 1, value)
+                        )
+                    page_replicates.append(value)
+                loaded_replicates.append((page_id, page, page_replicates))
+            self.loaded_replicates[test_run_id] = loaded_replicates
+
+            for aux_data, aux_values in rd['results_aux'].items():
+                aux_data_id = aux_ids[
+                    self._get_batch_key((rd['test_id'], aux_data)) ]
+                for index, value in enumerate(aux_values, 1):
+                    string_data = ""
+                    numeric_data = 0
+                    if utils.is_number(value):
+                        numeric_data = value
+                    else:
+                        string_data = value
+                    aux_placeholders.append(
+                        (test_run_id, index, aux_data_id, numeric_data,
+                         string_data)
+                        )
+
+            for option, value in rd['options']:
+                option_id = option_ids[ self._get_batch_key((option,)) ]
+                option_placeholders.append([test_run_id, option_id, value])
+
+        for statement, statement_placeholders in [
+            ('set_test_values', value_placeholders),
+            ('set_aux_values', aux_placeholders),
+            ('set_test_option_values', option_placeholders)
+            ]:
+
+            if statement_placeholders:
+                dhub.execute(
+                    proc='perftest.inserts.' + statement,
+                    debug_show=self.DEBUG,
+                    placeholders=statement_placeholders,
+                    executemany=True,
+                    nocommit=True,
+                    )
+
+        # Make project specific changes
+        for data, test_run_id in zip(data_list, test_run_ids):
+            self._adapt_project_specific_data(
+                data, test_run_id, nocommit=True)
+
+        dhub.commit('master_host')
+
+        return test_run_ids
+
+
+    def _get_or_create_ref_ids_batch(self, ref_table, rows):
+        """
+        Return a dict of natural key to id for the ``ref_table`` rows.
+
+        ``rows`` are the insert values of the reference table, starting with
+        the natural key columns listed in ``BATCH_REF_KEYS``.  Existing ids
+        are found with one lookup and only the missing rows are inserted,
+        using a single multi-row upsert.
+
+        """
+        key_count = len(self.BATCH_REF_KEYS[ref_table])
+
+        ids = {}
+        unique_rows = {}
+        for row in rows:
+            key = self._get_batch_key(row[:key_count])
+            if (key in ids) or (key in unique_rows):
+                continue
+
+            cached_id = self._get_cached_ref_id(ref_table, row[:key_count])
+            if cached_id is None:
+                unique_rows[key] = row
+            else:
+                ids[key] = cached_id
+
+        if not unique_rows:
+            return ids
+
+        ids.update(
+            self._get_ref_ids_batch(
+                ref_table,
+                [ row[:key_count] for row in unique_rows.values() ])
+            )
+
+        missing = [ row for key, row in unique_rows.items() if key not in ids ]
+
+        if missing:
+            placeholders = []
+            for row in missing:
+                placeholders.extend(row)
+
+            self.sources["perftest"].dhub.execute(
+                proc='perftest.inserts.set_{0}_ref_data_batch'.format(
+                    ref_table),
+                debug_show=self.DEBUG,
+                placeholders=placeholders,
+                replace=[
+                    self._get_batch_values_string(
+                        len(missing), len(missing[0]))
+                    ],
+                )
+
+            ids.update(
+                self._get_ref_ids_batch(
+                    ref_table, [ row[:key_count] for row in missing ])
+                )
+
+        return ids
+
+
+    def _get_ref_ids_batch(self, ref_table, keys):
+        """
+        Return a dict of natural key to id for existing ``keys``.
+
+        MySQL compares the keys with the collation of the key columns, a
+        key only differing in case or trailing spaces from a stored one
+        can find it.  Each row reports the indexes of the keys it matched
+        so the keys are never compared again here.
+
+        """
+        key_columns = self.BATCH_REF_KEYS[ref_table]
+
+        key_condition = "({0})".format(
+            " AND ".join(
+                map(lambda c: "`{0}` = %s".format(c), key_columns))
+            )
+
+        placeholders = []
+        for key in keys:
+            placeholders.extend(key)
+
+        id_rows = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_{0}_ids_batch'.format(ref_table),
+            debug_show=self.DEBUG,
+            # the key index placeholders come first in the statement
+            placeholders=placeholders + placeholders,
+            replace=[
+                " OR ".join([key_condition] * len(keys)),
+                ", ".join([
+                    "IF({0}, {1}, NULL)".format(key_condition, index)
+                    for index in range(len(keys))
+                    ]),
+                ],
+            return_type='tuple',
+            )
+
+        ids = {}
+        for row in id_rows:
+            for index in row['key_indexes'].split(','):
+                key = keys[ int(index) ]
+                ids[ self._get_batch_key(key) ] = self._set_cached_ref_id(
+                    ref_table, key, row['id'])
+
+        return ids
+
+
+    def _get_batch_key(self, values):
+        """Natural key values as a key of the id dicts of a batch."""
+        return tuple(map(unicode, values))
+
+
+    def _get_cached_ref_id(self, ref_table, key):
+        """Return the cached id of a reference row or None."""
+        if ref_table not in self.REF_ID_CACHE_TABLES:
+            return None
+
+        cache_key = (ref_table, self._get_batch_key(key))
+
+        if self.uncommitted_ref_ids and (cache_key in self.uncommitted_ref_ids):
+            return self.uncommitted_ref_ids[cache_key]
+
+        return self.get_ref_id_cache().get(cache_key)
+
+
+    def _set_cached_ref_id(self, ref_table, key, ref_id):
+        """
+        Cache the id of a reference row, returns ``ref_id``.
+
+        Inside a load_test_data transaction the id is held back until
+        the transaction is committed.
+
+        """
+        if (ref_table in self.REF_ID_CACHE_TABLES) and (ref_id is not None):
+
+            cache_key = (ref_table, self._get_batch_key(key))
+
+            if self.uncommitted_ref_ids is not None:
+                self.uncommitted_ref_ids[cache_key] = ref_id
+            else:
+                self.get_ref_id_cache().set(cache_key, ref_id)
+
+        return ref_id
+
+
+    def _warm_ref_id_cache(self, ref_id_cache):
+        """Load the ids of the existing reference data into ``ref_id_cache``."""
+
+        def set_id(ref_table, key, ref_id):
+            ref_id_cache.set((ref_table, self._get_batch_key(key)), ref_id)
+
+        for test in self.get_tests('id').values():
+            set_id('test', (test['name'], test['version']), test['id'])
+
+        for os in self.get_operating_systems('id').values():
+            set_id('os', (os['name'], os['version']), os['id'])
+
+        for product in self.get_products('id').values():
+            set_id(
+                'product',
+                (product['product'], product['branch'], product['version']),
+                product['id']
+                )
+
+        for machine in self.get_machines().values():
+            set_id(
+                'machine',
+                (machine['name'], machine['operating_system_id']),
+                machine['id']
+                )
+
+            if machine.get('type') is not None:
+                set_id(
+                    'b2g_machine',
+                    (machine['name'], machine['operating_system_id'],
+                     machine['type']),
+                    machine['id']
+                    )
+
+        for option in self.get_options().values():
+            set_id('option', (option['name'],), option['id'])
+
+        for page in self.get_pages().values():
+            # get_pages keeps a single id per url, it's only the
+            # right one when the url belongs to a single test
+            if len(page['test_ids']) == 1:
+                set_id(
+                    'pages', (page['test_ids'].keys()[0], page['url']),
+                    page['id']
+                    )
+
+
+    def _get_batch_values_string(self, row_count, column_count):
+        """Build the VALUES list of a multi-row insert."""
+        row_string = "({0})".format(",".join(["%s"] * column_count))
+        return ",".join([row_string] * row_count)
+
+
+    def _set_test_aux_data(self, data, test_id, test_run_id, nocommit=False):
         """Insert test aux data to db for given test_id and test_run_id."""
         for aux_data, aux_values in data.get('results_aux', {}).items():
-            aux_data_id = self._get_or_create_aux_id(aux_data, test_id)
+            aux_data_id = self._get_or_create_aux_id(
+                aux_data, test_id, nocommit=nocommit)
 
             placeholders = []
             for index, value in enumerate(aux_values, 1):
@@ -1569,19 +3014,23 @@ class PerformanceTestModel(DatazillaModelBase):
                     )
 
             self._insert_data(
-                'set_aux_values', placeholders, executemany=True)
+                'set_aux_values', placeholders, executemany=True,
+                nocommit=nocommit)
 
 
-    def _set_test_values(self, data, test_id, test_run_id):
+    def _set_test_values(self, data, test_id, test_run_id, nocommit=False):
         """Insert test values to database for given test_id and test_run_id."""
 
         total_replicates = 0
+        loaded_replicates = []
 
         for page, values in data['results'].items():
 
-            page_id = self._get_or_create_page_id(page, test_id)
+            page_id = self._get_or_create_page_id(
+                page, test_id, nocommit=nocommit)
 
             placeholders = []
+            page_replicates = []
             for index, value in enumerate(values, 1):
 
                 total_replicates += 1
@@ -1598,6 +3047,7 @@ class PerformanceTestModel(DatazillaModelBase):
                             value,
                             )
                         )
+                    page_replicates.append(value)
 
                 else:
                     #Replicate limit reached
@@ -1605,11 +3055,20 @@ class PerformanceTestModel(DatazillaModelBase):
 
             if placeholders:
                 self._insert_data(
-                    'set_test_values', placeholders, executemany=True)
+                    'set_test_values', placeholders, executemany=True,
+                    nocommit=nocommit)
+
+            loaded_replicates.append((page_id, page, page_replicates))
+
+        self.loaded_replicates[test_run_id] = loaded_replicates
 
 
-    def _get_or_create_aux_id(self, aux_data, test_id):
+    def _get_or_create_aux_id(self, aux_data, test_id, nocommit=False):
         """Given aux name and test id, return aux id, creating if needed."""
+        cached_id = self._get_cached_ref_id('aux', (test_id, aux_data))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the test id and aux data if it doesn't exist
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_aux_ref_data',
@@ -1620,6 +3079,7 @@ class PerformanceTestModel(DatazillaModelBase):
                 aux_data
                 ],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             )
 
         # Get the aux data id
@@ -1627,14 +3087,20 @@ class PerformanceTestModel(DatazillaModelBase):
             proc='perftest.selects.get_aux_data_id',
             placeholders=[test_id, aux_data],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter',
             )
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'aux', (test_id, aux_data), id_iter.get_column_data('id'))
 
 
-    def _get_or_create_page_id(self, page, test_id):
+    def _get_or_create_page_id(self, page, test_id, nocommit=False):
         """Given page name and test id, return page id, creating if needed."""
+        cached_id = self._get_cached_ref_id('pages', (test_id, page))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the test id and page name if it doesn't exist
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_pages_ref_data',
@@ -1645,6 +3111,7 @@ class PerformanceTestModel(DatazillaModelBase):
                 page
                 ],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             )
 
         # Get the page id
@@ -1652,13 +3119,15 @@ class PerformanceTestModel(DatazillaModelBase):
             proc='perftest.selects.get_page_id',
             placeholders=[test_id, page],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter',
             )
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'pages', (test_id, page), id_iter.get_column_data('id'))
 
 
-    def _set_option_data(self, data, test_run_id):
+    def _set_option_data(self, data, test_run_id, nocommit=False):
         """Insert option data for given test run id."""
 
         testrun = data['testrun']
@@ -1680,15 +3149,18 @@ class PerformanceTestModel(DatazillaModelBase):
             if option == 'extensions':
                 continue
 
-            option_id = self._get_or_create_option_id(option)
+            option_id = self._get_or_create_option_id(
+                option, nocommit=nocommit)
 
             placeholders.append([test_run_id, option_id, value])
 
         self._insert_data(
-            'set_test_option_values', placeholders, executemany=True)
+            'set_test_option_values', placeholders, executemany=True,
+            nocommit=nocommit)
 
 
-    def _set_test_run_data(self, data, test_id, build_id, machine_id):
+    def _set_test_run_data(
+        self, data, test_id, build_id, machine_id, nocommit=False):
         """Inserts testrun data into the db and returns test_run id."""
 
         try:
@@ -1706,37 +3178,41 @@ class PerformanceTestModel(DatazillaModelBase):
                 # denormalization; avoid join to build table to get revision
                 data['test_build']['revision'],
                 run_date,
-                ]
+                ],
+            nocommit=nocommit
             )
 
         return test_run_id
 
 
-    def _insert_data(self, statement, placeholders, executemany=False):
+    def _insert_data(
+        self, statement, placeholders, executemany=False, nocommit=False):
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.' + statement,
             debug_show=self.DEBUG,
             placeholders=placeholders,
             executemany=executemany,
+            nocommit=nocommit,
             )
 
 
-    def _insert_data_and_get_id(self, statement, placeholders):
+    def _insert_data_and_get_id(self, statement, placeholders, nocommit=False):
         """Execute given insert statement, returning inserted ID."""
-        self._insert_data(statement, placeholders)
-        return self._get_last_insert_id()
+        self._insert_data(statement, placeholders, nocommit=nocommit)
+        return self._get_last_insert_id(nocommit=nocommit)
 
 
-    def _get_last_insert_id(self, source="perftest"):
+    def _get_last_insert_id(self, source="perftest", nocommit=False):
         """Return last-inserted ID."""
         return self.sources[source].dhub.execute(
             proc='generic.selects.get_last_insert_id',
             debug_show=self.DEBUG,
             return_type='iter',
+            nocommit=nocommit,
             ).get_column_data('id')
 
 
-    def _get_or_create_build_id(self, data, product_id):
+    def _get_or_create_build_id(self, data, product_id, nocommit=False):
         """Inserts build data into the db or if the build already exists
            it returns the build id."""
         machine = data['test_machine']
@@ -1764,7 +3240,8 @@ class PerformanceTestModel(DatazillaModelBase):
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_build_data',
             debug_show=self.DEBUG,
-            placeholders=placeholders
+            placeholders=placeholders,
+            nocommit=nocommit
             )
 
         build_iter = self.sources["perftest"].dhub.execute(
@@ -1773,7 +3250,8 @@ class PerformanceTestModel(DatazillaModelBase):
             return_type='iter',
             placeholders=[
                 product_id, build['id'], machine['platform'], build_type
-                ]
+                ],
+            nocommit=nocommit
             )
 
         id = build_iter.get_column_data('id')
@@ -1781,7 +3259,7 @@ class PerformanceTestModel(DatazillaModelBase):
         return id
 
 
-    def _get_or_create_machine_id(self, data, os_id):
+    def _get_or_create_machine_id(self, data, os_id, nocommit=False):
         """
         Given a TestData instance, returns the test id from the db.
 
@@ -1790,6 +3268,11 @@ class PerformanceTestModel(DatazillaModelBase):
         """
         machine = data['test_machine']
 
+        cached_id = self._get_cached_ref_id(
+            'machine', (machine['name'], os_id))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the the machine name and timestamp if it doesn't exist
         date_added = utils.get_now_timestamp()
         self.sources["perftest"].dhub.execute(
@@ -1802,19 +3285,23 @@ class PerformanceTestModel(DatazillaModelBase):
                 os_id
                 ],
 
-            debug_show=self.DEBUG)
+            debug_show=self.DEBUG,
+            nocommit=nocommit)
 
         # Get the machine id
         id_iter = self.sources["perftest"].dhub.execute(
             proc='perftest.selects.get_machine_id',
             placeholders=[machine['name'], os_id],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'machine', (machine['name'], os_id),
+            id_iter.get_column_data('id'))
 
 
-    def _get_or_create_test_id(self, data):
+    def _get_or_create_test_id(self, data, nocommit=False):
         """
         Given a TestData instance, returns the test id from the db.
 
@@ -1830,6 +3317,11 @@ class PerformanceTestModel(DatazillaModelBase):
             raise TestDataError(
                 "Bad value: ['testrun']['suite_version'] is not an integer.")
 
+        cached_id = self._get_cached_ref_id(
+            'test', (testrun['suite'], version))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the test name and version if it doesn't exist
         self.sources['perftest'].dhub.execute(
             proc='perftest.inserts.set_test_ref_data',
@@ -1839,7 +3331,8 @@ class PerformanceTestModel(DatazillaModelBase):
                 testrun['suite'],
                 version
                 ],
-            debug_show=self.DEBUG
+            debug_show=self.DEBUG,
+            nocommit=nocommit
             )
 
         # Get the test name id
@@ -1847,12 +3340,15 @@ class PerformanceTestModel(DatazillaModelBase):
             proc='perftest.selects.get_test_id',
             placeholders=[testrun['suite'], version],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'test', (testrun['suite'], version),
+            id_iter.get_column_data('id'))
 
 
-    def _get_or_create_os_id(self, data):
+    def _get_or_create_os_id(self, data, nocommit=False):
         """
         Given a full test-data structure, returns the OS id from the database.
 
@@ -1863,6 +3359,10 @@ class PerformanceTestModel(DatazillaModelBase):
         os_name = machine['os']
         os_version = machine['osversion']
 
+        cached_id = self._get_cached_ref_id('os', (os_name, os_version))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the operating system name and version if it doesn't exist
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_os_ref_data',
@@ -1872,37 +3372,47 @@ class PerformanceTestModel(DatazillaModelBase):
                 os_name,
                 os_version
                 ],
-            debug_show=self.DEBUG)
+            debug_show=self.DEBUG,
+            nocommit=nocommit)
 
         # Get the operating system name id
         id_iter = self.sources["perftest"].dhub.execute(
             proc='perftest.selects.get_os_id',
             placeholders=[os_name, os_version],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'os', (os_name, os_version), id_iter.get_column_data('id'))
 
 
-    def _get_or_create_option_id(self, option):
+    def _get_or_create_option_id(self, option, nocommit=False):
         """Return option id for given option name, creating it if needed."""
+        cached_id = self._get_cached_ref_id('option', (option,))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the option name if it doesn't exist
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_option_ref_data',
             placeholders=[ option, option],
-            debug_show=self.DEBUG)
+            debug_show=self.DEBUG,
+            nocommit=nocommit)
 
         # Get the option id
         id_iter = self.sources["perftest"].dhub.execute(
             proc='perftest.selects.get_option_id',
             placeholders=[ option ],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'option', (option,), id_iter.get_column_data('id'))
 
 
-    def _get_or_create_product_id(self, data):
+    def _get_or_create_product_id(self, data, nocommit=False):
         """Return product id for given TestData, creating product if needed."""
         build = data['test_build']
 
@@ -1910,6 +3420,11 @@ class PerformanceTestModel(DatazillaModelBase):
         branch = build['branch']
         version = build['version']
 
+        cached_id = self._get_cached_ref_id(
+            'product', (product, branch, version))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the product, branch, and version if it doesn't exist
         self.sources["perftest"].dhub.execute(
             proc='perftest.inserts.set_product_ref_data',
@@ -1921,16 +3436,20 @@ class PerformanceTestModel(DatazillaModelBase):
                 branch,
                 version
                 ],
-            debug_show=self.DEBUG)
+            debug_show=self.DEBUG,
+            nocommit=nocommit)
 
         # Get the product id
         id_iter = self.sources["perftest"].dhub.execute(
             proc='perftest.selects.get_product_id',
             placeholders=[ product, branch, version ],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
+        return self._set_cached_ref_id(
+            'product', (product, branch, version),
+            id_iter.get_column_data('id'))
 
 
     def _get_unique_key_dict(self, data_tuple, key_strings):
@@ -1945,7 +3464,152 @@ class PerformanceTestModel(DatazillaModelBase):
 
     ##b2g project specific methods##
 
-    def _update_b2g_test_run(self, data, test_run_id):
+    def set_b2g_value_summary(self, test_run_ids):
+        """
+        Refresh the b2g_value_summary rows the ``test_run_ids`` belong to.
+
+        The summary of a revision, gecko_revision, test, page and device
+        type covers the replicates of all of its active test runs, so every
+        test run sharing the revision, gecko_revision and test of one of
+        ``test_run_ids`` is summarized again.  Pass the ids of test runs
+        whose status changed to drop them from their summaries.
+
+        """
+        if not test_run_ids:
+            return
+
+        keys = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_b2g_value_summary_keys',
+            debug_show=self.DEBUG,
+            placeholders=list(test_run_ids),
+            replace=[ ','.join( ['%s'] * len(test_run_ids) ) ],
+            return_type='tuple'
+            )
+
+        self.refresh_b2g_value_summary(keys)
+
+    def refresh_b2g_value_summary(self, keys):
+        """
+        Rebuild the b2g_value_summary rows of ``keys``.
+
+        ``keys`` is a list of dicts with the revision, gecko_revision and
+        test_id of a test run.  The summary rows of the keys are deleted
+        and summarized again from the active test runs left, in one
+        transaction, so keys without an active test run are dropped.
+
+        """
+        if not keys:
+            return
+
+        dhub = self.sources["perftest"].dhub
+
+        source_placeholders = []
+        summary_placeholders = []
+
+        for key in keys:
+            source_placeholders.extend(
+                [ key['revision'], key['gecko_revision'], key['test_id'] ]
+                )
+            summary_placeholders.extend([
+                key['revision'] or '', key['gecko_revision'] or '',
+                key['test_id']
+                ])
+
+        try:
+            dhub.execute(
+                proc='perftest.deletes.delete_b2g_value_summary',
+                debug_show=self.DEBUG,
+                placeholders=summary_placeholders,
+                replace=[ ' OR '.join(
+                    ['(revision = %s AND gecko_revision = %s AND test_id = %s)']
+                    * len(keys)
+                    ) ],
+                nocommit=True
+                )
+
+            rows = dhub.execute(
+                proc='perftest.selects.get_b2g_value_summary_source',
+                debug_show=self.DEBUG,
+                placeholders=source_placeholders,
+                replace=[ ' OR '.join(
+                    ['(tr.revision <=> %s AND tr.gecko_revision <=> %s AND tr.test_id = %s)']
+                    * len(keys)
+                    ) ],
+                return_type='tuple'
+                )
+
+            summaries = self._get_b2g_value_summaries(rows)
+
+            if summaries:
+                dhub.execute(
+                    proc='perftest.inserts.set_b2g_value_summary',
+                    debug_show=self.DEBUG,
+                    placeholders=summaries,
+                    executemany=True,
+                    nocommit=True
+                    )
+
+        except Exception:
+            dhub.rollback('master_host')
+            raise
+
+        dhub.commit('master_host')
+
+    def _get_b2g_value_summaries(self, rows):
+        """
+        Aggregate the test value ``rows`` into b2g_value_summary rows.
+
+        ``rows`` are ordered by test run id, the latest test run of a
+        summary is the one it refers to.  Returns a list of placeholder
+        lists for ``perftest.inserts.set_b2g_value_summary``.
+
+        """
+        groups = {}
+
+        for row in rows:
+            key = (
+                row['revision'] or '', row['gecko_revision'] or '',
+                row['test_id'], row['page_id'], row['type'] or '',
+                row['branch'] or ''
+                )
+
+            if key not in groups:
+                groups[key] = { 'values':[] }
+
+            groups[key]['row'] = row
+            groups[key]['values'].append(float(row['value'] or 0))
+
+        summaries = []
+
+        for key in sorted(groups.keys()):
+
+            row = groups[key]['row']
+            values = sorted(groups[key]['values'])
+
+            count = len(values)
+            avg = sum(values) / count
+            # population standard deviation, like MySQL's STDDEV
+            std = (sum([ (v - avg) ** 2 for v in values ]) / count) ** 0.5
+
+            if count % 2:
+                median = values[count / 2]
+            else:
+                median = (values[count / 2] + values[count / 2 - 1]) / 2.0
+
+            (revision, gecko_revision, test_id, page_id, machine_type,
+                branch) = key
+
+            summaries.append([
+                revision, gecko_revision, row['build_revision'], test_id,
+                page_id, row['url'], machine_type, branch, row['product_id'],
+                row['operating_system_id'], row['test_run_id'],
+                row['date_run'], avg, values[0], values[-1], std, median,
+                count
+                ])
+
+        return summaries
+
+    def _update_b2g_test_run(self, data, test_run_id, nocommit=False):
 
         if 'gecko_revision' in data['test_build']:
 
@@ -1956,7 +3620,8 @@ class PerformanceTestModel(DatazillaModelBase):
             test_dict = self.sources["perftest"].dhub.execute(
                 proc=gecko_proc,
                 debug_show=self.DEBUG,
-                placeholders=[ gecko_revision, test_run_id ]
+                placeholders=[ gecko_revision, test_run_id ],
+                nocommit=nocommit
                 )
 
         if 'build_revision' in data['test_build']:
@@ -1968,13 +3633,19 @@ class PerformanceTestModel(DatazillaModelBase):
             test_dict = self.sources["perftest"].dhub.execute(
                 proc=build_proc,
                 debug_show=self.DEBUG,
-                placeholders=[ build_revision, test_run_id ]
+                placeholders=[ build_revision, test_run_id ],
+                nocommit=nocommit
                 )
 
-    def _get_or_create_b2g_machine_id(self, data, os_id):
+    def _get_or_create_b2g_machine_id(self, data, os_id, nocommit=False):
 
         machine = data['test_machine']
 
+        cached_id = self._get_cached_ref_id(
+            'b2g_machine', (machine['name'], os_id, machine['type']))
+        if cached_id is not None:
+            return cached_id
+
         # Insert the the machine name and timestamp if it doesn't exist
         date_added = utils.get_now_timestamp()
 
@@ -1989,25 +3660,20 @@ class PerformanceTestModel(DatazillaModelBase):
                 os_id,
                 machine['type'],
                 ],
-            debug_show=self.DEBUG)
+            debug_show=self.DEBUG,
+            nocommit=nocommit)
 
         # Get the machine id
         id_iter = self.sources["perftest"].dhub.execute(
             proc='perftest.selects.get_b2g_machine_id',
             placeholders=[machine['name'], os_id, machine['type']],
             debug_show=self.DEBUG,
+            nocommit=nocommit,
             return_type='iter')
 
-        return id_iter.get_column_data('id')
-
-    def _get_median_from_sorted_list(self, sorted_list):
-
-        length = len(sorted_list)
-        if not length % 2:
-            return round(
-            (sorted_list[length / 2] + sorted_list[length / 2 - 1]) / 2.0, 0
-                )
-        return round( sorted_list[length / 2], 0 )
+        return self._set_cached_ref_id(
+            'b2g_machine', (machine['name'], os_id, machine['type']),
+            id_iter.get_column_data('id'))
 
 class TestDataError(ValueError):
     pass
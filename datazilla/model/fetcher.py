@@ -0,0 +1,183 @@
+#####
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#####
+"""
+Concurrent fetching of documents over HTTP.
+
+``HttpFetcher`` fetches a list of urls with a bounded pool of threads.
+Every thread keeps one persistent HTTP/1.1 connection per host, so the
+requests to a repository host share a few keep-alive connections instead
+of opening one TLS session each.  Timeouts are set per connection rather
+than globally with ``socket.setdefaulttimeout``, failed requests are
+retried with exponential backoff, and the results are handed back in the
+order they complete so one slow url doesn't hold up the others.
+
+"""
+import httplib
+import socket
+import threading
+import time
+import urlparse
+
+from Queue import Queue
+
+
+class FetchError(Exception):
+    """A url could not be fetched, after any retries."""
+
+    def __init__(self, url, reason):
+        self.url = url
+        self.reason = reason
+        super(FetchError, self).__init__(
+            "{0}: {1}".format(url, reason))
+
+
+class HttpFetcher(object):
+    """
+    Fetch urls with up to ``workers`` concurrent requests.
+
+    ``timeout`` is the socket timeout in seconds of every request.
+    Requests that time out, fail to connect or get a 5xx response are
+    retried up to ``retries`` times, waiting ``backoff`` seconds before
+    the first retry and twice as long before each following one.
+
+    """
+    def __init__(self, workers=4, timeout=120, retries=2, backoff=1):
+
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+
+    def fetch(self, requests):
+        """
+        Fetch ``requests``, a list of (key, url) tuples.
+
+        Yields a (key, body, error) tuple for every request as soon as it
+        completes.  ``body`` is the response body, or None if the request
+        failed, in which case ``error`` is the ``FetchError``.
+
+        """
+        requests = list(requests)
+
+        if not requests:
+            return
+
+        tasks = Queue()
+        results = Queue()
+
+        for request in requests:
+            tasks.put(request)
+
+        workers = min(self.workers, len(requests))
+
+        for i in range(workers):
+            # a stop marker per thread
+            tasks.put(None)
+
+            thread = threading.Thread(
+                target=self._work, args=(tasks, results))
+            thread.daemon = True
+            thread.start()
+
+        for i in range(len(requests)):
+            yield results.get()
+
+
+    def _work(self, tasks, results):
+        """Worker thread, fetch tasks until the stop marker."""
+
+        # one keep-alive connection per (scheme, host) for this thread
+        connections = {}
+
+        try:
+            while True:
+
+                task = tasks.get()
+
+                if task is None:
+                    break
+
+                key, url = task
+
+                try:
+                    body = self._fetch_url(connections, url)
+                except FetchError as e:
+                    results.put((key, None, e))
+                except Exception as e:
+                    # never lose a result, the consumer waits for it
+                    results.put((key, None, FetchError(url, e)))
+                else:
+                    results.put((key, body, None))
+
+        finally:
+            for connection in connections.values():
+                connection.close()
+
+
+    def _fetch_url(self, connections, url):
+        """Fetch ``url``, retrying failures with backoff."""
+
+        parts = urlparse.urlsplit(url)
+
+        path = parts.path or '/'
+        if parts.query:
+            path = "{0}?{1}".format(path, parts.query)
+
+        attempt = 0
+
+        while True:
+
+            connection = self._get_connection(
+                connections, parts.scheme, parts.netloc)
+
+            try:
+                connection.request(
+                    'GET', path, headers={'Connection': 'keep-alive'})
+                response = connection.getresponse()
+                # the body has to be read before the connection is reused
+                body = response.read()
+
+            except (socket.error, httplib.HTTPException) as e:
+                # covers timeouts and a keep-alive connection closed by
+                # the server, start over on a new connection
+                connection.close()
+                del connections[ (parts.scheme, parts.netloc) ]
+                reason = e
+
+            else:
+                if response.status == httplib.OK:
+                    return body
+
+                reason = "HTTP {0} {1}".format(
+                    response.status, response.reason)
+
+                if response.status < 500:
+                    # the request itself is wrong, retrying won't help
+                    raise FetchError(url, reason)
+
+            if attempt >= self.retries:
+                raise FetchError(url, reason)
+
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+
+    def _get_connection(self, connections, scheme, netloc):
+        """Return the connection of this thread to ``netloc``."""
+
+        key = (scheme, netloc)
+
+        if key not in connections:
+
+            if scheme == 'https':
+                connection_class = httplib.HTTPSConnection
+            else:
+                connection_class = httplib.HTTPConnection
+
+            connections[key] = connection_class(netloc, timeout=self.timeout)
+
+        return connections[key]
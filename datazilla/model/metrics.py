@@ -1,16 +1,135 @@
 import sys
 import copy
+import os
 import time
+import weakref
+
+from collections import OrderedDict
+
+import numpy
 
 from numpy import mean, std, isnan, nan
+from scipy.special import stdtr
 
 from django.conf import settings
 
 from dzmetrics.ttest import welchs_ttest, welchs_ttest_internal
-from dzmetrics.fdr import rejector
 from dzmetrics.data_smoothing import exp_smooth
 
-from base import DatazillaModelBase
+from base import DatazillaModelBase, PerformanceTestModel
+from series import SeriesCache
+from pushlog_index import PushLogIndex
+from response_cache import response_cache
+
+
+def get_replicate_stats(groups, ddof=0):
+    """
+    Return n, mean, std, median, min and max of every list in ``groups``.
+
+    All groups are computed together on one flat array with ``reduceat``,
+    each group needs at least one value.  Returns a dict of statistic name
+    to an array with one value per group, std is the population standard
+    deviation like MySQL's STDDEV unless ``ddof`` is given, as in
+    ``numpy.std``.
+
+    """
+    lengths = numpy.array([ len(g) for g in groups ])
+    values = numpy.concatenate(
+        [ numpy.asarray(g, dtype=float) for g in groups ])
+
+    starts = numpy.concatenate([ [0], numpy.cumsum(lengths)[:-1] ])
+
+    means = numpy.add.reduceat(values, starts) / lengths
+    deviations = values - numpy.repeat(means, lengths)
+    stds = numpy.sqrt(
+        numpy.add.reduceat(deviations ** 2, starts) / (lengths - ddof))
+
+    # sort the values within each group to pick the medians
+    group_ids = numpy.repeat(numpy.arange(len(groups)), lengths)
+    ordered = values[ numpy.lexsort((values, group_ids)) ]
+    medians = (ordered[ starts + (lengths - 1) // 2 ] +
+               ordered[ starts + lengths // 2 ]) / 2.0
+
+    return {
+        'n': lengths,
+        'mean': means,
+        'std': stds,
+        'median': medians,
+        'min': numpy.minimum.reduceat(values, starts),
+        'max': numpy.maximum.reduceat(values, starts),
+        }
+
+
+def welchs_ttest_many(n1, s1, m1, n2, s2, m2):
+    """
+    Vectorized ``welchs_ttest_internal``, one-sided Welch's t-test on
+    arrays of summary data (N, stddev and mean) for two sets of datasets.
+
+    Returns an array with the p value of every pair of datasets, nan where
+    the test is undefined (a pooled variance of 0 for instance).  The t
+    distribution CDF is evaluated for all of them with one
+    ``scipy.special.stdtr`` call instead of building a frozen
+    ``scipy.stats.t`` per test.
+
+    """
+    n1 = numpy.asarray(n1, dtype=float)
+    n2 = numpy.asarray(n2, dtype=float)
+    m1 = numpy.asarray(m1, dtype=float)
+    m2 = numpy.asarray(m2, dtype=float)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+
+        v1 = numpy.asarray(s1, dtype=float) ** 2 / n1
+        v2 = numpy.asarray(s2, dtype=float) ** 2 / n2
+
+        vpooled = v1 + v2
+        tt = (m1 - m2) / numpy.sqrt(vpooled)
+        df = vpooled ** 2 / ( v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1) )
+
+        #1 - cdf(tt), without the loss of precision for small p values
+        return stdtr(df, -tt)
+
+
+def rejector_many(p_values, group_ids, q=0.05):
+    """
+    Vectorized ``dzmetrics.fdr.rejector``, the Benjamini-Hochberg method
+    of false discovery rate control run on many groups of p values.
+
+    ``group_ids`` holds the group of every p value, each group is
+    controlled on its own as if passed to ``rejector`` separately.
+    Returns a boolean array, True where the null hypothesis of the p value
+    is rejected.
+
+    """
+    p_values = numpy.asarray(p_values, dtype=float)
+    group_ids = numpy.asarray(group_ids)
+
+    status = numpy.zeros(len(p_values), dtype=bool)
+
+    if not len(p_values):
+        return status
+
+    #sort by group, then p value, ties keep their order like rejector
+    order = numpy.lexsort((p_values, group_ids))
+    sorted_ids = group_ids[order]
+
+    starts = numpy.flatnonzero(
+        numpy.concatenate([ [True], sorted_ids[1:] != sorted_ids[:-1] ])
+        )
+    lengths = numpy.diff(numpy.concatenate([ starts, [len(p_values)] ]))
+
+    #rank of every p value within its group
+    ranks = numpy.arange(len(p_values)) - numpy.repeat(starts, lengths)
+    cutoffs = (ranks + 1) * q / numpy.repeat(lengths, lengths)
+
+    #number of p values rejected in each group
+    counts = numpy.maximum.reduceat(
+        numpy.where(p_values[order] < cutoffs, ranks + 1, 0), starts
+        )
+
+    status[order] = ranks < numpy.repeat(counts, lengths)
+
+    return status
 
 
 class MetricsTestModel(DatazillaModelBase):
@@ -64,33 +183,51 @@ class MetricsTestModel(DatazillaModelBase):
     #used in the revision string
     REVISION_CHAR_COUNT = 12
 
-    ALL_DIMENSION_COLUMN_KEY = {
-        "ti":"test_run_id",
-        "dr":"date received",
-        "r":"revision",
-        "p":"product",
-        "b":"branch",
-        "bv":"branch version",
-        "osn":"operating system",
-        "osv":"operating system version",
-        "pr":"processor",
-        "bt":"build type",
-        "mn":"machine name",
-        "pi":"pushlog_id",
-        "pd":"push date",
-        "tn":"test name",
-        "pu":"page url",
-        "m":"mean",
-        "s":"std",
-        "hr":"h0 rejected",
-        "pv":"p value",
-        "nr":"replicates",
-        "f":"false discovery rate",
-        "tm":"trend mean",
-        "ts":"trend std",
-        "te":"test evaluation"
-        }
-
+    #Columns of the compact all dimensions format, in order, and their names
+    ALL_DIMENSION_COLUMN_KEY = OrderedDict([
+        ("ti", "test_run_id"),
+        ("dr", "date received"),
+        ("r", "revision"),
+        ("p", "product"),
+        ("b", "branch"),
+        ("bv", "branch version"),
+        ("osn", "operating system"),
+        ("osv", "operating system version"),
+        ("pr", "processor"),
+        ("bt", "build type"),
+        ("mn", "machine name"),
+        ("pi", "pushlog_id"),
+        ("pd", "push date"),
+        ("tn", "test name"),
+        ("pu", "page url"),
+        ("m", "mean"),
+        ("s", "std"),
+        ("hr", "h0 rejected"),
+        ("pv", "p value"),
+        ("nr", "replicates"),
+        ("f", "false discovery rate"),
+        ("tm", "trend mean"),
+        ("ts", "trend std"),
+        ("te", "test evaluation"),
+        ])
+    ALL_DIMENSION_COLUMNS = list(ALL_DIMENSION_COLUMN_KEY)
+
+    #Revisions whose test values get_parent_test_data reads with
+    #one query while walking back through the pushlog
+    PARENT_WINDOW_SIZE = 20
+
+    #Range of test_run ids backfill_all_dimensions handles at a time,
+    #and the name its watermark is stored under
+    BACKFILL_CHUNK_SIZE = 1000
+    ALL_DIMENSIONS_WATERMARK = 'all_dimensions'
+
+    #Seconds after which every test_run id up to the highest one seen is
+    #assumed committed, longer than any load transaction stays open
+    BACKFILL_WATERMARK_LAG = 3600
+
+
+    # project -> SeriesCache, shared by the instances of a process
+    _series_caches = {}
 
     def __init__(self, project=None, metrics=()):
 
@@ -98,6 +235,10 @@ class MetricsTestModel(DatazillaModelBase):
 
         self.skip_revisions = set()
 
+        # PushLogIndex -> metric datum key -> bitmap of the pushes known
+        # to have no parent data for the datum, see get_parent_test_data
+        self.push_skip_bitmaps = weakref.WeakKeyDictionary()
+
         self.metrics = metrics or self._get_metric_collection()
 
         self.mf = MetricsMethodFactory(self.metrics)
@@ -112,6 +253,24 @@ class MetricsTestModel(DatazillaModelBase):
             )
 
 
+    @property
+    def series_cache(self):
+        """
+        The ``SeriesCache`` of this project, None if it isn't configured.
+
+        """
+        if not settings.DATAZILLA_SERIES_CACHE_DIR:
+            return None
+
+        if self.project not in self._series_caches:
+            self._series_caches[self.project] = SeriesCache(
+                os.path.join(
+                    settings.DATAZILLA_SERIES_CACHE_DIR, self.project),
+                retention_period=PerformanceTestModel.CYCLE_RETENTION_PERIOD
+                )
+
+        return self._series_caches[self.project]
+
     @classmethod
     def get_metrics_key(cls, data):
         return cls.KEY_DELIMITER.join(
@@ -144,19 +303,146 @@ class MetricsTestModel(DatazillaModelBase):
         m = self.mf.get_metric_method(test_name)
         return m.SUMMARY_NAME
 
-    def get_test_runs_not_in_all_dimensions(self, time_constraint):
-
+    def get_test_runs_not_in_all_dimensions(
+        self, time_constraint, min_id, max_id):
+        """
+        Return the ids from ``min_id`` to ``max_id`` of the test runs run
+        since ``time_constraint`` that are not in test_data_all_dimensions.
+        """
         proc = 'perftest.selects.get_test_run_ids_not_in_all_dimensions'
 
         test_run_ids = self.sources["perftest"].dhub.execute(
             proc=proc,
             debug_show=self.DEBUG,
-            key_column='id',
-            placeholders=[time_constraint, time_constraint],
-            return_type='set',
+            placeholders=[min_id, max_id, time_constraint],
+            return_type='tuple',
+            )
+
+        return [ row['id'] for row in test_run_ids ]
+
+    def get_test_run_id_range(self, time_constraint):
+        """
+        Return the lowest id of the test runs run since ``time_constraint``
+        and the highest test_run id, either is None without test runs.
+        """
+        data = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_test_run_id_range',
+            debug_show=self.DEBUG,
+            placeholders=[time_constraint],
+            return_type='tuple',
+            )
+
+        return data[0]['min_id'], data[0]['max_id']
+
+    def get_backfill_watermark(self, name):
+        """Return the last test_run id the backfill ``name`` completed."""
+
+        data = self._get_backfill_watermark_row(name)
+
+        if data:
+            return data['test_run_id']
+
+    def _get_backfill_watermark_row(self, name):
+
+        data = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_backfill_watermark',
+            debug_show=self.DEBUG,
+            placeholders=[name],
+            return_type='tuple',
             )
 
-        return list(test_run_ids)
+        if data:
+            return data[0]
+
+    def set_backfill_watermark(self, name, test_run_id):
+
+        self.sources["perftest"].dhub.execute(
+            proc='perftest.inserts.set_backfill_watermark',
+            debug_show=self.DEBUG,
+            placeholders=[name, test_run_id, int(time.time())],
+            )
+
+    def backfill_all_dimensions(
+        self, time_constraint, plm, chunk_size=None, restart=False):
+        """
+        Load the test runs run since ``time_constraint`` that are missing
+        from test_data_all_dimensions.
+
+        The test_run ids are walked in ranges of ``chunk_size`` (defaults
+        to ``BACKFILL_CHUNK_SIZE``).  The push data of the revisions of a
+        range is looked up with one query through the PushLogModel
+        ``plm``.  The next backfill resumes after the watermark unless
+        ``restart`` is set.
+
+        Test runs loaded concurrently may commit after a higher id was
+        already seen, so the highest id of a backfill is only kept as a
+        pending watermark.  A backfill starting ``BACKFILL_WATERMARK_LAG``
+        seconds later moves the watermark up to it as its ranges complete.
+
+        Returns the number of test runs loaded.
+
+        """
+        chunk_size = chunk_size or self.BACKFILL_CHUNK_SIZE
+
+        pending_name = self.ALL_DIMENSIONS_WATERMARK + '_pending'
+
+        now = int(time.time())
+
+        min_id, max_id = self.get_test_run_id_range(time_constraint)
+
+        if min_id is None:
+            return 0
+
+        watermark = self.get_backfill_watermark(self.ALL_DIMENSIONS_WATERMARK)
+
+        if (not restart) and (watermark is not None):
+            min_id = max(min_id, watermark + 1)
+
+        #ids up to the pending watermark have all been committed
+        safe_id = None
+        pending = self._get_backfill_watermark_row(pending_name)
+        if pending and \
+           (now - pending['date_updated'] >= self.BACKFILL_WATERMARK_LAG):
+            safe_id = pending['test_run_id']
+
+        loaded = 0
+
+        for start_id in range(min_id, max_id + 1, chunk_size):
+
+            end_id = min(start_id + chunk_size - 1, max_id)
+
+            test_run_ids = self.get_test_runs_not_in_all_dimensions(
+                time_constraint, start_id, end_id)
+
+            if test_run_ids:
+
+                revisions_without_push_data = \
+                    self.load_test_data_all_dimensions(test_run_ids)
+
+                if revisions_without_push_data:
+
+                    nodes = plm.get_nodes_from_revisions(
+                        revisions_without_push_data.items())
+
+                    self.set_push_data_all_dimensions(dict(
+                        (revision, nodes.get((revision, branch), {}))
+                        for revision, branch
+                        in revisions_without_push_data.items()
+                        ))
+
+                loaded += len(test_run_ids)
+
+            if safe_id is not None and start_id <= safe_id and \
+               (watermark is None or watermark < min(end_id, safe_id)):
+                watermark = min(end_id, safe_id)
+                self.set_backfill_watermark(
+                    self.ALL_DIMENSIONS_WATERMARK, watermark)
+
+        #a pending watermark that hasn't aged yet is kept as it is
+        if (not pending) or (safe_id is not None):
+            self.set_backfill_watermark(pending_name, max_id)
+
+        return loaded
 
     def get_test_values_by_test_run_id(self, test_run_id):
         """
@@ -243,6 +529,44 @@ class MetricsTestModel(DatazillaModelBase):
 
         return self._adapt_test_values(revision_data)
 
+    def get_test_values_by_revisions(self, revisions, ref_data):
+        """
+        Retrieve the test values of the metric datums of ``ref_data`` for
+        several revisions with one query.
+
+        Returns a dictionary of revision to the structure returned by
+        get_test_values_by_revision, revisions without data are left out.
+        """
+        if not revisions:
+            return {}
+
+        placeholders = [
+            ref_data['product_id'],
+            ref_data['operating_system_id'],
+            ref_data['processor'],
+            ref_data['build_type'],
+            ref_data['test_id'],
+            ]
+        placeholders.extend(revisions)
+
+        revision_data = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_test_values_by_ref_data_revisions',
+            debug_show=self.DEBUG,
+            placeholders=placeholders,
+            replace=[ ','.join( ['%s'] * len(revisions) ) ],
+            return_type='tuple',
+            )
+
+        #group the rows in memory by revision
+        revision_rows = {}
+        for d in revision_data:
+            revision_rows.setdefault(d['revision'], []).append(d)
+
+        return dict(
+            (revision, self._adapt_test_values(rows))
+            for revision, rows in revision_rows.items()
+            )
+
     def _adapt_test_values(self, revision_data):
 
         key_lookup = {}
@@ -964,8 +1288,8 @@ class MetricsTestModel(DatazillaModelBase):
         position before the child, looking for the parent push of
         the metrics datum specified by 'child_key'.
 
-        pushlog - Pushlog data structure for a given branch (generated by
-            PushLogModel.get_branch_pushlog.
+        pushlog - PushLogIndex of a branch, or the pushlog rows of a
+            branch as generated by PushLogModel.get_branch_pushlog.
 
         index - Pushlog index where the child is found.
 
@@ -975,62 +1299,91 @@ class MetricsTestModel(DatazillaModelBase):
             metric test results.  If it's provided a parent must pass the
             MetricMethod.evaluate_metric_result test to be considered a
             viable parent.
+
+        The candidate pushes are collected and their test values read
+        PARENT_WINDOW_SIZE revisions at a time with one query, and the
+        walk stops at the first window holding a parent.  Pushes found to have
+        no data for 'child_key' are remembered in a bitmap of the
+        PushLogIndex, later walks over the same index skip them without a
+        query.
         """
         parent_data = {}
         test_result = {}
-        parent_index = index
 
-        try:
+        if not isinstance(pushlog, PushLogIndex):
+            pushlog = PushLogIndex(pushlog)
 
-            while not parent_data:
+        bitmaps = self.push_skip_bitmaps.setdefault(pushlog, {})
+        skip = pushlog.get_skip_bitmap(bitmaps, child_key)
 
-                if parent_index == 0:
-                    break
-                else:
-                    #walk back through the pushlog to find the parent
-                    parent_index -= 1
+        for window in self._get_parent_windows(pushlog, index, skip):
 
-                parent_node = pushlog[ parent_index ]
-                revision = self.truncate_revision(parent_node['node'])
+            window_data = self.get_test_values_by_revisions(
+                list(set( revision for i, revision in window )), ref_data
+                )
 
-                #skip pushes without data
-                if revision in self.skip_revisions:
-                    continue
+            for parent_index, revision in window:
 
-                data = self.get_test_values_by_revision(revision, ref_data)
+                data = window_data.get(revision)
                 #no data for this revision, skip
                 if not data:
                     self.add_skip_revision(revision)
+                    skip[parent_index] = True
                     continue
 
-                if child_key in data:
-                    if metric_method_data:
-                        m = self.mf.get_metric_method(
-                            data[child_key]['ref_data']['test_name']
-                            )
+                if child_key not in data:
+                    skip[parent_index] = True
+                    continue
 
-                        test_result = m.run_metric_method(
-                            metric_method_data,
-                            data[child_key]['values']
-                            )
+                if metric_method_data:
+                    m = self.mf.get_metric_method(
+                        data[child_key]['ref_data']['test_name']
+                        )
 
-                        #Confirm that it passes test
-                        if m.evaluate_metric_result(test_result):
-                            #parent found that passes metric test
-                            #requirements
-                            parent_data = data[child_key]
-                    else:
-                        #parent found
-                        parent_data = data[child_key]
+                    test_result = m.run_metric_method(
+                        metric_method_data,
+                        data[child_key]['values']
+                        )
 
-        except IndexError:
-            #last index reached, no parent with data found,
-            #return empty data structures
-            return parent_data, test_result
+                    #Confirm that it passes test
+                    if m.evaluate_metric_result(test_result):
+                        #parent found that passes metric test
+                        #requirements
+                        return data[child_key], test_result
+                else:
+                    #parent found
+                    return data[child_key], test_result
 
-        else:
-            #parent with data found
-            return parent_data, test_result
+        return parent_data, test_result
+
+    def _get_parent_windows(self, pushlog, index, skip):
+        """
+        Yield the candidate parents before 'index' in windows of
+        PARENT_WINDOW_SIZE (pushlog index, revision) tuples, nearest first.
+
+        Revisions are only looked up as the windows are consumed, pushes
+        without a revision or with a revision known to have no data are
+        marked in the 'skip' bitmap on the way.
+        """
+        window = []
+
+        for parent_index in numpy.flatnonzero(~skip[:index])[::-1]:
+
+            revision = pushlog.get_revision(parent_index)
+
+            #skip pushes without data
+            if (not revision) or (revision in self.skip_revisions):
+                skip[parent_index] = True
+                continue
+
+            window.append( (parent_index, revision) )
+
+            if len(window) == self.PARENT_WINDOW_SIZE:
+                yield window
+                window = []
+
+        if window:
+            yield window
 
     def run_metric_method(
         self, ref_data, child_data, parent_data, parent_metric_data={}
@@ -1042,12 +1395,24 @@ class MetricsTestModel(DatazillaModelBase):
             )
         return results
 
+    def run_metric_method_many(self, test_name, data):
+
+        m = self.mf.get_metric_method(test_name)
+        results = m.run_metric_method_many(data)
+        return results
+
     def run_metric_summary(self, ref_data, data):
 
         m = self.mf.get_metric_method(ref_data['test_name'])
         results = m.run_metric_summary(data)
         return results
 
+    def run_metric_summary_many(self, test_name, data):
+
+        m = self.mf.get_metric_method(test_name)
+        results = m.run_metric_summary_many(data)
+        return results
+
     def store_metric_results(
         self, revision, ref_data, results, threshold_test_run_id
         ):
@@ -1067,6 +1432,9 @@ class MetricsTestModel(DatazillaModelBase):
                 placeholders=placeholders,
                 executemany=True,
                 )
+
+            response_cache.invalidate_revisions(self.project, [revision])
+
             if m.evaluate_metric_result(results):
 
                 self.insert_or_update_metric_threshold(
@@ -1098,6 +1466,8 @@ class MetricsTestModel(DatazillaModelBase):
                 executemany=True,
                 )
 
+            response_cache.invalidate_revisions(self.project, [revision])
+
     def insert_or_update_metric_threshold(
         self, revision, ref_data, metric_id
         ):
@@ -1136,7 +1506,19 @@ class MetricsTestModel(DatazillaModelBase):
             )
 
     def load_test_data_all_dimensions(
-        self, test_run_ids, replicate_filters={}):
+        self, test_run_ids, replicate_filters={}, replicates=None):
+        """
+        Summarize ``test_run_ids`` into test_data_all_dimensions.
+
+        ``replicates`` are the replicates of the test runs as returned by
+        ``PerformanceTestModel.pop_loaded_replicates``.  If they cover all
+        of ``test_run_ids`` the statistics are computed from them in
+        memory, otherwise they are aggregated from test_value.
+
+        Returns a dict of the revisions that have no push data yet, to
+        their branch.
+
+        """
 
         if not test_run_ids:
             return {}
@@ -1163,6 +1545,9 @@ class MetricsTestModel(DatazillaModelBase):
             'page_url',
             'mean',
             'std',
+            'median',
+            'min',
+            'max',
             'h0_rejected',
             'p',
             'n_replicates',
@@ -1179,34 +1564,41 @@ class MetricsTestModel(DatazillaModelBase):
         ####
         # Extract:  compute mean/std from replicates
         ####
-        where_in_clause = ','.join(
-            map( lambda v:'%s', test_run_ids )
-            )
-
-        ####
-        #Conditional replicate filtering is required for different
-        #project/test combinations. At this point we need to know the
-        #test name to test_run_id associations to determine what type
-        #of filtering is required.
-        ####
-        test_names = self.sources["perftest"].dhub.execute(
-            proc='perftest.selects.get_test_names_by_test_run_ids',
-            debug_show=self.DEBUG,
-            placeholders=list(test_run_ids),
-            replace=[where_in_clause],
-            key_column='id',
-            return_type='dict')
-
         if not replicate_filters:
             replicate_filters = self.get_replicate_filters()
 
-        for id in test_run_ids:
-            try:
-                replicate_filters[ self.project ][ test_names[id]['name'] ]['ids'].append(id)
-            except KeyError:
-                replicate_filters[ "default" ]["test"]['ids'].append(id)
+        if replicates and set(test_run_ids).issubset(replicates):
+
+            computed_means = self.get_computed_stats(
+                test_run_ids, replicates, replicate_filters)
+
+        else:
+
+            where_in_clause = ','.join(
+                map( lambda v:'%s', test_run_ids )
+                )
+
+            ####
+            #Conditional replicate filtering is required for different
+            #project/test combinations. At this point we need to know the
+            #test name to test_run_id associations to determine what type
+            #of filtering is required.
+            ####
+            test_names = self.sources["perftest"].dhub.execute(
+                proc='perftest.selects.get_test_names_by_test_run_ids',
+                debug_show=self.DEBUG,
+                placeholders=list(test_run_ids),
+                replace=[where_in_clause],
+                key_column='id',
+                return_type='dict')
 
-        computed_means = self.get_computed_means(replicate_filters)
+            for id in test_run_ids:
+                try:
+                    replicate_filters[ self.project ][ test_names[id]['name'] ]['ids'].append(id)
+                except KeyError:
+                    replicate_filters[ "default" ]["test"]['ids'].append(id)
+
+            computed_means = self.get_computed_means(replicate_filters)
 
         aggregate_data = {}
 
@@ -1239,6 +1631,10 @@ class MetricsTestModel(DatazillaModelBase):
 
             aggregate_data[key]['mean'] = d['mean']
             aggregate_data[key]['std'] = d['std']
+            aggregate_data[key]['median'] = d.get('median')
+            aggregate_data[key]['min'] = d.get('min')
+            aggregate_data[key]['max'] = d.get('max')
+            aggregate_data[key]['n_replicates'] = d.get('n_replicates')
 
         #Build structure for the list of revisions to use to
         #retrieve associated push data
@@ -1269,6 +1665,11 @@ class MetricsTestModel(DatazillaModelBase):
             executemany=True,
             placeholders=executemany_placeholders)
 
+        if self.series_cache:
+            self.series_cache.append(aggregate_data.values())
+
+        response_cache.invalidate_project(self.project)
+
         return revisions_without_push_data
 
     def get_replicate_filters(self):
@@ -1286,26 +1687,31 @@ class MetricsTestModel(DatazillaModelBase):
 
                 "tp5o": {
                     "get_computed_means":self.exclude_first_replicate_from_mean,
+                    "skip_replicates":1,
                     "ids":[]
                     },
 
                 "tp5o_scroll": {
                     "get_computed_means":self.exclude_first_replicate_from_mean,
+                    "skip_replicates":1,
                     "ids":[]
                     },
 
                 "Talos tp5r": {
                     "get_computed_means":self.exclude_first_replicate_from_mean,
+                    "skip_replicates":1,
                     "ids":[]
                     },
 
                 "Talos tp5n": {
                     "get_computed_means":self.exclude_first_replicate_from_mean,
+                    "skip_replicates":1,
                     "ids":[]
                     },
 
                 "tp5n": {
                     "get_computed_means":self.exclude_first_replicate_from_mean,
+                    "skip_replicates":1,
                     "ids":[]
                     },
                 },
@@ -1313,6 +1719,7 @@ class MetricsTestModel(DatazillaModelBase):
             "default": {
                 "test":{
                     "get_computed_means":self.get_mean_from_all_replicates,
+                    "skip_replicates":0,
                     "ids":[]
                     }
                 }
@@ -1343,6 +1750,73 @@ class MetricsTestModel(DatazillaModelBase):
 
         return computed_means
 
+    def get_computed_stats(self, test_run_ids, replicates, replicate_filters):
+        """
+        Compute the statistics of ``test_run_ids`` from their ``replicates``.
+
+        Returns rows like ``get_computed_means`` with median, min, max and
+        n_replicates added.  The number of leading replicates dropped for a
+        test is the "skip_replicates" of its entry in ``replicate_filters``.
+
+        """
+        where_in_clause = ','.join(
+            map( lambda v:'%s', test_run_ids )
+            )
+
+        test_runs = self.sources["perftest"].dhub.execute(
+            proc='perftest.selects.get_test_run_dimensions',
+            debug_show=self.DEBUG,
+            placeholders=list(test_run_ids),
+            replace=[where_in_clause],
+            key_column='test_run_id',
+            return_type='dict')
+
+        project_filters = replicate_filters.get(self.project, {})
+
+        rows = []
+        groups = []
+
+        for test_run_id in test_run_ids:
+
+            if test_run_id not in test_runs:
+                continue
+
+            test_run = test_runs[test_run_id]
+
+            skip = project_filters.get(
+                test_run['test_name'], replicate_filters['default']['test']
+                ).get('skip_replicates', 0)
+
+            for page_id, page, values in replicates[test_run_id]:
+
+                values = values[skip:]
+
+                # pages without replicates have no summary, like in SQL
+                if not values:
+                    continue
+
+                row = dict(test_run)
+                row['page_id'] = page_id
+                row['page_name'] = page
+
+                rows.append(row)
+                groups.append(values)
+
+        if not rows:
+            return []
+
+        stats = get_replicate_stats(groups)
+
+        for i, row in enumerate(rows):
+            row['mean'] = round(stats['mean'][i], 2)
+            row['std'] = round(stats['std'][i], 2)
+            row['median'] = float(stats['median'][i])
+            row['min'] = float(stats['min'][i])
+            row['max'] = float(stats['max'][i])
+            row['n_replicates'] = int(stats['n'][i])
+
+        return rows
+
     def get_mean_from_all_replicates(self, test_run_ids, where_in_clause):
 
         computed_means = self.sources["perftest"].dhub.execute(
@@ -1365,10 +1839,29 @@ class MetricsTestModel(DatazillaModelBase):
 
     def get_data_all_dimensions(
         self, product, branch, os, os_version, test, page, start_time,
-        stop_time):
+        stop_time, stream=False):
+        """
+        Return the test_data_all_dimensions rows matching the filters.
+
+        If ``stream`` is set data['data'] may be an iterator of the rows
+        on a server side cursor, it has to be consumed or closed before
+        the perftest datasource can be used again.
 
+        """
         data = self.get_all_dimension_data_range(start_time, stop_time)
 
+        series_cache = self.series_cache
+
+        if series_cache and series_cache.since and \
+           int(data['start']) >= series_cache.since:
+
+            data['data'] = series_cache.get_data(
+                product, branch, os, os_version, test, page,
+                data['start'], data['stop']
+                )
+
+            return data
+
         column_value_map = [
             ['product', product],
             ['branch', branch],
@@ -1391,7 +1884,14 @@ class MetricsTestModel(DatazillaModelBase):
         placeholders.append(data['start'])
         placeholders.append(data['stop'])
 
-        data['data'] = self.sources["perftest"].dhub.execute(
+        dhub = self.sources["perftest"].dhub
+
+        if stream:
+            execute = dhub.execute_stream
+        else:
+            execute = dhub.execute
+
+        data['data'] = execute(
             proc='perftest.selects.get_test_data_all_dimensions',
             debug_show=self.DEBUG,
             placeholders=placeholders,
@@ -1483,6 +1983,13 @@ class MetricsTestModel(DatazillaModelBase):
             executemany=True,
             )
 
+        if self.series_cache:
+            for pushlog_id, push_date, revision, branch in placeholders:
+                self.series_cache.set_push_data(
+                    revision, branch, pushlog_id, push_date)
+
+        response_cache.invalidate_project(self.project)
+
     def log_msg(self, revision, test_run_id, msg_type, msg):
 
         proc = 'perftest.inserts.set_application_msg'
@@ -1619,6 +2126,18 @@ class MetricMethodInterface(object):
         """
         raise NotImplementedError(self.MSG)
 
+    def run_metric_method_many(self, data):
+        """
+        Run the metric method on many metric datums at once.
+
+        data = [ (child_data, parent_data, parent_metric_data), ... ]
+
+        Returns a list with the results of every datum in data, as
+        returned by run_metric_method, or the MetricMethodError the
+        datum raised.
+        """
+        raise NotImplementedError(self.MSG)
+
     def run_metric_summary(self, data):
         """
         Run the metric summary method and return results.
@@ -1639,6 +2158,18 @@ class MetricMethodInterface(object):
         """
         raise NotImplementedError(self.MSG)
 
+    def run_metric_summary_many(self, data):
+        """
+        Run the metric summary method on the data of many metric datums
+        at once.
+
+        data = [ data of a datum as passed to run_metric_summary, ... ]
+
+        Returns a list with the results of run_metric_summary for every
+        datum in data.
+        """
+        raise NotImplementedError(self.MSG)
+
     def evaluate_metric_result(self, test_result):
         """
         Should return True if the test passed, False if not.
@@ -1794,6 +2325,29 @@ class MetricMethodBase(MetricMethodInterface):
     def set_test_name(self, test_name):
         self.test_name = test_name
 
+    def run_metric_method_many(self, data):
+        """
+        Runs run_metric_method on every datum, derived classes can
+        override this with a vectorized implementation.
+        """
+        results = []
+        for child_data, parent_data, parent_metric_data in data:
+            try:
+                results.append( self.run_metric_method(
+                    child_data, parent_data, parent_metric_data
+                    ) )
+            except MetricMethodError as e:
+                results.append(e)
+
+        return results
+
+    def run_metric_summary_many(self, data):
+        """
+        Runs run_metric_summary on every datum, derived classes can
+        override this with a vectorized implementation.
+        """
+        return [ self.run_metric_summary(d) for d in data ]
+
     def filter_by_metric_value_name(self, data):
         flist = filter(self._get_metric_value_name, data)
         return { 'values':map(lambda d: d['value'], flist), 'list':flist }
@@ -1866,7 +2420,7 @@ class TtestMethod(MetricMethodBase):
                 "stddev1":s,
                 "stddev2":trend_stddev,
                 "mean1":m,
-                "mean2":trend_stddev,
+                "mean2":trend_mean,
                 "h0_rejected":p_value < self.ALPHA
                 }
 
@@ -1897,22 +2451,111 @@ class TtestMethod(MetricMethodBase):
 
         return result
 
+    def run_metric_method_many(self, data):
+        """
+        Runs the t-tests of all datums with a few vectorized calls, see
+        welchs_ttest_many.  The results match run_metric_method.
+        """
+        #Some tests require filtering out the first replicate here
+        start_index = self.get_start_index()
+
+        results = [ None ] * len(data)
+
+        #The t-test is undefined for less than two values on a side
+        indexes = [
+            i for i, d in enumerate(data)
+            if (len(d[0][start_index:]) > 1) and (len(d[1][start_index:]) > 1)
+            ]
+
+        if indexes:
+
+            child = get_replicate_stats(
+                [ data[i][0][start_index:] for i in indexes ], ddof=1
+                )
+            parent = get_replicate_stats(
+                [ data[i][1][start_index:] for i in indexes ], ddof=1
+                )
+
+            parent_stddev = parent['std']
+            parent_mean = parent['mean']
+
+            for j, i in enumerate(indexes):
+
+                parent_metric_data = data[i][2] or {}
+
+                trend_stddev = parent_metric_data.get('trend_stddev', None)
+                trend_mean = parent_metric_data.get('trend_mean', None)
+
+                if (trend_mean != None) and \
+                   (trend_mean > 0) and \
+                   (trend_stddev != None):
+
+                    #trend line data is available use it
+                    parent_stddev[j] = trend_stddev
+                    parent_mean[j] = trend_mean
+
+            p_values = welchs_ttest_many(
+                child['n'], child['std'], child['mean'],
+                parent['n'], parent_stddev, parent_mean
+                )
+
+            for j, i in enumerate(indexes):
+                results[i] = {
+                    "p": p_values[j],
+                    "stddev1":child['std'][j],
+                    "stddev2":parent_stddev[j],
+                    "mean1":child['mean'][j],
+                    "mean2":parent_mean[j],
+                    "h0_rejected":p_values[j] < self.ALPHA
+                    }
+
+        for i, result in enumerate(results):
+
+            if (result is None) or isnan( result['p'] ):
+                #p value is not a number, see run_metric_method
+                msg = "p value is not a number, result:{0}".format(
+                    str(result)
+                    )
+
+                results[i] = MetricMethodError(msg)
+
+        return results
+
     def run_metric_summary(self, data):
 
-        filtered_data = self.filter_by_metric_value_name(data)
-        rejector_data = rejector(filtered_data['values'])
+        return self.run_metric_summary_many([ data ])[0]
 
-        filtered_data['values']
+    def run_metric_summary_many(self, data):
+        """
+        Runs the false discovery rate control of all datums with one
+        rejector_many call, the p values of each datum are controlled on
+        their own.
+        """
+        filtered_data = [ self.filter_by_metric_value_name(d) for d in data ]
+
+        status = rejector_many(
+            [ v for f in filtered_data for v in f['values'] ],
+            [ i for i, f in enumerate(filtered_data) for v in f['values'] ]
+            )
 
         results = []
-        for s, d in zip( rejector_data['status'], filtered_data['list'] ):
+        offset = 0
+
+        for f in filtered_data:
+
+            datum_results = []
+            for s, d in zip( status[offset:], f['list'] ):
+
+                rd = copy.copy(d)
+                rd['metric_value_name'] = self.SUMMARY_NAME
+                rd['metric_value_id'] = self.metric_values[self.SUMMARY_NAME]
+                rd['value'] = bool(s)
+
+                datum_results.append(rd)
 
-            rd = copy.copy(d)
-            rd['metric_value_name'] = self.SUMMARY_NAME
-            rd['metric_value_id'] = self.metric_values[self.SUMMARY_NAME]
-            rd['value'] = s
+            offset += len(f['list'])
 
-            results.append(rd)
+            results.append(datum_results)
 
         return results
 
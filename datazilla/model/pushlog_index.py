@@ -0,0 +1,158 @@
+#####
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#####
+"""
+Compact in memory index of the pushlog of a branch.
+
+The metrics push walkers look up the position of a revision in the
+pushlog of its branch and walk back from there.  A list of row dicts per
+branch, rebuilt for every run with every node truncated in Python, costs
+far more memory and time than the few fixed width columns the walk needs.
+
+``PushLogIndex`` keeps those columns as numpy arrays, the revisions as
+12 character byte strings, with a hash from revision to position.  It can
+be extended with newer pushes in place, so one index can serve all test
+runs of a process.
+
+"""
+import numpy
+
+
+# characters of a node used as the revision in the perftest schema
+REVISION_CHAR_COUNT = 12
+
+
+class PushLogIndex(object):
+    """
+    The changesets of the pushes of one branch, in push order.
+
+    ``rows`` are pushlog rows as returned by
+    ``PushLogModel.get_branch_pushlog``, one per changeset.  Indexing an
+    instance returns a row dict again, with the revision as "node".
+
+    """
+    def __init__(self, rows=()):
+
+        self.pushlog_ids = numpy.zeros(0, dtype='i8')
+        self.push_ids = numpy.zeros(0, dtype='i8')
+        self.dates = numpy.zeros(0, dtype='i8')
+        self.revisions = numpy.zeros(0, dtype='S{0}'.format(
+            REVISION_CHAR_COUNT))
+
+        # revision -> position
+        self.positions = {}
+
+        self.branch_id = None
+        self.name = None
+        self.alt_name = None
+
+        self.extend(rows)
+
+
+    def __len__(self):
+        return len(self.revisions)
+
+
+    def __getitem__(self, position):
+        return {
+            'pushlog_id':int(self.pushlog_ids[position]),
+            'push_id':int(self.push_ids[position]),
+            'date':int(self.dates[position]),
+            'node':self.get_revision(position),
+            'branch_id':self.branch_id,
+            'name':self.name,
+            'alt_name':self.alt_name,
+            }
+
+
+    @property
+    def last_push_id(self):
+        """The highest push_id in the index, or 0 if it's empty."""
+        if not len(self):
+            return 0
+        return int(self.push_ids.max())
+
+
+    def get_position(self, revision):
+        """Return the position of ``revision``, or None."""
+        return self.positions.get(revision[0:REVISION_CHAR_COUNT])
+
+
+    def get_revision(self, position):
+        return self.revisions[position].decode('ascii')
+
+
+    def extend(self, rows):
+        """
+        Append pushlog ``rows`` of newer pushes.
+
+        Changesets already in the index are ignored, so ``rows`` can
+        overlap the pushes indexed so far.
+
+        """
+        new_rows = []
+
+        for row in rows:
+
+            revision = (row['node'] or '')[0:REVISION_CHAR_COUNT]
+
+            if revision and revision in self.positions:
+                continue
+
+            if self.branch_id is None:
+                self.branch_id = row['branch_id']
+                self.name = row['name']
+                self.alt_name = row['alt_name']
+
+            if revision:
+                self.positions[revision] = len(self) + len(new_rows)
+
+            new_rows.append((row, revision))
+
+        if not new_rows:
+            return
+
+        self.pushlog_ids = numpy.concatenate([
+            self.pushlog_ids,
+            numpy.array([ r['pushlog_id'] for r, v in new_rows ], dtype='i8')
+            ])
+        self.push_ids = numpy.concatenate([
+            self.push_ids,
+            numpy.array([ r['push_id'] for r, v in new_rows ], dtype='i8')
+            ])
+        self.dates = numpy.concatenate([
+            self.dates,
+            numpy.array([ r['date'] for r, v in new_rows ], dtype='i8')
+            ])
+        self.revisions = numpy.concatenate([
+            self.revisions,
+            numpy.array(
+                [ v.encode('ascii') for r, v in new_rows ],
+                dtype=self.revisions.dtype
+                )
+            ])
+
+
+    def get_skip_bitmap(self, bitmaps, key):
+        """
+        Return the bitmap of the positions to skip for ``key``.
+
+        ``bitmaps`` is a dict the caller keeps the bitmaps of this index
+        in, a boolean array per key sized to the index.  Bitmaps from
+        before the index was extended are grown to its current size.
+
+        """
+        bitmap = bitmaps.get(key)
+
+        if bitmap is None:
+            bitmap = numpy.zeros(len(self), dtype=bool)
+        elif len(bitmap) < len(self):
+            bitmap = numpy.concatenate([
+                bitmap, numpy.zeros(len(self) - len(bitmap), dtype=bool)
+                ])
+
+        bitmaps[key] = bitmap
+
+        return bitmap
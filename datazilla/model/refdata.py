@@ -1,5 +1,6 @@
 import json
 
+from . import utils
 from base import DatazillaModelBase
 
 
@@ -153,7 +154,7 @@ class PerformanceTestRefDataModel(DatazillaModelBase):
             return_type='tuple',
             )
 
-        return data_iter
+        return ( utils.decompress_json_blobs(chunk) for chunk in data_iter )
 
 
     def get_object_error_metadata(self, startdate, enddate):
@@ -192,7 +193,7 @@ class PerformanceTestRefDataModel(DatazillaModelBase):
             return_type='tuple',
             )
 
-        return blob
+        return utils.decompress_json_blobs(blob)
 
 
     def get_object_json_blob_for_test_run(self, test_run_ids):
@@ -211,7 +212,7 @@ class PerformanceTestRefDataModel(DatazillaModelBase):
                 return_type='tuple',
                 )
 
-        return blobs
+        return utils.decompress_json_blobs(blobs)
 
 
     def get_parsed_object_error_data(self, startdate, enddate):
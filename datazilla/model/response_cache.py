@@ -0,0 +1,217 @@
+#####
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#####
+"""
+Two level cache of the json responses of the testdata APIs.
+
+Responses are stored zlib compressed in memcached, and the most recently
+used ones also in a per process ``LRUCache`` so repeated requests don't
+even make the trip to memcached for the payload.
+
+Entries are never deleted.  Instead every key includes generation counters
+kept in memcached: one per project and revision, for the responses about
+a single revision, and one per project, for the responses spanning many
+revisions.  When new data arrives the loaders bump the counters of what
+they changed, which moves all requests on to new keys; the old entries
+are evicted in time.
+
+"""
+import hashlib
+import json
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import utils
+
+
+# revisions are stored with this many characters in the perftest schema
+REVISION_CHAR_COUNT = 12
+
+
+class ResponseCache(object):
+    """
+    Cache of json responses, ``lru_size`` of them are kept in process.
+
+    ``timeout`` is the time in seconds responses are kept in memcached,
+    0 disables the cache.
+
+    """
+    # memcached's item size limit, larger compressed responses aren't
+    # cached at all
+    MAX_ITEM_SIZE = 1024 * 1024
+
+    def __init__(self, lru_size=1000, timeout=86400):
+
+        self.timeout = timeout
+        self.lru = utils.LRUCache(lru_size) if lru_size else None
+
+
+    def get_json(self, project, endpoint, params, compute, revision=None):
+        """
+        Return the json response of ``endpoint`` for ``params``.
+
+        ``params`` is a dictionary of the normalized request parameters.
+        ``compute`` is called without arguments on a cache miss and returns
+        the data to serialize.  Responses for a ``revision`` are invalidated
+        with ``invalidate_revisions``, other responses with
+        ``invalidate_project``.
+
+        """
+        return ''.join(self.get_json_iter(
+            project, endpoint, params,
+            lambda: [ json.dumps(compute()) ],
+            revision=revision
+            ))
+
+
+    def get_json_iter(self, project, endpoint, params, compute,
+                      revision=None):
+        """
+        Like ``get_json``, but return the response as an iterator of json
+        pieces for a streaming response.
+
+        ``compute`` returns an iterable of json pieces.  On a miss they're
+        passed on as they are computed, and the response is compressed on
+        the way and cached once the last piece has been read.
+
+        """
+        if not self.timeout:
+            return iter(compute())
+
+        key = self._get_key(project, endpoint, params, revision)
+
+        # the memcached key includes the key prefix and version, so the
+        # process cache is dropped along with memcached
+        lru_key = cache.make_key(key)
+
+        compressed = None
+        if self.lru is not None:
+            compressed = self.lru.get(lru_key)
+
+        if compressed is None:
+            compressed = cache.get(key)
+
+            if compressed is None:
+                return self._store_iter(key, lru_key, compute())
+
+            if self.lru is not None:
+                self.lru.set(lru_key, compressed)
+
+        return iter([ zlib.decompress(compressed) ])
+
+
+    def invalidate_revisions(self, project, revisions):
+        """
+        Invalidate the responses of ``project`` for each of ``revisions``,
+        and the responses spanning many revisions.
+
+        """
+        if not revisions:
+            return
+
+        for revision in set(revisions):
+            self._bump_generation(self._get_revision_key(project, revision))
+
+        self.invalidate_project(project)
+
+
+    def invalidate_project(self, project):
+        """Invalidate the responses of ``project`` not for one revision."""
+        self._bump_generation(self._get_project_key(project))
+
+
+    def clear(self):
+        """Drop the responses kept in process."""
+        if self.lru is not None:
+            self.lru.clear()
+
+
+    def _get_key(self, project, endpoint, params, revision):
+
+        if revision:
+            generation_key = self._get_revision_key(project, revision)
+        else:
+            generation_key = self._get_project_key(project)
+
+        return "{0}_response_{1}_{2}".format(
+            project,
+            endpoint,
+            hashlib.sha1(json.dumps(
+                [ params, self._get_generation(generation_key) ],
+                sort_keys=True
+                )).hexdigest()
+            )
+
+
+    def _store_iter(self, key, lru_key, pieces):
+        """Pass on ``pieces``, then cache them compressed."""
+        compressor = zlib.compressobj()
+        compressed = []
+        size = 0
+
+        for piece in pieces:
+
+            if compressed is not None:
+                compressed.append(compressor.compress(piece))
+                size += len(compressed[-1])
+
+                if size > self.MAX_ITEM_SIZE:
+                    # too large to cache, don't hold on to it
+                    compressed = None
+
+            yield piece
+
+        if compressed is not None:
+
+            compressed.append(compressor.flush())
+            compressed = ''.join(compressed)
+
+            if len(compressed) <= self.MAX_ITEM_SIZE:
+                cache.set(key, compressed, self.timeout)
+
+                if self.lru is not None:
+                    self.lru.set(lru_key, compressed)
+
+
+    def _get_project_key(self, project):
+        return "{0}_response_gen".format(project)
+
+
+    def _get_revision_key(self, project, revision):
+        return "{0}_response_gen_{1}".format(
+            project, revision[0:REVISION_CHAR_COUNT])
+
+
+    def _get_generation(self, key):
+        generation = cache.get(key)
+
+        if generation is None:
+            # Start from the current time rather than 0, if the counter
+            # was evicted it must not fall back to a value it had before
+            cache.add(key, self._get_initial_generation(), 0)
+            generation = cache.get(key)
+
+        return generation
+
+
+    def _bump_generation(self, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # not set yet, or evicted
+            cache.set(key, self._get_initial_generation(), 0)
+
+
+    def _get_initial_generation(self):
+        return int(time.time() * 1000)
+
+
+response_cache = ResponseCache(
+    settings.DATAZILLA_RESPONSE_CACHE_SIZE,
+    settings.DATAZILLA_RESPONSE_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,372 @@
+#####
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#####
+"""
+Columnar on disk cache of the test_data_all_dimensions series.
+
+A series is the set of test_data_all_dimensions rows sharing a product,
+branch, operating system, operating system version, test and page.  Each
+series is stored in its own numpy ``.npy`` file as a structured array
+sorted by date_received, so a date range is two binary searches and a
+slice of a memory mapped file instead of a MySQL scan.
+
+The low cardinality string columns are stored as codes into a project wide
+string table, which is kept together with the list of series in
+``index.json``.  Both only ever grow.  Writers hold a lock file, update
+the index before the series files and replace files atomically, so
+readers never need a lock.
+
+The cache only knows about rows appended after it was created.  It is
+authoritative for date ranges starting at or after its "since" timestamp,
+older ranges have to be read from the database.
+
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy
+
+from lockfile import FileLock
+
+
+# test_data_all_dimensions columns that identify a series, with the keys
+# used for them in get_data_all_dimensions results
+SERIES_COLUMNS = [
+    ('product', 'p'),
+    ('branch', 'b'),
+    ('operating_system_name', 'osn'),
+    ('operating_system_version', 'osv'),
+    ('test_name', 'tn'),
+    ('page_url', 'pu'),
+    ]
+
+# Per row columns: result key, column, numpy type.  Nullable numbers are
+# stored as floats with nan for NULL, strings listed in STRING_KEYS as
+# int32 codes into the string table.
+ROW_COLUMNS = [
+    ('ti', 'test_run_id', 'i4'),
+    ('dr', 'date_received', 'i4'),
+    ('r', 'revision', 'S16'),
+    ('bv', 'branch_version', 'i4'),
+    ('pr', 'processor', 'i4'),
+    ('bt', 'build_type', 'i4'),
+    ('mn', 'machine_name', 'i4'),
+    ('pi', 'pushlog_id', 'f8'),
+    ('pd', 'push_date', 'f8'),
+    ('m', 'mean', 'f8'),
+    ('s', 'std', 'f8'),
+    ('hr', 'h0_rejected', 'f8'),
+    ('pv', 'p', 'f8'),
+    ('nr', 'n_replicates', 'f8'),
+    ('f', 'fdr', 'f8'),
+    ('tm', 'trend_mean', 'f8'),
+    ('ts', 'trend_std', 'f8'),
+    ('te', 'test_evaluation', 'f8'),
+    ]
+
+STRING_KEYS = set(['bv', 'pr', 'bt', 'mn'])
+
+INTEGER_KEYS = set(['pi', 'pd', 'hr', 'nr', 'f', 'te'])
+
+SERIES_DTYPE = numpy.dtype([ (key, t) for key, column, t in ROW_COLUMNS ])
+
+
+class SeriesCache(object):
+    """
+    The series cache of one project, stored in directory ``path``.
+
+    ``retention_period`` is the age in seconds of the oldest rows that are
+    kept, older rows are trimmed from a series when it is appended to.
+
+    """
+    def __init__(self, path, retention_period=None):
+
+        self.path = path
+        self.retention_period = retention_period
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self.index_path = os.path.join(path, 'index.json')
+        self.lock = FileLock(os.path.join(path, 'series'))
+
+        self._index = None
+        self._index_mtime = None
+
+
+    @property
+    def index(self):
+        """
+        The series and string table of the cache, reloaded when changed.
+
+        """
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            mtime = None
+
+        if (self._index is None) or (mtime != self._index_mtime):
+
+            if mtime is None:
+                self._index = {
+                    'since':None, 'series':{}, 'strings':[]
+                    }
+            else:
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+
+            self._index_mtime = mtime
+            self._string_codes = dict(
+                (s, i) for i, s in enumerate(self._index['strings'])
+                )
+
+        return self._index
+
+
+    @property
+    def since(self):
+        """Timestamp from which on the cache holds every row, or None."""
+        return self.index['since']
+
+
+    def append(self, rows):
+        """
+        Add test_data_all_dimensions ``rows`` to their series.
+
+        ``rows`` are dictionaries keyed by the test_data_all_dimensions
+        column names.
+
+        """
+        if not rows:
+            return
+
+        with self.lock:
+
+            index = self.index
+            changed = False
+
+            if index['since'] is None:
+                index['since'] = int(time.time())
+                changed = True
+
+            series_rows = {}
+
+            for row in rows:
+
+                key = self._get_series_key(
+                    [ row[column] for column, key in SERIES_COLUMNS ]
+                    )
+
+                if key not in index['series']:
+                    index['series'][key] = [
+                        row[column] for column, k in SERIES_COLUMNS
+                        ]
+                    changed = True
+
+                for key_name, column, t in ROW_COLUMNS:
+                    if (key_name in STRING_KEYS) and \
+                       (row[column] not in self._string_codes):
+                        self._string_codes[ row[column] ] = len(
+                            index['strings'])
+                        index['strings'].append(row[column])
+                        changed = True
+
+                series_rows.setdefault(key, []).append(
+                    self._get_record(row)
+                    )
+
+            # the index goes first, readers can then decode every series
+            if changed:
+                self._write_index(index)
+
+            for key in series_rows:
+
+                new = numpy.array(series_rows[key], dtype=SERIES_DTYPE)
+
+                data = self._load(key)
+                if data is not None:
+                    new = numpy.concatenate([ data, new ])
+
+                new = new[ numpy.argsort(new['dr'], kind='mergesort') ]
+
+                if self.retention_period:
+                    start = new['dr'].searchsorted(
+                        int(time.time()) - self.retention_period)
+                    new = new[start:]
+
+                self._save(key, new)
+
+
+    def set_push_data(self, revision, branch, pushlog_id, push_date):
+        """Set the push data of the rows of ``revision`` on ``branch``."""
+
+        branch_index = [ c for c, k in SERIES_COLUMNS ].index('branch')
+        revision = revision.encode('utf-8')
+
+        with self.lock:
+
+            for key, values in self.index['series'].items():
+
+                if values[branch_index] != branch:
+                    continue
+
+                data = self._load(key, mmap_mode='r+')
+
+                if data is None:
+                    continue
+
+                rows = data['r'] == revision
+
+                if rows.any():
+                    data['pi'][rows] = pushlog_id
+                    data['pd'][rows] = push_date
+                    data.flush()
+
+                del data
+
+
+    def get_data(self, product, branch, os, os_version, test, page,
+                 start, stop):
+        """
+        Return the rows of all matching series received between ``start``
+        and ``stop``, newest first.
+
+        Rows are dictionaries with the keys of
+        ``MetricsTestModel.ALL_DIMENSION_COLUMN_KEY``, any of the series
+        values can be None to match all series.
+
+        """
+        requested = [ product, branch, os, os_version, test, page ]
+
+        rows = []
+
+        for key, values in self.index['series'].items():
+
+            if [ r for r, v in zip(requested, values) if r and r != v ]:
+                continue
+
+            data = self._load(key, mmap_mode='r')
+
+            if data is None:
+                continue
+
+            dates = data['dr']
+            begin = dates.searchsorted(int(start), side='left')
+            end = dates.searchsorted(int(stop), side='right')
+
+            if begin == end:
+                continue
+
+            strings = self.index['strings']
+            max_code = max(
+                [ data[k][begin:end].max() for k in STRING_KEYS ])
+
+            if max_code >= len(strings):
+                # the index changed since we read it
+                self._index = None
+                strings = self.index['strings']
+
+            rows.extend(
+                self._get_rows(values, data[begin:end], strings)
+                )
+
+        rows.sort(key=lambda r: r['dr'], reverse=True)
+
+        return rows
+
+
+    def _get_record(self, row):
+        """Convert a row dictionary into a SERIES_DTYPE record tuple."""
+        record = []
+
+        for key, column, t in ROW_COLUMNS:
+
+            value = row[column]
+
+            if key in STRING_KEYS:
+                value = self._string_codes[value]
+            elif key == 'r':
+                value = (value or '').encode('utf-8')
+            elif t == 'f8' and value is None:
+                value = numpy.nan
+
+            record.append(value)
+
+        return tuple(record)
+
+
+    def _get_rows(self, values, data, strings):
+        """Convert a SERIES_DTYPE array into row dictionaries."""
+        series = dict(
+            (k, v) for (c, k), v in zip(SERIES_COLUMNS, values)
+            )
+
+        columns = {}
+        for key, column, t in ROW_COLUMNS:
+            columns[key] = data[key].tolist()
+
+        rows = []
+
+        for i in range(len(data)):
+
+            row = series.copy()
+
+            for key, column, t in ROW_COLUMNS:
+
+                value = columns[key][i]
+
+                if key in STRING_KEYS:
+                    value = strings[value]
+                elif key == 'r':
+                    value = value.decode('utf-8')
+                elif t == 'f8' and value != value:
+                    value = None
+                elif key in INTEGER_KEYS:
+                    value = int(value)
+
+                row[key] = value
+
+            rows.append(row)
+
+        return rows
+
+
+    def _get_series_key(self, values):
+        return hashlib.sha1(json.dumps(values)).hexdigest()
+
+
+    def _get_series_path(self, key):
+        return os.path.join(self.path, key + '.npy')
+
+
+    def _load(self, key, mmap_mode=None):
+        try:
+            return numpy.load(self._get_series_path(key), mmap_mode=mmap_mode)
+        except IOError:
+            return None
+
+
+    def _save(self, key, data):
+        path = self._get_series_path(key)
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'wb') as f:
+            numpy.save(f, data)
+
+        os.rename(tmp_path, path)
+
+
+    def _write_index(self, index):
+        tmp_path = self.index_path + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+
+        os.rename(tmp_path, self.index_path)
+
+        self._index = index
+        self._index_mtime = os.path.getmtime(self.index_path)
@@ -0,0 +1,67 @@
+"""
+The MySQL datasource hub used by the datazilla models.
+
+"""
+import MySQLdb.cursors
+
+from datasource.hubs.MySQL import MySQL
+
+
+class StreamingMySQL(MySQL):
+    """
+    A MySQL datasource hub that can also stream the rows of large selects.
+
+    """
+    # rows read from the server per round trip by execute_stream
+    STREAM_FETCH_SIZE = 1000
+
+    def execute_stream(self, **kwargs):
+        """
+        Execute a select like ``execute``, return an iterator of its rows.
+
+        The rows are dicts, read from a server side cursor
+        (``SSDictCursor``) ``STREAM_FETCH_SIZE`` at a time as the iterator
+        is consumed instead of being buffered in the client first, so
+        memory use doesn't grow with the size of the result.
+
+        The statement is executed right away.  Until the iterator is
+        exhausted or closed the connection can't execute anything else.
+
+        """
+        self.set_execute_rules(kwargs)
+        self.get_execute_data(self.data_source, kwargs)
+
+        host_type = kwargs['host_type']
+        db = kwargs['db']
+
+        self.try_to_connect(host_type, db)
+        self.select_db(host_type, db)
+
+        if kwargs.get('debug_show'):
+            self.show_debug(
+                db, self.conf[host_type]['host'], host_type,
+                kwargs.get('proc', ''), kwargs['sql'], None)
+
+        cursor = self.connection[host_type]['con_obj'].cursor(
+            MySQLdb.cursors.SSDictCursor)
+
+        try:
+            cursor.execute(kwargs['sql'], kwargs.get('placeholders'))
+        except:
+            cursor.close()
+            raise
+
+        return self._iter_rows(cursor)
+
+
+    def _iter_rows(self, cursor):
+        try:
+            while True:
+                rows = cursor.fetchmany(self.STREAM_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            # reads and discards whatever is left of the result
+            cursor.close()
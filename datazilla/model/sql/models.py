@@ -6,20 +6,28 @@ datasource table.
 import datetime
 import os
 import subprocess
+import threading
+import time
 import uuid
 
 from datasource.bases.BaseHub import BaseHub
-from datasource.hubs.MySQL import MySQL
 from django.conf import settings
 from django.core.cache import cache
 from django.db import models, transaction
 import MySQLdb
 
+from .hubs import StreamingMySQL
+from .pool import PooledMySQL
 
 
 # the cache key is specific to the database name we're pulling the data from
 SOURCES_CACHE_KEY = "datazilla-datasources"
 
+# stamp of the cached datasources, bumped whenever they change, and the
+# seconds a process trusts its datasource index before checking the stamp
+SOURCES_VERSION_KEY = "datazilla-datasources-version"
+SOURCES_INDEX_TTL = 30
+
 SQL_PATH = os.path.dirname(os.path.abspath(__file__))
 
 # ``cron_batch`` is which cron batch this project belongs to.  This will
@@ -120,21 +128,15 @@ class SQLDataSource(object):
         return batches
 
     def _get_datasource(self):
-        candidate_sources = []
-        for source in DataSource.objects.cached():
-            if (source.project == self.project and
-                    source.contenttype == self.contenttype):
-                candidate_sources.append(source)
+        source = datasource_index.get(self.project, self.contenttype)
 
-        if not candidate_sources:
+        if source is None:
             raise DatasetNotFoundError(
                 "No dataset found for project %r, contenttype %r."
                 % (self.project, self.contenttype)
                 )
 
-        candidate_sources.sort(key=lambda s: s.dataset, reverse=True)
-
-        return candidate_sources[0]
+        return source
 
     def disconnect(self):
         self.dhub.disconnect()
@@ -169,7 +171,7 @@ class SQLDataSource(object):
 
     @classmethod
     def create(cls, project, contenttype, host=None, name=None, db_type=None,
-               schema_file=None, cron_batch=None):
+               schema_file=None, cron_batch=None, partitioned=False):
         """
         Create and return a new datasource for given project/contenttype.
 
@@ -177,7 +179,9 @@ class SQLDataSource(object):
         host ``host`` (defaults to ``DATAZILLA_DATABASE_HOST``) and populates
         the template schema from ``schema_file`` (defaults to
         ``template_schema/schema_<contenttype>.sql``) using the db type
-        ``db_type`` (defaults to "MySQL-InnoDB").
+        ``db_type`` (defaults to "MySQL-InnoDB").  If ``partitioned`` is
+        True the large tables of the schema are range partitioned, see
+        ``create_database``.
 
         Assumes that the database server at ``host`` is accessible, and that
         ``DATAZILLA_DATABASE_USER`` (identified by
@@ -197,13 +201,15 @@ class SQLDataSource(object):
             db_type=db_type,
             schema_file=schema_file,
             cron_batch=cron_batch,
+            partitioned=partitioned,
             )
 
 
     @classmethod
     @transaction.commit_on_success
     def _create_dataset(cls, project, contenttype, dataset, host, name=None,
-                        db_type=None, schema_file=None, cron_batch=None):
+                        db_type=None, schema_file=None, cron_batch=None,
+                        partitioned=False):
         """Create a new ``SQLDataSource`` and its corresponding database."""
         if name is None:
             name = "{0}_{1}_{2}".format(project, contenttype, dataset)
@@ -230,7 +236,7 @@ class SQLDataSource(object):
             cron_batch=cron_batch,
             )
 
-        ds.create_database(schema_file)
+        ds.create_database(schema_file, partitioned=partitioned)
 
         sqlds = cls(project, contenttype)
         sqlds._datasource = ds
@@ -249,6 +255,113 @@ class DataSourceManager(models.Manager):
 
 
 
+class DataSourceIndex(object):
+    """
+    Process wide index of the latest DataSource of each project and
+    contenttype.
+
+    The index is built from ``DataSourceManager.cached()`` and trusted for
+    ``ttl`` seconds.  After that the version stamp in memcached is read,
+    the index is only rebuilt if the stamp was bumped meanwhile, which
+    ``DataSource.save`` and ``DataSource.reset_cache`` do.  Without a
+    stamp, if memcached isn't available, it's rebuilt every ``ttl``
+    seconds.
+
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.clear()
+
+
+    def get(self, project, contenttype):
+        """
+        Return the DataSource of ``project`` and ``contenttype`` with the
+        highest dataset, or None.
+
+        A miss checks the stamp right away, the datasource may have been
+        created by another process.
+
+        """
+        key = (project, contenttype)
+
+        source = self._get_index().get(key)
+
+        if source is None:
+            source = self._get_index(check=True).get(key)
+
+        return source
+
+
+    def invalidate(self):
+        """Bump the version stamp, the datasources have changed."""
+        try:
+            cache.incr(SOURCES_VERSION_KEY)
+        except ValueError:
+            # not set yet, or evicted
+            cache.set(SOURCES_VERSION_KEY, self._get_initial_version(), 0)
+
+        self.clear()
+
+
+    def clear(self):
+        """Drop the index of this process."""
+        with self.lock:
+            self.index = None
+            self.version = None
+            self.checked = 0
+
+
+    def _get_index(self, check=False):
+
+        with self.lock:
+
+            now = time.time()
+
+            if (self.index is None) or check or \
+               (now - self.checked >= self.ttl):
+
+                version = self._get_version()
+
+                if (self.index is None) or (version is None) or \
+                   (version != self.version):
+                    self.index = self._build_index()
+                    self.version = version
+
+                self.checked = now
+
+            return self.index
+
+
+    def _build_index(self):
+        index = {}
+        for source in DataSource.objects.cached():
+            key = (source.project, source.contenttype)
+            if (key not in index) or (source.dataset > index[key].dataset):
+                index[key] = source
+        return index
+
+
+    def _get_version(self):
+        version = cache.get(SOURCES_VERSION_KEY)
+
+        if version is None:
+            # Start from the current time rather than 0, if the stamp was
+            # evicted it must not fall back to a value it had before
+            cache.add(SOURCES_VERSION_KEY, self._get_initial_version(), 0)
+            version = cache.get(SOURCES_VERSION_KEY)
+
+        return version
+
+
+    def _get_initial_version(self):
+        return int(time.time() * 1000)
+
+
+datasource_index = DataSourceIndex(SOURCES_INDEX_TTL)
+
+
+
 class DataSource(models.Model):
     """
     A dataset for a source of data for a single project / contenttype.
@@ -294,21 +407,20 @@ class DataSource(models.Model):
 
 
     def save(self, *args, **kwargs):
-        """Clear the cached datasources when a new one is saved."""
-        clear_cache = (self.pk is None)
-
+        """Clear the cached datasources when one is saved."""
         self.full_clean()
 
         super(DataSource, self).save(*args, **kwargs)
 
-        # Don't actually clear the cache until after the new DataSource is
+        # Don't actually clear the cache until after the DataSource is
         # saved, to avoid a race condition where it gets re-populated too soon.
-        if clear_cache:
-            cache.delete(SOURCES_CACHE_KEY)
+        cache.delete(SOURCES_CACHE_KEY)
+        datasource_index.invalidate()
 
     @classmethod
     def reset_cache(cls):
         cache.delete(SOURCES_CACHE_KEY)
+        datasource_index.invalidate()
         cls.objects.cached()
 
     @property
@@ -365,16 +477,22 @@ class DataSource(models.Model):
 
         BaseHub.add_data_source(data_source)
         # @@@ the datahub class should depend on self.type
-        return MySQL(self.key)
+        if settings.DATAZILLA_DB_POOL_SIZE:
+            return PooledMySQL(self.key)
+        return StreamingMySQL(self.key)
 
 
-    def create_database(self, schema_file=None):
+    def create_database(self, schema_file=None, partitioned=False):
         """
         Create the database for this source, using given SQL schema file.
 
         If schema file is not given, defaults to
         "template_schema/schema_<contenttype>.sql.tmpl".
 
+        If ``partitioned`` is True and there is a
+        "template_schema/partition_<contenttype>.sql.tmpl" file, it is
+        applied after the schema file to partition the large tables.
+
         Assumes that the database server at ``self.host`` is accessible, and
         that ``DATAZILLA_DATABASE_USER`` (identified by
         ``DATAZILLA_DATABASE_PASSWORD`` exists on it and has permissions to
@@ -411,6 +529,16 @@ class DataSource(models.Model):
             # set the engine to use
             sql = f.read().format(engine=engine)
 
+        partition_file = os.path.join(
+            SQL_PATH,
+            "template_schema",
+            "partition_{0}.sql.tmpl".format(self.contenttype),
+            )
+
+        if partitioned and os.path.exists(partition_file):
+            with open(partition_file) as f:
+                sql += "\n" + f.read().format(engine=engine)
+
         args = [
             "mysql",
             "--host={0}".format(self.host),
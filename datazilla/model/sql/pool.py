@@ -0,0 +1,171 @@
+"""
+Process wide pool of the MySQL connections used by the datasource hubs.
+
+Every web request builds its own models, and so its own ``SQLDataSource``
+hubs.  Without a pool each of them opens new MySQL connections and closes
+them again in ``disconnect``, paying the TCP and authentication setup for
+every database a request touches.  ``PooledMySQL`` hubs take their
+connections from the process wide ``pool`` instead, and ``disconnect``
+hands them back.
+
+"""
+import os
+import threading
+
+from collections import defaultdict
+
+import MySQLdb
+
+from datasource.hubs.MySQL import MySQL
+from django.conf import settings
+
+from .hubs import StreamingMySQL
+
+
+class ConnectionPool(object):
+    """
+    Idle MySQL connections keyed by (host, db, host_type).
+
+    A connection is used by one hub at a time, it's only in the pool while
+    no hub has it.  At most ``size`` idle connections are kept per key,
+    further ones are closed.  Idle connections are pinged before they are
+    handed out, connections the server dropped meanwhile are discarded.
+
+    The pool is thread safe.  It belongs to the process that filled it, a
+    forked child (prefork WSGI servers, multiprocessing) starts out with an
+    empty pool and leaves the connections of its parent alone.
+
+    """
+    def __init__(self, size):
+        self.size = size
+        self._reset()
+
+
+    def get(self, key):
+        """Return a live idle connection for ``key``, or None."""
+        self._check_pid()
+
+        while True:
+
+            with self.lock:
+                if not self.idle[key]:
+                    return None
+                con = self.idle[key].pop()
+
+            try:
+                con.ping()
+            except MySQLdb.Error:
+                close_connection(con)
+                continue
+
+            return con
+
+
+    def put(self, key, con):
+        """Keep ``con`` for reuse, or close it if the pool is full."""
+        self._check_pid()
+
+        with self.lock:
+            if len(self.idle[key]) < self.size:
+                self.idle[key].append(con)
+                return
+
+        close_connection(con)
+
+
+    def clear(self):
+        """Close all idle connections."""
+        self._check_pid()
+
+        with self.lock:
+            idle = self.idle
+            self.idle = defaultdict(list)
+
+        for connections in idle.values():
+            for con in connections:
+                close_connection(con)
+
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.idle = defaultdict(list)
+
+
+    def _check_pid(self):
+        # The connections of a parent process share their sockets with
+        # it, closing them here would close them for the parent as well,
+        # so they are just forgotten.
+        if self.pid != os.getpid():
+            self._reset()
+
+
+def close_connection(con):
+    """Close ``con``, ignoring errors from already broken connections."""
+    try:
+        con.close()
+    except MySQLdb.Error:
+        pass
+
+
+pool = ConnectionPool(settings.DATAZILLA_DB_POOL_SIZE)
+
+
+class PooledMySQL(StreamingMySQL):
+    """
+    A MySQL datasource hub that keeps its connections in ``pool``.
+
+    New connections are taken from the pool when it has one for the host,
+    database and host type, ``disconnect`` commits and returns them to the
+    pool instead of closing them.
+
+    """
+    def connect(self, host_type, db):
+
+        connection = self.connection.get(host_type)
+
+        if not (connection and connection['con_obj']):
+
+            con = pool.get(self._get_pool_key(host_type, db))
+
+            if con is not None:
+                self.connection[host_type] = dict(
+                    con_obj=con, cursor=con.cursor(), db=db, pid=os.getpid())
+                return
+
+        # pings a connection we already have, opens one if there is none
+        MySQL.connect(self, host_type, db)
+
+        self.connection[host_type].setdefault('pid', os.getpid())
+
+
+    def disconnect(self):
+        """Commit and return the connections of all host types to the pool."""
+
+        for host_type, connection in self.connection.items():
+
+            con = connection['con_obj']
+
+            if connection['cursor']:
+                connection['cursor'].close()
+
+            if not (con and con.open):
+                continue
+
+            if connection.get('pid') != os.getpid():
+                # inherited from the parent process, see ConnectionPool
+                continue
+
+            try:
+                con.commit()
+            except MySQLdb.Error:
+                close_connection(con)
+                continue
+
+            pool.put(self._get_pool_key(host_type, connection['db']), con)
+
+        self.connection.clear()
+
+
+    def _get_pool_key(self, host_type, db):
+        return (self.conf[host_type]['host'], db, host_type)
@@ -47,7 +47,6 @@ CREATE TABLE `project_perftest_1`.`machine` (
   CONSTRAINT `fk_machine_operating_system` FOREIGN KEY (`operating_system_id`) REFERENCES `operating_system` (`id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
-
 ALTER TABLE `project_perftest_1`.`build` MODIFY `revision` varchar (50);
 ALTER TABLE `project_perftest_1`.`test_run` MODIFY `revision` varchar (50);
 ALTER TABLE `project_perftest_1`.`metric_threshold` MODIFY `revision` varchar (50);
@@ -0,0 +1,32 @@
+/*****
+Set of SQL schema modifications to add the pre-aggregated b2g test value
+summaries to a project already converted with b2g_perftest_alterations.sql.
+Safe to run against a loaded project. To implement, change the project
+string to the target project name, execute the sql and fill the table with
+the backfill_b2g_value_summary command.
+******/
+CREATE TABLE IF NOT EXISTS `project_perftest_1`.`b2g_value_summary` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `revision` varchar(50) COLLATE utf8_bin NOT NULL DEFAULT '',
+  `gecko_revision` varchar(50) COLLATE utf8_bin NOT NULL DEFAULT '',
+  `build_revision` varchar(50) COLLATE utf8_bin DEFAULT NULL,
+  `test_id` int(11) NOT NULL,
+  `page_id` int(11) NOT NULL,
+  `url` varchar(255) COLLATE utf8_bin NOT NULL,
+  `machine_type` varchar(50) COLLATE utf8_bin NOT NULL DEFAULT '',
+  `branch` varchar(128) COLLATE utf8_bin NOT NULL DEFAULT '',
+  `product_id` int(11) NOT NULL,
+  `operating_system_id` int(11) NOT NULL,
+  `test_run_id` int(11) NOT NULL,
+  `date_run` int(11) NOT NULL,
+  `avg` double NOT NULL,
+  `min` double NOT NULL,
+  `max` double NOT NULL,
+  `std` double NOT NULL,
+  `median` double NOT NULL,
+  `n_replicates` int(11) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_b2g_value_summary` (`revision`,`gecko_revision`,`test_id`,`page_id`,`machine_type`,`branch`),
+  KEY `url_type_branch_date_run_key` (`url`,`machine_type`,`branch`,`date_run`),
+  KEY `test_id_key` (`test_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
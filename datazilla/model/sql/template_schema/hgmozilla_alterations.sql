@@ -0,0 +1,11 @@
+/*****
+Set of SQL schema modifications to bring an existing pushlog schema up to
+date with schema_hgmozilla.sql.tmpl. To implement, change the project
+string to the target project name and execute the sql.
+******/
+
+/*****
+Recent push ranges are selected by date.
+******/
+ALTER TABLE `pushlog_hgmozilla_1`.`pushlogs`
+    ADD KEY `date_key` (`date`);
@@ -0,0 +1,30 @@
+/*****
+Set of SQL schema modifications to bring an existing objectstore up to
+date with schema_objectstore.sql.tmpl. To implement, change the project
+string to the target project name and execute the sql.
+******/
+
+/*****
+Claims are identified by a token generated by the claiming process instead
+of the MySQL CONNECTION_ID() and carry a lease, a loading row whose
+lease_expires has passed is stolen by the next claim. lease_expires is
+claim_date + lease_duration, stored so the expiry check is a range scan of
+lease_expires_key.
+******/
+ALTER TABLE `project_objectstore_1`.`objectstore`
+    ADD COLUMN `claim_token` char(32) DEFAULT NULL,
+    ADD COLUMN `claim_date` int(11) DEFAULT NULL,
+    ADD COLUMN `lease_duration` int(11) DEFAULT NULL,
+    ADD COLUMN `lease_expires` int(11) DEFAULT NULL,
+    ADD KEY `claim_token_key` (`claim_token`),
+    ADD KEY `lease_expires_key` (`processed_flag`, `lease_expires`);
+
+/*****
+Rows claimed before the upgrade have no lease, let them be stolen by the
+next claim.
+******/
+UPDATE `project_objectstore_1`.`objectstore`
+    SET `claim_date` = 0,
+        `lease_duration` = 0,
+        `lease_expires` = 0
+    WHERE `processed_flag` = 'loading';
@@ -0,0 +1,23 @@
+/*****
+Set of SQL schema modifications to bring an existing perftest schema up to
+date with schema_perftest.sql.tmpl. To implement, change the project
+string to the target project name and execute the sql.
+******/
+
+/*****
+Replicate statistics computed when a test run is loaded.
+******/
+ALTER TABLE `project_perftest_1`.`test_data_all_dimensions`
+    ADD COLUMN `median` double DEFAULT NULL AFTER `std`,
+    ADD COLUMN `min` double DEFAULT NULL AFTER `median`,
+    ADD COLUMN `max` double DEFAULT NULL AFTER `min`;
+
+/*****
+Resume points of the backfill commands.
+******/
+CREATE TABLE `project_perftest_1`.`backfill_watermark` (
+  `name` varchar(50) COLLATE utf8_bin NOT NULL,
+  `test_run_id` int(11) NOT NULL,
+  `date_updated` int(11) NOT NULL,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_bin;
@@ -9,7 +9,13 @@ Model-layer utility functions.
 """
 import time
 import datetime
+import itertools
+import json
 import sys
+import threading
+import zlib
+
+from collections import OrderedDict
 
 def is_number(s):
     try:
@@ -117,7 +123,166 @@ def build_replacement(col_data):
             ]
         )
 
+# Prefix of zlib compressed objectstore json blobs.  JSON can't start with
+# it, blobs without it are stored as posted.
+JSON_BLOB_ZLIB_MARKER = "zlib:"
+
+
+def compress_json_blob(json_data):
+    """
+    Return ``json_data`` compressed for the objectstore json_blob column.
+
+    The blob is only compressed if that makes it smaller.
+
+    """
+    if isinstance(json_data, unicode):
+        json_data = json_data.encode("utf-8")
+
+    blob = JSON_BLOB_ZLIB_MARKER + zlib.compress(json_data)
+
+    if len(blob) < len(json_data):
+        return blob
+
+    return json_data
+
+
+def decompress_json_blob(blob):
+    """Return the JSON of an objectstore json_blob, compressed or not."""
+    if blob and blob.startswith(JSON_BLOB_ZLIB_MARKER):
+        try:
+            return zlib.decompress(blob[len(JSON_BLOB_ZLIB_MARKER):])
+        except zlib.error:
+            # leave it to the JSON parser to report the blob as malformed
+            pass
+
+    return blob
+
+
+def decompress_json_blobs(rows):
+    """
+    Decompress the ``json_blob`` of objectstore ``rows`` in place.
+
+    Every query reading json_blob goes through here.  Returns ``rows``.
+
+    """
+    for row in rows:
+        row['json_blob'] = decompress_json_blob(row['json_blob'])
+
+    return rows
+
+
+def iter_json(data, rows_key, columns=None, chunk_size=500):
+    """
+    Serialize the dict ``data`` to json, yielding it a piece at a time.
+
+    ``data[rows_key]`` can be any iterable of row dicts, e.g. the rows of a
+    server side cursor, it's encoded ``chunk_size`` rows at a time so the
+    rows never all need to be in memory.  If a list of ``columns`` is given
+    every row is written as the list of its values for ``columns``, and
+    ``columns`` is added to the object, instead of repeating the keys of
+    every row.
+
+    """
+    header = dict( (k, v) for k, v in data.items() if k != rows_key )
+    if columns is not None:
+        header['columns'] = columns
+
+    if header:
+        # the header object without its closing brace
+        yield json.dumps(header)[:-1] + ', '
+    else:
+        yield '{'
+
+    yield json.dumps(rows_key) + ': ['
+
+    rows = iter(data[rows_key])
+    separator = ''
+
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        if columns is not None:
+            chunk = [ [ row[c] for c in columns ] for row in chunk ]
+
+        yield separator + ', '.join([ json.dumps(row) for row in chunk ])
+        separator = ', '
+
+    yield ']}'
+
+
 def println(val, debug):
     if debug:
         sys.stdout.write("{0}\n".format(str(val)))
 
+
+
+class LRUCache(object):
+    """
+    A bounded, thread safe, least recently used cache.
+
+    ``hits`` and ``misses`` count the outcome of every ``get`` so callers
+    can report how many trips to the database the cache saved.
+
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+    def get(self, key, default=None):
+        """Return the value for ``key`` marking it most recently used."""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting the oldest if full."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def get_stats(self):
+        """Return a dict of the hit and miss counters and the cache size."""
+        return {
+            'hits':self.hits,
+            'misses':self.misses,
+            'size':len(self._data),
+            'max_size':self.max_size,
+            }
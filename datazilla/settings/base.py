@@ -17,6 +17,31 @@ DATAZILLA_DATABASE_PORT     = os.environ.get("DATAZILLA_DATABASE_PORT", "")
 
 DATAZILLA_MEMCACHED         = os.environ.get("DATAZILLA_MEMCACHED", "")
 
+# Set to "zlib" to compress the json blobs stored in the objectstore,
+# compressed and uncompressed blobs can be read either way
+DATAZILLA_OBJECTSTORE_COMPRESSION = os.environ.get(
+    "DATAZILLA_OBJECTSTORE_COMPRESSION", "")
+
+# Idle connections kept per database and host type for reuse by later
+# requests of the same process, 0 to close connections on disconnect
+DATAZILLA_DB_POOL_SIZE      = int(
+    os.environ.get("DATAZILLA_DB_POOL_SIZE", "5"))
+
+# Seconds the testdata API responses are cached in memcached, 0 disables
+# the response cache, and the number of responses kept in each process
+DATAZILLA_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get("DATAZILLA_RESPONSE_CACHE_TIMEOUT", "86400"))
+DATAZILLA_RESPONSE_CACHE_SIZE = int(
+    os.environ.get("DATAZILLA_RESPONSE_CACHE_SIZE", "1000"))
+
+# Largest decompressed body in bytes accepted by the bulk load_test API
+DATAZILLA_BULK_LOAD_MAX_SIZE = int(
+    os.environ.get("DATAZILLA_BULK_LOAD_MAX_SIZE", str(64 * 1024 * 1024)))
+
+# Directory of the on disk test_data_all_dimensions series cache, empty
+# to read all graph data from the database
+DATAZILLA_SERIES_CACHE_DIR  = os.environ.get("DATAZILLA_SERIES_CACHE_DIR", "")
+
 # Set base URL via the environment
 DATAZILLA_URL               = os.environ.get("DATAZILLA_URL", "/")
 
@@ -19,6 +19,30 @@ DATAZILLA_RO_DATABASE_PASSWORD = os.environ.get("DATAZILLA_RO_DATABASE_PASSWORD"
 
 DATAZILLA_MEMCACHED         = os.environ.get("DATAZILLA_MEMCACHED", "")
 
+# Set to "zlib" to compress the json blobs stored in the objectstore,
+# compressed and uncompressed blobs can be read either way
+DATAZILLA_OBJECTSTORE_COMPRESSION = os.environ.get(
+    "DATAZILLA_OBJECTSTORE_COMPRESSION", "")
+
+# Idle database connections kept per process for reuse, 0 disables pooling
+DATAZILLA_DB_POOL_SIZE      = int(
+    os.environ.get("DATAZILLA_DB_POOL_SIZE", "5"))
+
+# Seconds testdata API responses are cached, 0 disables the cache, and
+# the number of responses also kept in process
+DATAZILLA_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get("DATAZILLA_RESPONSE_CACHE_TIMEOUT", "86400"))
+DATAZILLA_RESPONSE_CACHE_SIZE = int(
+    os.environ.get("DATAZILLA_RESPONSE_CACHE_SIZE", "1000"))
+
+# Largest decompressed body in bytes of a bulk load_test upload
+DATAZILLA_BULK_LOAD_MAX_SIZE = int(
+    os.environ.get("DATAZILLA_BULK_LOAD_MAX_SIZE", str(64 * 1024 * 1024)))
+
+# Directory of the test_data_all_dimensions series cache, must be shared
+# by the web processes and the processes loading data
+DATAZILLA_SERIES_CACHE_DIR  = os.environ.get("DATAZILLA_SERIES_CACHE_DIR", "")
+
 # base URL
 DATAZILLA_URL               = os.environ.get("DATAZILLA_URL", "/")
 
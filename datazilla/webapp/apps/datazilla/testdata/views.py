@@ -5,6 +5,7 @@ from django.http import HttpResponse
 
 from datazilla.controller.admin import testdata
 from datazilla.model import utils
+from datazilla.model.response_cache import response_cache
 
 REQUIRE_DAYS_AGO = """Invalid Request: Require days_ago parameter.
                     This specifies the number of days ago to use as the start
@@ -89,20 +90,27 @@ def get_metrics_data(request, project, branch, revision):
     test_name = request.GET.get("test_name", None)
     page_name = request.GET.get("page_name", None)
 
+    params = dict(
+        branch=branch,
+        revision=revision,
+        product_name=product_name,
+        os_name=os_name,
+        os_version=os_version,
+        branch_version=branch_version,
+        processor=processor,
+        build_type=build_type,
+        test_name=test_name,
+        page_name=page_name,
+        )
+
     return HttpResponse(
-        json.dumps(testdata.get_metrics_data(
+        response_cache.get_json(
             project,
-            branch,
-            revision,
-            product_name=product_name,
-            os_name=os_name,
-            os_version=os_version,
-            branch_version=branch_version,
-            processor=processor,
-            build_type=build_type,
-            test_name=test_name,
-            page_name=page_name,
-            )),
+            'metrics_data',
+            params,
+            lambda: testdata.get_metrics_data(project, **params),
+            revision=revision,
+            ),
         content_type=API_CONTENT_TYPE,
         )
 
@@ -127,20 +135,27 @@ def get_metrics_summary(request, project, branch, revision):
     test_name = request.GET.get("test_name", None)
     pushlog_project = request.GET.get("pushlog_project", None)
 
+    params = dict(
+        branch=branch,
+        revision=revision,
+        product_name=product_name,
+        os_name=os_name,
+        os_version=os_version,
+        branch_version=branch_version,
+        processor=processor,
+        build_type=build_type,
+        test_name=test_name,
+        pushlog_project=pushlog_project,
+        )
+
     return HttpResponse(
-        json.dumps(testdata.get_metrics_summary(
+        response_cache.get_json(
             project,
-            branch,
-            revision,
-            product_name=product_name,
-            os_name=os_name,
-            os_version=os_version,
-            branch_version=branch_version,
-            processor=processor,
-            build_type=build_type,
-            test_name=test_name,
-            pushlog_project=pushlog_project
-            )),
+            'metrics_summary',
+            params,
+            lambda: testdata.get_metrics_summary(project, **params),
+            revision=revision,
+            ),
         content_type=API_CONTENT_TYPE,
         )
 
@@ -197,23 +212,31 @@ def get_metrics_pushlog(request, project, branch, revision):
     if not page_name:
         return HttpResponse(REQUIRE_PAGE_NAME, status=400)
 
+    params = dict(
+        branch=branch,
+        revision=revision,
+        product_name=product_name,
+        os_name=os_name,
+        os_version=os_version,
+        branch_version=branch_version,
+        processor=processor,
+        build_type=build_type,
+        test_name=test_name,
+        page_name=page_name,
+        pushes_before=pushes_before,
+        pushes_after=pushes_after,
+        pushlog_project=pushlog_project,
+        )
+
+    #The pushes around the revision change with data for any revision,
+    #so this is invalidated with the project
     return HttpResponse(
-        json.dumps(testdata.get_metrics_pushlog(
+        response_cache.get_json(
             project,
-            branch,
-            revision,
-            product_name=product_name,
-            os_name=os_name,
-            os_version=os_version,
-            branch_version=branch_version,
-            processor=processor,
-            build_type=build_type,
-            test_name=test_name,
-            page_name=page_name,
-            pushes_before=pushes_before,
-            pushes_after=pushes_after,
-            pushlog_project=pushlog_project
-            )),
+            'metrics_pushlog',
+            params,
+            lambda: testdata.get_metrics_pushlog(project, **params),
+            ),
         content_type=API_CONTENT_TYPE,
         )
 
@@ -275,6 +298,9 @@ def get_data_all_dimensions(request, project=""):
 
     end_time = request.GET.get('stop')
 
+    #format=compact lists the column names once and every row as a list
+    compact = request.GET.get('format') == 'compact'
+
     if not product:
         return HttpResponse(REQUIRE_PRODUCT_NAME, status=400)
 
@@ -285,12 +311,30 @@ def get_data_all_dimensions(request, project=""):
         #Require at least os
         return HttpResponse(REQUIRE_OS_OR_TEST_NAME, status=400)
 
-    data = testdata.get_test_data_all_dimensions(
-        project, product, branch, os, os_version, test, page,
-        start_time, end_time)
+    params = dict(
+        product=product,
+        branch=branch,
+        os=os,
+        os_version=os_version,
+        test=test,
+        page=page,
+        start_time=start_time,
+        stop_time=end_time,
+        compact=compact,
+        )
 
+    #The rows are streamed to the client as they are read, a long
+    #time range can be too many of them to hold in memory
     return HttpResponse(
-        json.dumps(data), content_type=API_CONTENT_TYPE)
+        response_cache.get_json_iter(
+            project,
+            'data_all_dimensions',
+            params,
+            lambda: testdata.iter_test_data_all_dimensions_json(
+                project, **params),
+            ),
+        content_type=API_CONTENT_TYPE,
+        )
 
 def get_platforms_and_tests(request, project=""):
 
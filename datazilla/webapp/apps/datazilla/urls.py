@@ -9,6 +9,9 @@ urlpatterns = patterns('',
                        #Loads JSON object into objectstore
                        (r'^load_test/?$', views.set_test_data),
 
+                       #Loads many JSON objects into objectstore at once
+                       (r'^load_test/bulk/?$', views.set_test_data_bulk),
+
                        #return reference data
                        (r'^refdata/', include(
                             "datazilla.webapp.apps.datazilla.refdata.urls"
@@ -1,4 +1,6 @@
+import base64
 import datetime
+import hashlib
 import json
 import urllib
 import zlib
@@ -37,52 +39,100 @@ def oauth_required(func):
         if project in ['talos', 'views']:
             return func(request, *args, **kwargs)
 
-        dm = PerformanceTestModel(project)
+        error_response = _verify_oauth(
+            request, project, request.REQUEST, request.build_absolute_uri())
 
-        #Get the consumer key
-        key = request.REQUEST.get('oauth_consumer_key', None)
+        if error_response:
+            return error_response
 
-        if key is None:
-            result = {"status": "No OAuth credentials provided."}
-            return HttpResponse(
-                json.dumps(result), content_type=APP_JS, status=403)
+        return func(request, *args, **kwargs)
 
-        try:
-            #Get the consumer secret stored with this key
-            ds_consumer_secret = dm.get_oauth_consumer_secret(key)
-        except DatasetNotFoundError:
-            result = {"status": "Unknown project '%s'" % project}
-            return HttpResponse(
-                json.dumps(result), content_type=APP_JS, status=404)
+    return _wrap_oauth
+
+def oauth_body_hash_required(func):
+    """
+    Decorator for views that take a raw request body, the OAuth parameters
+    are passed in the query string.
 
-        #Construct the OAuth request based on the django request object
-        req_obj = oauth.Request(request.method,
-                                request.build_absolute_uri(),
-                                request.REQUEST,
-                                '',
-                                False)
+    The body is covered by the signature through the oauth_body_hash
+    parameter, the base64 encoded SHA-1 digest of the body as it was
+    sent.  A request whose body doesn't match its hash is rejected.
+    """
+    def _wrap_oauth(request, *args, **kwargs):
+        project = kwargs.get('project', None)
 
-        server = oauth.Server()
+        #the query string is already part of the parameters
+        error_response = _verify_oauth(
+            request, project, request.GET,
+            request.build_absolute_uri(request.path))
 
-        #Get the consumer object
-        cons_obj = oauth.Consumer(key, ds_consumer_secret)
+        if error_response:
+            return error_response
 
-        #Set the signature method
-        server.add_signature_method(oauth.SignatureMethod_HMAC_SHA1())
+        body_hash = base64.b64encode(hashlib.sha1(request.body).digest())
 
-        try:
-            #verify oauth django request and consumer object match
-            server.verify_request(req_obj, cons_obj, None)
-        except oauth.Error:
-            status = 403
-            result = {"status": "Oauth verification error."}
+        if request.GET.get('oauth_body_hash', None) != body_hash:
+            result = {"status": "Oauth body hash mismatch."}
             return HttpResponse(
-                json.dumps(result), content_type=APP_JS, status=status)
+                json.dumps(result), content_type=APP_JS, status=403)
 
         return func(request, *args, **kwargs)
 
     return _wrap_oauth
 
+def _verify_oauth(request, project, parameters, uri):
+    """
+    Verify the OAuth signature of ``parameters`` and ``uri``.
+
+    Returns the error response to send, or None if the request is signed
+    by the consumer of ``project``.  The model of the project is then
+    handed to the view as ``request.ptm``.
+    """
+    dm = PerformanceTestModel(project)
+
+    #Get the consumer key
+    key = parameters.get('oauth_consumer_key', None)
+
+    if key is None:
+        result = {"status": "No OAuth credentials provided."}
+        return HttpResponse(
+            json.dumps(result), content_type=APP_JS, status=403)
+
+    try:
+        #Get the consumer secret stored with this key
+        ds_consumer_secret = dm.get_oauth_consumer_secret(key)
+    except DatasetNotFoundError:
+        result = {"status": "Unknown project '%s'" % project}
+        return HttpResponse(
+            json.dumps(result), content_type=APP_JS, status=404)
+
+    #Construct the OAuth request based on the django request object
+    req_obj = oauth.Request(request.method,
+                            uri,
+                            parameters,
+                            '',
+                            False)
+
+    server = oauth.Server()
+
+    #Get the consumer object
+    cons_obj = oauth.Consumer(key, ds_consumer_secret)
+
+    #Set the signature method
+    server.add_signature_method(oauth.SignatureMethod_HMAC_SHA1())
+
+    try:
+        #verify oauth django request and consumer object match
+        server.verify_request(req_obj, cons_obj, None)
+    except oauth.Error:
+        status = 403
+        result = {"status": "Oauth verification error."}
+        return HttpResponse(
+            json.dumps(result), content_type=APP_JS, status=status)
+
+    #the view can go on with the model of the project
+    request.ptm = dm
+
 @oauth_required
 def set_test_data(request, project=""):
     """
@@ -126,7 +176,7 @@ def set_test_data(request, project=""):
             }
 
         try:
-            dm = PerformanceTestModel(project)
+            dm = _get_ptm(request, project)
 
             dm.pre_process_data(unquoted_json_data, deserialized_json)
 
@@ -150,6 +200,142 @@ def set_test_data(request, project=""):
 
     return HttpResponse(json.dumps(result), mimetype=APP_JS, status=status)
 
+@oauth_body_hash_required
+def set_test_data_bulk(request, project=""):
+    """
+    Post many JSON blobs of data for the specified project at once.
+
+    The body is a JSON array of test runs or newline delimited JSON, one
+    test run per line, and can be gzip encoded.  Only the structure of
+    the body is checked here, all blobs are stored in the objectstore
+    with one transaction and validated when they are processed.
+
+    """
+    status = 400
+
+    body = request.body
+
+    if request.META.get('HTTP_CONTENT_ENCODING', '') == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(
+                body, settings.DATAZILLA_BULK_LOAD_MAX_SIZE + 1)
+        except zlib.error as e:
+            result = {"status": "Malformed gzip body", "message": str(e)}
+            return HttpResponse(
+                json.dumps(result), mimetype=APP_JS, status=status)
+
+        # a body cut off at the size limit is rejected as too large below
+        if not decompressor.unconsumed_tail and \
+           not _is_gzip_stream_ended(decompressor):
+            result = {
+                "status": "Malformed gzip body",
+                "message": "Truncated gzip stream",
+                }
+            return HttpResponse(
+                json.dumps(result), mimetype=APP_JS, status=status)
+
+    if len(body) > settings.DATAZILLA_BULK_LOAD_MAX_SIZE:
+        result = {
+            "status": "Body too large",
+            "message": "Limit is {0} bytes".format(
+                settings.DATAZILLA_BULK_LOAD_MAX_SIZE),
+            }
+        return HttpResponse(json.dumps(result), mimetype=APP_JS, status=413)
+
+    try:
+        json_blobs = _get_bulk_json_blobs(body)
+    except ValueError as e:
+        result = {"status": "Malformed JSON", "message": str(e)}
+        return HttpResponse(json.dumps(result), mimetype=APP_JS, status=status)
+
+    if not json_blobs:
+        result = {"status":"No POST data found"}
+        return HttpResponse(json.dumps(result), mimetype=APP_JS, status=status)
+
+    dm = None
+    try:
+        dm = _get_ptm(request, project)
+
+        ids = dm.store_test_data_bulk(json_blobs)
+    except Exception as e:
+        status = 500
+        result = {"status": "Unknown error", "message": str(e)}
+    else:
+        status = 200
+        result = {
+            "status": "well-formed JSON stored",
+            "size": len(body),
+            "count": len(ids),
+            "ids": ids,
+            }
+    finally:
+        if dm is not None:
+            dm.disconnect()
+
+    return HttpResponse(json.dumps(result), mimetype=APP_JS, status=status)
+
+def _is_gzip_stream_ended(decompressor):
+    """
+    Return True if ``decompressor`` read the end of its gzip stream.
+
+    Decompress objects have no ``eof`` attribute before python 3.3.  Once
+    the end of the stream was read further input is only collected in
+    ``unused_data``, any other input is taken for more compressed data.
+
+    """
+    probe = '\0'
+    try:
+        decompressor.decompress(probe)
+    except zlib.error:
+        return False
+
+    return decompressor.unused_data.endswith(probe)
+
+def _get_ptm(request, project):
+    """Return the model oauth_required checked the request with, or a new one."""
+    return getattr(request, 'ptm', None) or PerformanceTestModel(project)
+
+def _get_bulk_json_blobs(body):
+    """
+    Split the body of a bulk upload into the JSON blobs of its test runs.
+
+    Raises ValueError if the body isn't a JSON array of objects or lines
+    that each hold a JSON object.  The objects of newline delimited JSON
+    are passed on as they are, process_objects reports the malformed ones.
+
+    """
+    if body.lstrip().startswith('['):
+
+        try:
+            items = json.loads(body)
+        except ValueError as e:
+            raise ValueError("Malformed JSON: {0}".format(e.message))
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise ValueError(
+                    "Item {0} is not a JSON object".format(index))
+
+        return [ json.dumps(item) for item in items ]
+
+    json_blobs = []
+
+    for index, line in enumerate(body.splitlines()):
+
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if not (line.startswith('{') and line.endswith('}')):
+            raise ValueError(
+                "Line {0} is not a JSON object".format(index + 1))
+
+        json_blobs.append(line)
+
+    return json_blobs
+
 def homepage(request, project=""):
 
     #####
@@ -0,0 +1,62 @@
+"""
+Tests for management command to run the objectstore worker.
+
+"""
+import pytest
+
+from django.core.management import call_command
+
+from datazilla.controller.admin.objectstore import get_loadlimit
+
+from ..sample_data import perftest_json
+
+
+def call_objectstore_worker(*args, **kwargs):
+    call_command("objectstore_worker", *args, **kwargs)
+
+
+def test_no_args(capsys):
+    """Shows need for a project name."""
+    with pytest.raises(SystemExit):
+        call_objectstore_worker()
+
+    exp = (
+        "",
+        "Error: You must provide either a project or cron_batch value.\n",
+        )
+
+    assert capsys.readouterr() == exp
+
+
+def test_single_pass(ptm, plm, capsys):
+    """One pass over the project loads its objectstore backlog."""
+    blobs = [
+        perftest_json(testrun={"date": "1330454755"}),
+        perftest_json(testrun={"date": "1330454756"}),
+        perftest_json(testrun={"date": "1330454757"}),
+        ]
+
+    for blob in blobs:
+        ptm.store_test_data(blob)
+
+    assert ptm.get_objectstore_backlog(10) == 3
+
+    call_objectstore_worker(
+        projects=[ptm.project],
+        pushlog_project=plm.project,
+        max_passes=1,
+        )
+
+    complete_count = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    assert complete_count == 3
+    assert ptm.get_objectstore_backlog(10) == 0
+    assert "Worker stopped after 1 passes." in capsys.readouterr()[0]
+
+
+def test_get_loadlimit():
+    """The claim follows the backlog within the min and max bounds."""
+    assert get_loadlimit(0, 5, 200) == 5
+    assert get_loadlimit(42, 5, 200) == 42
+    assert get_loadlimit(1000, 5, 200) == 200
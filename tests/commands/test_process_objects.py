@@ -4,12 +4,11 @@ Tests for management command to process objects.
 """
 import pytest
 import json
-import urllib
 
 from datazilla.model.base import TestData
 
 from ..sample_data import perftest_data
-from ..sample_pushlog import get_pushlog_json_set, get_pushlog_json_readable
+from ..sample_pushlog import get_pushlog_json_set, pushlog_server
 
 from django.core.management import call_command
 from datazilla.model import PerformanceTestModel
@@ -36,7 +35,7 @@ def test_successful_populate(monkeypatch, ptm, plm):
     """Successful populate_test_collections."""
 
     calls = []
-    def mock_process(justme, project):
+    def mock_process(justme, project, batch=False, group_commit=1):
         calls.append(project)
     monkeypatch.setattr(PerformanceTestModel, "process_objects", mock_process)
 
@@ -49,16 +48,12 @@ def test_successful_populate(monkeypatch, ptm, plm):
     assert set(calls) == set([25])
 
 
-def test_object_transfer(ptm, plm, mtm, monkeypatch):
+def test_object_transfer(ptm, plm, mtm):
 
     test_revisions = []
 
-    #Prepare pushlog
-    def mock_urlopen(nuttin_honey):
-        return get_pushlog_json_readable(get_pushlog_json_set())
-    monkeypatch.setattr(urllib, 'urlopen', mock_urlopen)
-
-    result = plm.store_pushlogs("test_host", 1, branch="Firefox")
+    with pushlog_server(get_pushlog_json_set()) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
     pl = plm.get_branch_pushlog(1)
 
     fail_index = 3
@@ -123,7 +118,7 @@ def test_no_load(monkeypatch, plm, ptm):
     """Successful populate_test_collections."""
 
     calls = []
-    def mock_process(justme, loadlimit):
+    def mock_process(justme, loadlimit, batch=False, group_commit=1):
         calls.append(loadlimit)
     monkeypatch.setattr(
         PerformanceTestModel, "process_objects", mock_process
@@ -135,3 +130,21 @@ def test_no_load(monkeypatch, plm, ptm):
     )
 
     assert set(calls) == set([1])
+
+
+def test_workers(ptm, plm):
+    """Each worker process loads its own claim of the objectstore."""
+    for date in ["1330454755", "1330454756", "1330454757"]:
+        ptm.store_test_data(json.dumps(perftest_data(testrun={"date": date})))
+
+    call_process_objects(
+        project=ptm.project,
+        pushlog_project=plm.project,
+        loadlimit=2,
+        workers=2,
+        )
+
+    complete_count = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    assert complete_count == 3
@@ -57,7 +57,9 @@ def test_bad_numdays(capsys):
 def test_successful_store(plm, capsys, monkeypatch):
     """Successful storage of pushlog data."""
 
-    def mock_store_pushlogs(nothing, repo_host, numdays, hours, enddate, branch):
+    def mock_store_pushlogs(
+        nothing, repo_host, numdays, hours, enddate, branch, workers=None,
+        incremental=True):
         return {
             "branches": 1,
             "pushlogs_stored": 3,
@@ -100,17 +100,20 @@ def pytest_runtest_setup(item):
     database changes made to Django ORM models from persisting between tests,
     providing test isolation.
 
-    Also clear the cache (by incrementing the key prefix).
+    Also clear the cache (by incrementing the key prefix), and the
+    datasource index, datasources created by a test are rolled back.
 
     """
     from django.test.testcases import disable_transaction_methods
     from django.db import transaction
+    from datazilla.model.sql.models import datasource_index
 
     transaction.enter_transaction_management()
     transaction.managed(True)
     disable_transaction_methods()
 
     increment_cache_key_prefix()
+    datasource_index.clear()
 
 
 
@@ -143,6 +146,17 @@ def truncate(ptm, skip_list=None):
     """
     ptm.disconnect()
 
+    # cached reference ids don't survive the truncation
+    from datazilla.model import PerformanceTestModel
+    PerformanceTestModel.clear_ref_id_caches()
+    from datazilla.model import PushLogModel
+    PushLogModel.clear_pushlog_indexes()
+    PushLogModel.clear_node_cache()
+
+    # so are responses cached in process
+    from datazilla.model.response_cache import response_cache
+    response_cache.clear()
+
     skip_list = set(skip_list or [])
     from django.conf import settings
     import MySQLdb
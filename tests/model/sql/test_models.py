@@ -83,6 +83,62 @@ def test_datasource_cache_invalidated(DataSource):
     assert len(DataSource.objects.cached()) == len(initial) + 1
 
 
+def test_datasource_index(DataSource, monkeypatch):
+    """Resolving datasources doesn't fetch the cached list every time."""
+    from datazilla.model.sql.models import SQLDataSource
+
+    ds = create_datasource(DataSource, project="indexed")
+
+    calls = []
+    cached = DataSource.objects.cached
+    def counting_cached():
+        calls.append(1)
+        return cached()
+    monkeypatch.setattr(DataSource.objects, "cached", counting_cached)
+
+    for i in range(3):
+        assert SQLDataSource("indexed", "perftest").datasource.pk == ds.pk
+
+    assert len(calls) == 1
+
+
+def test_datasource_index_invalidated(DataSource):
+    """A new dataset is resolved as soon as it's saved."""
+    from datazilla.model.sql.models import SQLDataSource
+
+    create_datasource(DataSource, project="indexed", dataset=1)
+    assert SQLDataSource("indexed", "perftest").datasource.dataset == 1
+
+    create_datasource(DataSource, project="indexed", dataset=2)
+    assert SQLDataSource("indexed", "perftest").datasource.dataset == 2
+
+
+def test_datasource_index_version(DataSource):
+    """The index is rebuilt once another process bumped the stamp."""
+    from django.core.cache import cache
+    from datazilla.model.sql.models import (
+        SQLDataSource, SOURCES_CACHE_KEY, SOURCES_VERSION_KEY,
+        datasource_index)
+
+    ds = create_datasource(DataSource, project="indexed", dataset=1)
+    assert SQLDataSource("indexed", "perftest").datasource.dataset == 1
+
+    # another process saves the next dataset, bypassing this process
+    DataSource.objects.bulk_create([ DataSource(
+        project="indexed", dataset=2, contenttype="perftest",
+        host=ds.host, type=ds.type, name="indexed_perftest_2",
+        creation_date=datetime.datetime.now(),
+        ) ])
+    cache.delete(SOURCES_CACHE_KEY)
+    cache.incr(SOURCES_VERSION_KEY)
+
+    # the index is trusted until the ttl is up
+    assert SQLDataSource("indexed", "perftest").datasource.dataset == 1
+
+    datasource_index.checked = 0
+    assert SQLDataSource("indexed", "perftest").datasource.dataset == 2
+
+
 def test_create_next_dataset(ptm, DataSource):
     """Creating the next dataset keeps all the important fields."""
 
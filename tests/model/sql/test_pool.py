@@ -0,0 +1,81 @@
+from datazilla.model.sql.pool import ConnectionPool
+
+
+class Connection(object):
+    """Stand in for a MySQLdb connection."""
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+
+    def ping(self):
+        import MySQLdb
+        if not self.alive:
+            raise MySQLdb.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+def get_connection_id(model, contenttype):
+    return model.sources[contenttype].dhub.execute(
+        sql="SELECT CONNECTION_ID() AS 'id'",
+        return_type='tuple',
+        )[0]['id']
+
+
+def test_pool_size():
+    """Connections returned to a full pool are closed."""
+    pool = ConnectionPool(2)
+    key = ("localhost", "db", "master_host")
+
+    connections = [ Connection() for i in range(3) ]
+    for con in connections:
+        pool.put(key, con)
+
+    assert [ con.closed for con in connections ] == [False, False, True]
+
+    assert pool.get(key) is connections[1]
+    assert pool.get(key) is connections[0]
+    assert pool.get(key) is None
+    assert pool.get(("localhost", "other_db", "master_host")) is None
+
+
+def test_pool_discards_dead():
+    """An idle connection that doesn't answer the ping is closed and skipped."""
+    pool = ConnectionPool(2)
+    key = ("localhost", "db", "master_host")
+
+    alive = Connection()
+    dead = Connection(alive=False)
+    pool.put(key, alive)
+    pool.put(key, dead)
+
+    assert pool.get(key) is alive
+    assert dead.closed
+
+
+def test_pool_forked():
+    """A pool used from a forked process doesn't hand out the parent's."""
+    pool = ConnectionPool(2)
+    key = ("localhost", "db", "master_host")
+    con = Connection()
+
+    pool.put(key, con)
+    pool.pid = -1
+
+    assert pool.get(key) is None
+    assert not con.closed
+
+
+def test_connection_reused(ptm):
+    """A new model reuses the connection a disconnected model returned."""
+    from datazilla.model import PerformanceTestModel
+
+    connection_id = get_connection_id(ptm, "perftest")
+    ptm.disconnect()
+
+    ptm2 = PerformanceTestModel(ptm.project)
+
+    assert get_connection_id(ptm2, "perftest") == connection_id
+
+    ptm2.disconnect()
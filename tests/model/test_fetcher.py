@@ -0,0 +1,44 @@
+from datazilla.model.fetcher import HttpFetcher, FetchError
+
+from ..sample_pushlog import pushlog_server
+
+
+def test_fetch_keep_alive():
+    """A single worker fetches every url over one connection."""
+    fetcher = HttpFetcher(workers=1)
+
+    with pushlog_server('{"one": 1}') as server:
+        urls = [
+            (i, "{0}/branch{1}/json-pushes?full=1".format(server.repo_host, i))
+            for i in range(5)
+            ]
+
+        results = sorted(fetcher.fetch(urls))
+
+    assert results == [ (i, '{"one": 1}', None) for i in range(5) ]
+    assert len(server.clients) == 1
+
+
+def test_fetch_error():
+    """Client errors are reported without retrying, server errors retried."""
+    fetcher = HttpFetcher(workers=2, retries=2, backoff=0)
+
+    responses = {
+        "missing": [ (404, "") ],
+        "broken": [ (500, "") ],
+        }
+
+    with pushlog_server("{}", responses) as server:
+        urls = [
+            (uri, "{0}/{1}/json-pushes".format(server.repo_host, uri))
+            for uri in [ "missing", "broken" ]
+            ]
+
+        results = dict(
+            (key, error) for key, body, error in fetcher.fetch(urls))
+
+    assert isinstance(results["missing"], FetchError)
+    assert results["missing"].reason == "HTTP 404 Not Found"
+    assert results["broken"].reason == "HTTP 500 Internal Server Error"
+    assert sorted(server.requests) == [ "/broken/json-pushes" ] * 3 + [
+        "/missing/json-pushes" ]
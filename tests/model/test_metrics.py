@@ -54,3 +54,86 @@ def test_ttest_nan():
     else:
         raise Exception('Failed to raise MetricMethodError')
 
+
+
+def test_get_replicate_stats():
+    """Statistics are computed per group of replicates."""
+    from datazilla.model.metrics import get_replicate_stats
+
+    stats = get_replicate_stats([ [3, 1, 2], [5], [4, 10, 2, 8] ])
+
+    assert list(stats['n']) == [3, 1, 4]
+    assert list(stats['mean']) == [2.0, 5.0, 6.0]
+    assert list(stats['median']) == [2.0, 5.0, 6.0]
+    assert list(stats['min']) == [1.0, 5.0, 2.0]
+    assert list(stats['max']) == [3.0, 5.0, 10.0]
+    assert round(stats['std'][0], 4) == 0.8165
+    assert stats['std'][1] == 0
+
+
+def test_welchs_ttest_many():
+    """The vectorized t-test matches welchs_ttest for every pair."""
+    from dzmetrics.ttest import welchs_ttest
+    from datazilla.model.metrics import get_replicate_stats, welchs_ttest_many
+
+    child = [ [10, 12, 11, 13], [5.5, 6.1, 5.9], [100, 98, 103, 99, 101] ]
+    parent = [ [9, 10, 9.5, 10.5], [6.2, 6.0, 6.4], [101, 99, 100, 102] ]
+
+    c = get_replicate_stats(child, ddof=1)
+    p = get_replicate_stats(parent, ddof=1)
+
+    p_values = welchs_ttest_many(
+        c['n'], c['std'], c['mean'], p['n'], p['std'], p['mean']
+        )
+
+    for i in range(len(child)):
+        assert round(p_values[i], 8) == round(
+            welchs_ttest(child[i], parent[i])['p'], 8
+            )
+
+
+def test_rejector_many():
+    """Every group is controlled like a separate rejector call."""
+    from dzmetrics.fdr import rejector
+    from datazilla.model.metrics import rejector_many
+
+    groups = [
+        [0.001, 0.04, 0.03, 0.5],
+        [0.2],
+        [0.01, 0.011, 0.9, 0.0001, 0.6],
+        ]
+
+    status = rejector_many(
+        [ p for g in groups for p in g ],
+        [ i for i, g in enumerate(groups) for p in g ]
+        )
+
+    expected = [ s for g in groups for s in rejector(g)['status'] ]
+
+    assert list(status) == expected
+
+
+def test_run_metric_method_many():
+
+    metric_collection_data = get_metric_collection_data()
+
+    tm = TtestMethod(metric_collection_data['initialization_data'])
+
+    data = [
+        ( [10, 12, 11, 13], [9, 10, 9.5, 10.5], {} ),
+        ( [6, 6, 6, 6], [6, 6, 6, 6], {} ),
+        ( [5.5, 6.1, 5.9], [6.2, 6.0, 6.4],
+          { 'trend_mean':6.3, 'trend_stddev':0.2 } ),
+        ]
+
+    results = tm.run_metric_method_many(data)
+
+    #the stddev of 0 generates a nan, see test_ttest_nan
+    assert isinstance(results[1], MetricMethodError)
+
+    for i in (0, 2):
+        expected = tm.run_metric_method(*data[i])
+
+        for key in expected:
+            assert round(float(results[i][key]), 8) == \
+                round(float(expected[key]), 8)
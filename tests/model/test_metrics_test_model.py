@@ -2,13 +2,13 @@ import json
 import os
 import datetime
 import copy
-import urllib
 import time
 
 from datazilla.model.base import TestData
+from datazilla.model.pushlog_index import PushLogIndex
 
 from ..sample_data import perftest_data
-from ..sample_pushlog import get_pushlog_json_set, get_pushlog_json_readable
+from ..sample_pushlog import get_pushlog_json_set, pushlog_server
 
 from ..sample_metric_data import (
     get_metrics_key_data, get_metrics_summary_key_data,
@@ -563,6 +563,57 @@ def test_get_parent_test_data_case_four(mtm, ptm, plm, monkeypatch):
     assert parent_data['ref_data'] == \
         reference_data[test_four_key]['ref_data']
 
+def test_get_parent_test_data_windows(mtm, ptm, plm, monkeypatch):
+
+    #########
+    # The parent is the same when the candidate pushes are read in windows
+    # smaller than the walk, and pushes without data are marked in the
+    # skip bitmap of the pushlog index.
+    #########
+    setup_data = setup_pushlog_walk_tests(mtm, ptm, plm, monkeypatch)
+
+    monkeypatch.setattr(mtm, 'PARENT_WINDOW_SIZE', 1)
+
+    skip_index = setup_data['skip_index']
+    sample_revisions = setup_data['sample_revisions']
+    pushlog = PushLogIndex(setup_data['branch_pushlog'])
+
+    child_data = mtm.get_test_values_by_revision(
+        sample_revisions[skip_index + 1])
+    child_key = child_data.keys()[0]
+
+    parent_data, results = mtm.get_parent_test_data(
+        pushlog, skip_index + 1, child_key,
+        child_data[child_key]['ref_data'], None
+        )
+
+    reference_data = mtm.get_test_values_by_revision(
+        sample_revisions[skip_index - 1])
+
+    assert parent_data['ref_data'] == \
+        reference_data[child_key]['ref_data']
+
+    skip = mtm.push_skip_bitmaps[pushlog][child_key]
+    assert skip.nonzero()[0].tolist() == [skip_index]
+
+def test_get_test_values_by_revisions(mtm, ptm, plm, monkeypatch):
+    """Test values of several revisions match those read one at a time."""
+    setup_data = setup_pushlog_walk_tests(mtm, ptm, plm, monkeypatch)
+
+    revisions = setup_data['sample_revisions']
+
+    ref_data = mtm.get_test_values_by_revision(revisions[0]).values()[0][
+        'ref_data']
+
+    data = mtm.get_test_values_by_revisions(revisions, ref_data)
+
+    assert setup_data['skip_revision'] not in data
+    assert len(data) == len(revisions) - 1
+
+    for revision in data:
+        assert data[revision] == mtm.get_test_values_by_revision(
+            revision, ref_data)
+
 def test_get_metrics_data_from_test_run_ids(mtm, ptm, plm, monkeypatch):
 
     setup_data = setup_pushlog_walk_tests(mtm, ptm, plm, monkeypatch, True)
@@ -744,6 +795,98 @@ def test_load_test_data_all_dimensions(mtm, ptm, plm, monkeypatch):
     ####
     assert len(test_data_all_dimensions) == 6
 
+def test_get_data_all_dimensions_stream(mtm, ptm):
+    """Streamed rows match the rows read at once, and free the cursor."""
+    for i in range(3):
+        ptm.store_test_data( json.dumps( TestData( perftest_data() ) ) )
+
+    test_run_ids = ptm.process_objects(3)
+    mtm.load_test_data_all_dimensions(test_run_ids)
+
+    data = mtm.get_data_all_dimensions("", "", "", "", "", "", "", "")
+    stream_data = mtm.get_data_all_dimensions(
+        "", "", "", "", "", "", "", "", stream=True)
+
+    rows = list(stream_data['data'])
+
+    assert len(rows) == 3
+    assert rows == list(data['data'])
+
+    # the connection is usable again once the rows have been read
+    assert mtm.get_data_all_dimensions(
+        "", "", "", "", "", "", "", "")['data'] == data['data']
+
+def test_backfill_all_dimensions(mtm, ptm, plm):
+    """Missing test runs are loaded once, the watermark is kept."""
+    for i in range(3):
+        ptm.store_test_data( json.dumps( TestData( perftest_data() ) ) )
+
+    test_run_ids = ptm.process_objects(3)
+
+    assert mtm.backfill_all_dimensions(0, plm, chunk_size=2) == 3
+
+    data = mtm.get_data_all_dimensions("", "", "", "", "", "", "", "")
+    assert sorted(set( row['ti'] for row in data['data'] )) == \
+        sorted(test_run_ids)
+
+    # lower ids may still be committed until the lag has passed
+    assert mtm.get_backfill_watermark(mtm.ALL_DIMENSIONS_WATERMARK) is None
+
+    mtm.BACKFILL_WATERMARK_LAG = 0
+
+    # nothing missing, the watermark catches up with the ids seen before
+    assert mtm.backfill_all_dimensions(0, plm, chunk_size=2) == 0
+    assert mtm.get_backfill_watermark(mtm.ALL_DIMENSIONS_WATERMARK) == \
+        max(test_run_ids)
+
+    assert mtm.backfill_all_dimensions(0, plm, restart=True) == 0
+
+def test_get_computed_stats(mtm, ptm):
+    """Statistics from loaded replicates match the test_value aggregates."""
+    for suite_name in ['tp5o', 'default']:
+        ptm.store_test_data( json.dumps( TestData( perftest_data(
+            testrun={ 'suite':suite_name }
+            ))))
+
+    test_run_ids = ptm.process_objects(2)
+    replicates = ptm.pop_loaded_replicates(test_run_ids)
+
+    assert set(replicates.keys()) == set(test_run_ids)
+    assert ptm.loaded_replicates == {}
+
+    replicate_filters = {
+        mtm.project: {
+            "tp5o": {
+                "get_computed_means":mtm.exclude_first_replicate_from_mean,
+                "skip_replicates":1,
+                "ids":[ test_run_ids[0] ]
+                },
+            },
+        "default":{
+            "test":{
+                "get_computed_means":mtm.get_mean_from_all_replicates,
+                "skip_replicates":0,
+                "ids":[ test_run_ids[1] ]
+                }
+            }
+        }
+
+    computed_stats = mtm.get_computed_stats(
+        test_run_ids, replicates, replicate_filters)
+    computed_means = mtm.get_computed_means(replicate_filters)
+
+    def summary(rows):
+        return sorted(
+            (r['test_run_id'], r['page_id'], r['test_name'], r['revision'],
+             float(r['mean']), float(r['std']), int(r['n_replicates']),
+             float(r['min']), float(r['max']))
+            for r in rows
+            )
+
+    assert summary(computed_stats) == summary(computed_means)
+    assert all(r['median'] is not None for r in computed_stats)
+
+
 def setup_pushlog_walk_tests(
     mtm, ptm, plm, monkeypatch, load_objects=False
     ):
@@ -762,13 +905,9 @@ def setup_pushlog_walk_tests(
     setup_data = {}
     now = int( time.time() )
 
-    #monkey patch in sample pushlog
-    def mock_urlopen(nuttin_honey):
-        return get_pushlog_json_readable(get_pushlog_json_set())
-    monkeypatch.setattr(urllib, 'urlopen', mock_urlopen)
-
     branch = 'Firefox'
-    result = plm.store_pushlogs("test_host", 1, branch=branch)
+    with pushlog_server(get_pushlog_json_set()) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch=branch)
 
     #load perftest data that corresponds to the pushlog data
     #store parent chain for tests
@@ -19,9 +19,19 @@ def test_disconnect(ptm):
     # establish the connection to objectstore
     ptm.retrieve_test_data(limit=1)
 
+    connections = [
+        src.dhub.connection["master_host"]["con_obj"]
+        for src in ptm.sources.itervalues()
+        ]
+
     ptm.disconnect()
-    for src in ptm.sources.itervalues():
-        assert src.dhub.connection["master_host"]["con_obj"].open == False
+
+    from datazilla.model.sql.pool import pool
+    idle = sum(pool.idle.values(), [])
+
+    for con in connections:
+        # closed, or handed back to the connection pool
+        assert (con.open == False) or (con in idle)
 
 
 def test_claim_objects(ptm):
@@ -57,6 +67,115 @@ def test_claim_objects(ptm):
     assert loading_rows == 3
 
 
+def test_claim_objects_compressed(ptm, monkeypatch):
+    """Compressed blobs are stored with their marker and claimed as JSON."""
+    from django.conf import settings
+    from datazilla.model import utils
+
+    monkeypatch.setattr(settings, "DATAZILLA_OBJECTSTORE_COMPRESSION", "zlib")
+
+    blob = perftest_json()
+    object_id = ptm.store_test_data(blob)
+
+    row_data = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.selects.row", placeholders=[object_id])[0]
+
+    assert row_data["json_blob"].startswith(utils.JSON_BLOB_ZLIB_MARKER)
+    assert len(row_data["json_blob"]) < len(blob)
+
+    assert [ r["json_blob"] for r in ptm.claim_objects(1) ] == [blob]
+
+
+def test_compress_objects(ptm):
+    """Existing blobs are compressed in chunks and still load."""
+    from datazilla.model import utils
+
+    blobs = [
+        perftest_json(testrun={"date": "1330454755"}),
+        perftest_json(testrun={"date": "1330454756"}),
+        perftest_json(testrun={"date": "1330454757"}),
+        ]
+
+    for blob in blobs:
+        ptm.store_test_data(blob)
+
+    assert ptm.compress_objects(chunk_size=2) == 3
+    # nothing left to compress
+    assert ptm.compress_objects(chunk_size=2) == 0
+
+    rows = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.selects.all")
+
+    assert [ utils.decompress_json_blob(r["json_blob"]) for r in rows ] == blobs
+
+    ptm.process_objects(3)
+
+    complete_count = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    assert complete_count == 3
+
+
+def test_claim_objects_expired(ptm, monkeypatch):
+    """Rows whose lease has expired are stolen by the next claim."""
+    from datazilla.model import PerformanceTestModel, utils
+
+    ptm.store_test_data(perftest_json())
+
+    now = 1330454755
+    monkeypatch.setattr(utils, "get_now_timestamp", lambda: now)
+
+    rows1 = ptm.claim_objects(1, lease_duration=60)
+
+    row_data = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.selects.row", placeholders=[rows1[0]["id"]])[0]
+
+    assert row_data["claim_date"] == now
+    assert row_data["lease_duration"] == 60
+    assert row_data["lease_expires"] == now + 60
+
+    dm2 = PerformanceTestModel(ptm.project)
+    # the lease of the first worker is still honored
+    assert dm2.claim_objects(1) == ()
+
+    monkeypatch.setattr(utils, "get_now_timestamp", lambda: now + 61)
+
+    rows2 = dm2.claim_objects(1)
+    dm2.disconnect()
+
+    assert [r["id"] for r in rows2] == [r["id"] for r in rows1]
+
+    # the first worker lost its claim and can no longer complete the row
+    ptm.mark_object_complete(rows1[0]["id"], 7)
+    row_data = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.selects.row", placeholders=[rows1[0]["id"]])[0]
+
+    assert row_data["processed_flag"] == "loading"
+    assert row_data["lease_expires"] == now + 61 + ptm.CLAIM_LEASE_TIMEOUT
+
+
+def test_claim_objects_expired_limit(ptm, monkeypatch):
+    """Stolen rows count against the limit of a claim."""
+    from datazilla.model import PerformanceTestModel, utils
+
+    ptm.store_test_data(perftest_json(testrun={"date": "1330454755"}))
+    ptm.store_test_data(perftest_json(testrun={"date": "1330454756"}))
+
+    now = 1330454755
+    monkeypatch.setattr(utils, "get_now_timestamp", lambda: now)
+
+    rows1 = ptm.claim_objects(1, lease_duration=60)
+
+    monkeypatch.setattr(utils, "get_now_timestamp", lambda: now + 61)
+
+    dm2 = PerformanceTestModel(ptm.project)
+    rows2 = dm2.claim_objects(1)
+    dm2.disconnect()
+
+    # only the expired row, the ready one is left for the next claim
+    assert [r["id"] for r in rows2] == [r["id"] for r in rows1]
+
+
 def test_mark_object_complete(ptm):
     """Marks claimed row complete and records run id."""
     ptm.store_test_data(perftest_json())
@@ -86,6 +205,36 @@ def test_get_or_create_test_id(ptm):
     assert second_id == first_id == inserted_id
 
 
+def test_get_or_create_test_id_cached(ptm):
+    """Second lookup of the same test is served by the reference id cache."""
+    data = TestData({'testrun': {'suite': 'talos'}})
+
+    first_id = ptm._get_or_create_test_id(data)
+    stats = ptm.get_ref_id_cache_stats()
+
+    second_id = ptm._get_or_create_test_id(data)
+    new_stats = ptm.get_ref_id_cache_stats()
+
+    assert second_id == first_id
+    assert new_stats['hits'] == stats['hits'] + 1
+    assert new_stats['misses'] == stats['misses']
+
+
+def test_ref_id_cache_warmed(ptm):
+    """A new reference id cache is warmed with the existing ids."""
+    from datazilla.model import PerformanceTestModel
+
+    test_id = ptm._get_or_create_test_id(
+        TestData({'testrun': {'suite': 'talos'}}))
+    option_id = ptm._get_or_create_option_id('option1')
+
+    PerformanceTestModel.clear_ref_id_caches()
+
+    assert ptm._get_cached_ref_id('test', ('talos', 1)) == test_id
+    assert ptm._get_cached_ref_id('option', ('option1',)) == option_id
+    assert ptm.get_ref_id_cache_stats()['misses'] == 0
+
+
 def test_adapt_production_data(ptm):
 
     data = json.loads( perftest_json( test_machine={'os':'mac', 'osversion':'OS X 10.8.2'} ) )
@@ -560,6 +709,56 @@ def test_load_test_data(ptm):
     assert len(distinct_pages) == len(data["results"])
 
 
+def test_load_test_data_rollback(ptm):
+    """A test run that fails to load leaves no rows behind."""
+    data = TestData(perftest_data(testrun={"date": "not a date"}))
+
+    with pytest.raises(TestDataError):
+        ptm.load_test_data(data)
+
+    test_run_rows = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.test_runs")
+    build_rows = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.builds")
+
+    assert len(test_run_rows) == 0
+    assert len(build_rows) == 0
+
+
+def test_process_objects_group_commit(ptm):
+    """Several blobs are loaded per transaction, bad ones are isolated."""
+    blobs = [
+        perftest_json(testrun={"date": "1330454755"}),
+        perftest_json(testrun={"date": "1330454756"}),
+        "invalid json",
+        perftest_json(testrun={"date": "1330454757"}),
+        ]
+
+    for blob in blobs:
+        ptm.store_test_data(blob)
+
+    test_run_ids = ptm.process_objects(4, group_commit=2)
+
+    test_run_rows = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.test_runs")
+    date_set = set([r['date_run'] for r in test_run_rows])
+
+    complete_count = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    error_rows = [
+        r for r in ptm.sources["objectstore"].dhub.execute(
+            proc="objectstore_test.selects.all")
+        if r['error_flag'] == 'Y'
+        ]
+
+    assert len(test_run_ids) == 3
+    assert complete_count == 3
+    assert date_set == set([1330454755, 1330454756, 1330454757])
+    assert len(error_rows) == 1
+    assert error_rows[0]['json_blob'] == "invalid json"
+
+
 def test_process_objects(ptm):
     """Claims and processes a chunk of unprocessed JSON test data blobs."""
     # Load some rows into the objectstore
@@ -591,6 +790,110 @@ def test_process_objects(ptm):
     assert len(date_set) == 2
 
 
+def test_load_test_data_batch(ptm):
+    """Loads a list of TestData instances and returns their test_run_ids."""
+    data_list = [
+        TestData(perftest_data(testrun={"date": "1330454755"})),
+        TestData(perftest_data(testrun={"date": "1330454756"})),
+        ]
+
+    test_run_ids = ptm.load_test_data_batch(data_list)
+
+    assert len(test_run_ids) == 2
+
+    for data, test_run_id in zip(data_list, test_run_ids):
+        test_run_data = ptm.sources["perftest"].dhub.execute(
+            proc="perftest_test.selects.test_run",
+            placeholders=[test_run_id])[0]
+
+        value_rows = ptm.sources["perftest"].dhub.execute(
+            proc="perftest_test.selects.test_values",
+            placeholders=[test_run_id],
+            )
+        distinct_pages = set([r['page_id'] for r in value_rows])
+
+        assert test_run_data["revision"] == data["test_build"]["revision"]
+        assert test_run_data["date_run"] == int(data["testrun"]["date"])
+        assert len(distinct_pages) == len(data["results"])
+
+
+def test_load_test_data_batch_shares_reference_data(ptm):
+    """Reference rows are shared with the row at a time loader."""
+    data = TestData(perftest_data())
+    test_id = ptm._get_or_create_test_id(data)
+
+    test_run_id = ptm.load_test_data_batch([TestData(perftest_data())])[0]
+
+    test_run_data = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.test_run", placeholders=[test_run_id])[0]
+
+    assert test_run_data["test_id"] == test_id
+
+
+def test_load_test_data_batch_collation(ptm):
+    """Reference rows are found the way the key column's collation compares."""
+    test_run_id = ptm.load_test_data(TestData(perftest_data(
+        test_build={"id": "20120228122102"},
+        test_machine={"platform": "x86_64"},
+        )))
+
+    # build keys compare case-insensitively and ignore trailing spaces
+    batch_ids = ptm.load_test_data_batch([
+        TestData(perftest_data(
+            testrun={"date": "1330454756"},
+            test_build={"id": "20120228122102"},
+            test_machine={"platform": "X86_64 "},
+            )),
+        TestData(perftest_data(
+            testrun={"date": "1330454757"},
+            test_build={"id": "20120228122102"},
+            test_machine={"platform": "x86_64"},
+            )),
+        ])
+
+    build_ids = [
+        ptm.sources["perftest"].dhub.execute(
+            proc="perftest_test.selects.test_run",
+            placeholders=[ run_id ])[0]["build_id"]
+        for run_id in [ test_run_id ] + batch_ids
+        ]
+
+    assert len(set(build_ids)) == 1
+
+
+def test_process_objects_batch(ptm):
+    """Claims and processes a chunk of JSON blobs in one batch."""
+    blobs = [
+        perftest_json(testrun={"date": "1330454755"}),
+        perftest_json(testrun={"date": "1330454756"}),
+        "invalid json",
+        ]
+
+    for blob in blobs:
+        ptm.store_test_data(blob)
+
+    test_run_ids = ptm.process_objects(3, batch=True)
+
+    test_run_rows = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.test_runs")
+    date_set = set([r['date_run'] for r in test_run_rows])
+
+    complete_count = ptm.sources["objectstore"].dhub.execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    error_rows = [
+        r for r in ptm.sources["objectstore"].dhub.execute(
+            proc="objectstore_test.selects.all")
+        if r['error_flag'] == 'Y'
+        ]
+
+    assert len(test_run_ids) == 2
+    assert complete_count == 2
+    assert date_set == set([1330454755, 1330454756])
+    assert len(error_rows) == 1
+    assert error_rows[0]['json_blob'] == "invalid json"
+
+
 def test_process_objects_invalid_json(ptm):
     ptm.store_test_data("invalid json")
     row_id = ptm._get_last_insert_id("objectstore")
@@ -628,6 +931,194 @@ def test_process_objects_unknown_error(ptm, monkeypatch):
     assert row_data['processed_flag'] == 'ready'
 
 
+def test_get_b2g_value_summaries(ptm):
+    """Replicates are summarized per revision, test, page and device."""
+    def row(test_run_id, page_id, value, type='unagi'):
+        return {
+            'test_run_id':test_run_id, 'page_id':page_id,
+            'revision':'785345035a3b', 'gecko_revision':None,
+            'build_revision':'b1', 'test_id':1, 'date_run':1000 + test_run_id,
+            'product_id':2, 'operating_system_id':3, 'type':type,
+            'url':'page{0}'.format(page_id), 'branch':'master', 'value':value,
+            }
+
+    rows = [
+        row(1, 1, 4), row(1, 1, 1), row(1, 2, 10),
+        row(2, 1, 2), row(2, 1, 3), row(3, 1, 7, type='otoro'),
+        ]
+
+    summaries = ptm._get_b2g_value_summaries(rows)
+
+    assert summaries == [
+        [
+            '785345035a3b', '', 'b1', 1, 1, 'page1', 'otoro', 'master',
+            2, 3, 3, 1003, 7.0, 7.0, 7.0, 0.0, 7.0, 1
+            ],
+        [
+            '785345035a3b', '', 'b1', 1, 1, 'page1', 'unagi', 'master',
+            2, 3, 2, 1002, 2.5, 1.0, 4.0, 1.25 ** 0.5, 2.5, 4
+            ],
+        [
+            '785345035a3b', '', 'b1', 1, 2, 'page2', 'unagi', 'master',
+            2, 3, 1, 1001, 10.0, 10.0, 10.0, 0.0, 10.0, 1
+            ],
+        ]
+
+
+def test_get_b2g_value_summary_by_test_ids(ptm, monkeypatch):
+    """Summary rows match the rows of the replicate aggregation they replace."""
+    replicates = {
+        # (revision, test_id, url, type): values
+        ('785345035a3b', 1, 'page1', 'unagi'): [ 4, 1, 2, 3 ],
+        ('785345035a3b', 1, 'page1', 'otoro'): [ 7, 5.5 ],
+        ('9d3ecf1b79c4', 1, 'page1', 'unagi'): [ 10, 2.5, 3 ],
+        }
+
+    rows = []
+    for (revision, test_id, url, type), values in sorted(replicates.items()):
+        for value in values:
+            rows.append({
+                'test_run_id':len(rows) + 1, 'page_id':1,
+                'revision':revision, 'gecko_revision':None,
+                'build_revision':'b1', 'test_id':test_id,
+                'date_run':1000 + len(rows), 'product_id':2,
+                'operating_system_id':3, 'type':type, 'url':url,
+                'branch':'master', 'value':value,
+                })
+
+    # the b2g_value_summary rows as get_b2g_value_summary_by_test_id
+    # reads them
+    summary_rows = []
+    for summary in ptm._get_b2g_value_summaries(rows):
+        (revision, gecko_revision, build_revision, test_id, page_id, url,
+            machine_type, branch, product_id, operating_system_id,
+            test_run_id, date_run, avg, min, max, std, median,
+            n_replicates) = summary
+        summary_rows.append({
+            'revision':revision, 'test_id':test_id, 'url':url,
+            'type':machine_type, 'avg':round(avg, 0), 'min':round(min, 0),
+            'max':round(max, 0), 'std':round(std, 0), 'median':median,
+            })
+
+    monkeypatch.setattr(
+        ptm.sources["perftest"].dhub, "execute",
+        lambda **kwargs: summary_rows)
+
+    data = ptm.get_b2g_value_summary_by_test_ids(
+        'master', 'unagi', [1], 'page1', 1, 2)
+
+    # what the GROUP_CONCAT query and the median of its sorted replicates
+    # returned for the same test values
+    expected = []
+    for (revision, test_id, url, type), values in sorted(replicates.items()):
+        values = sorted(map(float, values))
+        n = len(values)
+        avg = sum(values) / n
+        if n % 2:
+            median = round(values[n / 2], 0)
+        else:
+            median = round((values[n / 2] + values[n / 2 - 1]) / 2.0, 0)
+        expected.append({
+            'revision':revision, 'test_id':test_id, 'url':url, 'type':type,
+            'avg':round(avg, 0), 'min':round(values[0], 0),
+            'max':round(values[-1], 0),
+            'std':round((sum([ (v - avg) ** 2 for v in values ]) / n) ** 0.5, 0),
+            'median':median,
+            })
+
+    key = lambda row: (row['revision'], row['test_id'], row['url'], row['type'])
+    assert sorted(data, key=key) == sorted(expected, key=key)
+
+
+def test_cycle_data(ptm, monkeypatch):
+    """Expired test runs are deleted a chunk at a time from a checkpoint."""
+    import time
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", lambda s: sleeps.append(s))
+
+    test_run_ids = [
+        ptm.load_test_data(TestData(perftest_data(testrun={"date": date})))
+        for date in ["1330454755", "1330454756", "1330454757"]
+        ]
+
+    sql_targets = ptm.cycle_data(chunk_size=2, max_rows_per_second=1)
+
+    assert sql_targets["perftest.deletes.cycle_test_run"] == 2
+    assert sql_targets["total_count"] > 2
+    assert ptm.get_cycle_checkpoint() == test_run_ids[1]
+    # throttled to one row per second
+    assert sleeps and sleeps[0] > 0
+
+    sql_targets = ptm.cycle_data(sql_targets, chunk_size=2)
+
+    assert sql_targets["perftest.deletes.cycle_test_run"] == 1
+    assert ptm.get_cycle_checkpoint() == test_run_ids[2]
+
+    # nothing left to delete, the checkpoint starts over
+    assert ptm.cycle_data(sql_targets)["total_count"] == 0
+    assert ptm.get_cycle_checkpoint() == 0
+
+    test_runs = ptm.sources["perftest"].dhub.execute(
+        proc="perftest_test.selects.test_runs")
+
+    assert len(test_runs) == 0
+
+
+def test_maintain_partitions_not_partitioned(ptm):
+    """Tables that are not partitioned are left alone."""
+    assert ptm.get_partitions("perftest", "test_value") == ()
+    assert ptm.maintain_partitions(86400) == {}
+
+
+def test_maintain_partitions(ptm):
+    """New partitions are sealed and expired ones dropped."""
+    from django.conf import settings
+    import MySQLdb
+    from datazilla.model import PerformanceTestModel
+
+    pptm = PerformanceTestModel.create(
+        "{0}_partitioned".format(ptm.project), partitioned=True)
+
+    try:
+        assert [p["name"] for p in pptm.get_partitions(
+            "objectstore", "objectstore")] == ["p_future"]
+
+        pptm.store_test_data(perftest_json())
+        pptm.load_test_data(TestData(perftest_data()))
+
+        now = 1330454755
+        results = pptm.maintain_partitions(86400, 3 * 86400, now=now)
+
+        assert results["objectstore.objectstore"]["added"] == ["p20120228"]
+        assert results["perftest.test_value"]["added"] == ["p20120228"]
+        assert results["perftest.test_data_all_dimensions"]["added"] == []
+
+        # nothing was loaded since, the partition isn't sealed again
+        results = pptm.maintain_partitions(86400, 3 * 86400, now=now + 86400)
+        assert results["objectstore.objectstore"]["added"] == []
+
+        results = pptm.maintain_partitions(
+            86400, 3 * 86400, now=now + 4 * 86400)
+
+        assert results["objectstore.objectstore"]["dropped"] == ["p20120228"]
+        assert results["perftest.test_value"]["dropped"] == ["p20120228"]
+        assert pptm.retrieve_test_data(limit=10) == ()
+
+    finally:
+        pptm.disconnect()
+
+        conn = MySQLdb.connect(
+            host=settings.DATAZILLA_DATABASE_HOST,
+            user=settings.DATAZILLA_DATABASE_USER,
+            passwd=settings.DATAZILLA_DATABASE_PASSWORD,
+            )
+        cur = conn.cursor()
+        for source in pptm.sources.values():
+            cur.execute("DROP DATABASE {0}".format(source.datasource.name))
+            source.datasource.delete()
+        conn.close()
+
+
 def test_get_test_reference_data(ptm):
 
     data = TestData(perftest_data())
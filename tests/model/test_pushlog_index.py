@@ -0,0 +1,66 @@
+from datazilla.model.pushlog_index import PushLogIndex
+
+
+def pushlog_row(pushlog_id, node, date=None):
+    """Return a sample get_branch_pushlog row."""
+    return {
+        'pushlog_id': pushlog_id,
+        'push_id': pushlog_id + 100,
+        'date': date or 1330454755 + pushlog_id,
+        'node': node,
+        'branch_id': 1,
+        'name': 'Mozilla-Inbound',
+        'alt_name': None,
+        }
+
+
+def test_index():
+    """Rows are indexed by their truncated revision."""
+    index = PushLogIndex([
+        pushlog_row(1, '785345035a3b2fbd4b1d3a3f4c3b5a0f6a1d2e3f'),
+        pushlog_row(1, 'c0a3b8bbb3d6aaaaaaaaaaaaaaaaaaaaaaaaaaaa'),
+        pushlog_row(2, '26fe6e9b19a3bbbbbbbbbbbbbbbbbbbbbbbbbbbb'),
+        ])
+
+    assert len(index) == 3
+    assert index.get_position('c0a3b8bbb3d6') == 1
+    assert index.get_position('26fe6e9b19a3bbbb') == 2
+    assert index.get_position('000000000000') is None
+    assert index.last_push_id == 102
+
+    assert index[2] == {
+        'pushlog_id': 2,
+        'push_id': 102,
+        'date': 1330454757,
+        'node': '26fe6e9b19a3',
+        'branch_id': 1,
+        'name': 'Mozilla-Inbound',
+        'alt_name': None,
+        }
+
+
+def test_extend():
+    """Overlapping rows are ignored when the index is extended."""
+    index = PushLogIndex([ pushlog_row(1, '785345035a3b') ])
+
+    index.extend([
+        pushlog_row(1, '785345035a3b'),
+        pushlog_row(2, 'c0a3b8bbb3d6'),
+        ])
+
+    assert len(index) == 2
+    assert index.get_position('c0a3b8bbb3d6') == 1
+    assert index.get_revision(1) == 'c0a3b8bbb3d6'
+
+
+def test_get_skip_bitmap():
+    """Bitmaps grow with the index and keep their bits."""
+    index = PushLogIndex([ pushlog_row(1, '785345035a3b') ])
+    bitmaps = {}
+
+    index.get_skip_bitmap(bitmaps, 'key')[0] = True
+
+    index.extend([ pushlog_row(2, 'c0a3b8bbb3d6') ])
+
+    assert index.get_skip_bitmap(bitmaps, 'key').tolist() == [True, False]
+    assert index.get_skip_bitmap(bitmaps, 'other').tolist() == [False, False]
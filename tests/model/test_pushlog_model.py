@@ -1,9 +1,10 @@
 import json
 import datetime
 import copy
-import urllib
+import time
 
-from ..sample_pushlog import get_pushlog_json_set, get_pushlog_json_readable
+from ..sample_pushlog import (
+    get_pushlog_json_set, get_pushlog_dict_set, pushlog_server)
 
 
 def get_branch_id(plm):
@@ -166,6 +167,31 @@ def test_insert_branch_pushlogs_twice_skips(plm):
     assert plm.changeset_skipped_count == 7
 
 
+def test_insert_branch_pushlogs_new_push(plm):
+    """Only the pushes not stored yet are inserted when a set is refetched"""
+    branch_id = get_branch_id(plm)
+    data = json.loads(get_pushlog_json_set())
+    plm._insert_branch_pushlogs(branch_id, data)
+
+    new_push = copy.deepcopy(data["23046"])
+    new_push["changesets"][0]["node"] = "a" * 40
+    data["23047"] = new_push
+
+    plm.reset_counts()
+    plm._insert_branch_pushlogs(branch_id, data)
+
+    assert plm.pushlog_count == 1
+    assert plm.changeset_count == len(new_push["changesets"])
+    assert plm.pushlog_skipped_count == 3
+    assert plm.changeset_skipped_count == 7
+
+    pushlog_ids = plm._get_pushlog_ids(branch_id, ["23047"])
+    changesets = plm.get_changesets(pushlog_ids[23047])
+
+    assert set([ cs["node"] for cs in changesets ]) == set(
+        [ cs["node"] for cs in new_push["changesets"] ])
+
+
 def test_insert_branch_pushlogs_dup_changeset(plm):
     """
     Trying to insert a pushlog with a duplicate changeset causes just
@@ -188,18 +214,15 @@ def test_insert_branch_pushlogs_dup_changeset(plm):
     assert plm.changeset_skipped_count == 1
 
 
-def test_store_pushlogs_happy_path(plm, monkeypatch):
+def test_store_pushlogs_happy_path(plm):
     """
     Test store pushlog method.
 
-    monkeypatch urllib to return our canned data.
+    A local json-pushes server returns our canned data.
 
     """
-    def mock_urlopen(nuttin_honey):
-        return get_pushlog_json_readable(get_pushlog_json_set())
-    monkeypatch.setattr(urllib, 'urlopen', mock_urlopen)
-
-    result = plm.store_pushlogs("test_host", 1, branch="Firefox")
+    with pushlog_server(get_pushlog_json_set()) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
 
     exp_result = {
         "branches": 1,
@@ -212,18 +235,15 @@ def test_store_pushlogs_happy_path(plm, monkeypatch):
     assert result == exp_result
 
 
-def test_store_pushlogs_no_data(plm, monkeypatch):
+def test_store_pushlogs_no_data(plm):
     """
     Test store pushlog method when no json is returned for the specified branch.
 
-    monkeypatch urllib to return our canned data.
+    A local json-pushes server returns our canned data.
 
     """
-    def mock_urlopen(nuttin_honey):
-        return get_pushlog_json_readable("")
-    monkeypatch.setattr(urllib, 'urlopen', mock_urlopen)
-
-    result = plm.store_pushlogs("test_host", 1, branch="Firefox")
+    with pushlog_server("") as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
 
     exp_result = {
         "branches": 0,
@@ -235,15 +255,175 @@ def test_store_pushlogs_no_data(plm, monkeypatch):
 
     assert result == exp_result
 
-def test_get_branch_pushlog(plm, monkeypatch):
+def test_store_pushlogs_retry(plm, monkeypatch):
+    """A branch that fails with a server error is fetched again."""
+    monkeypatch.setattr(plm, "FETCH_BACKOFF", 0)
 
-    data = json.loads(get_pushlog_json_set())
+    responses = {
+        "mozilla-central": [ (503, ""), (200, get_pushlog_json_set()) ],
+        }
+
+    with pushlog_server("", responses) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
+
+    assert len(server.requests) == 2
+    assert result["branches"] == 1
+    assert result["pushlogs_stored"] == 3
+
+
+def test_store_pushlogs_failed_branch(plm, monkeypatch):
+    """A branch that can't be fetched doesn't keep the others from loading."""
+    monkeypatch.setattr(plm, "FETCH_BACKOFF", 0)
+
+    responses = {
+        "mozilla-central": [ (200, get_pushlog_json_set()) ],
+        "try": [ (404, "") ],
+        }
+
+    branch_count = len(plm.get_branch_list())
 
-    def mock_urlopen(nuttin_honey):
-        return get_pushlog_json_readable(get_pushlog_json_set())
-    monkeypatch.setattr(urllib, 'urlopen', mock_urlopen)
+    with pushlog_server("{}", responses) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, workers=3)
+
+    assert result["branches"] == branch_count - 1
+    assert result["pushlogs_stored"] == 3
+    # 404 is not retried and three workers reuse their connections
+    assert len(server.requests) == branch_count
+    assert len(server.clients) <= 3
+
+
+def get_recent_pushlog_dict(push_ids):
+    """Return the sample pushes renumbered to ``push_ids``, pushed now."""
+    pushes = get_pushlog_dict_set().values()
+    now = int(time.time())
+
+    data = {}
+    for push_id, push in zip(push_ids, pushes):
+        push = copy.deepcopy(push)
+        push["date"] = now - 60
+        data[str(push_id)] = push
+
+    return data
+
+
+def test_store_pushlogs_incremental(plm):
+    """Once a branch is stored only the pushes after the last one are asked."""
+    responses = {
+        "mozilla-central": [
+            (200, json.dumps(get_recent_pushlog_dict([100, 101]))),
+            (200, json.dumps(get_recent_pushlog_dict([102]))),
+            ],
+        }
+
+    with pushlog_server("{}", responses) as server:
+        plm.store_pushlogs(server.repo_host, None, hours=24, branch="Firefox")
+
+        plm.reset_counts()
+        result = plm.store_pushlogs(
+            server.repo_host, None, hours=24, branch="Firefox")
+
+    assert "maxhours=24" in server.requests[0]
+    assert "startID=101" in server.requests[1]
+    assert result["pushlogs_stored"] == 1
+    assert result["pushlogs_skipped"] == 0
+
+    marks = plm.get_push_high_water_marks(int(time.time()) - 3600)
+    assert marks[get_branch_id(plm)]["push_id"] == 102
+
+
+def test_store_pushlogs_gap_resync(plm):
+    """A branch with a gap in its pushes is fetched over the whole window."""
+    responses = {
+        "mozilla-central": [
+            (200, json.dumps(get_recent_pushlog_dict([100, 102]))),
+            ],
+        }
+
+    with pushlog_server("{}", responses) as server:
+        plm.store_pushlogs(server.repo_host, None, hours=24, branch="Firefox")
+        plm.store_pushlogs(server.repo_host, None, hours=24, branch="Firefox")
+
+    assert plm.get_push_high_water_marks(int(time.time()) - 3600) == {}
+    assert "maxhours=24" in server.requests[1]
+
+
+def test_get_branch_pushlog_index(plm):
+    """The shared index is extended when a revision isn't in it yet."""
+    new_pushes = get_recent_pushlog_dict([102])
+    new_revisions = []
+    for i, changeset in enumerate(new_pushes["102"]["changesets"]):
+        changeset["node"] = "f{0:011d}".format(i) + changeset["node"][12:]
+        new_revisions.append(changeset["node"][0:12])
+
+    responses = {
+        "mozilla-central": [
+            (200, json.dumps(get_recent_pushlog_dict([100, 101]))),
+            (200, json.dumps(new_pushes)),
+            ],
+        }
+
+    with pushlog_server("{}", responses) as server:
+        plm.store_pushlogs(server.repo_host, None, hours=24, branch="Firefox")
+        branch_id = get_branch_id(plm)
+
+        index = plm.get_branch_pushlog_index(branch_id)
+        size = len(index)
+
+        plm.store_pushlogs(server.repo_host, None, hours=24, branch="Firefox")
+
+    # known revisions don't need a refresh
+    assert plm.get_branch_pushlog_index(branch_id) is index
+    assert len(index) == size
+
+    assert plm.get_branch_pushlog_index(branch_id, new_revisions[0]) is index
+    assert len(index) == size + len(new_revisions)
+    assert sorted( index.get_position(r) for r in new_revisions ) == \
+        range(size, len(index))
+    assert index[size]['push_id'] == 102
+
+
+def test_get_nodes_from_revisions(plm, monkeypatch):
+    """Pairs resolve with one query, alt_names included, then cached."""
+    with pushlog_server(get_pushlog_json_set()) as server:
+        plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
+
+    revisions = [
+        node["node"][0:12]
+        for push in get_pushlog_dict_set().values()
+        for node in push["changesets"]
+        ][0:3]
+
+    pairs = [ (r, "Firefox") for r in revisions ]
+    pairs.append((revisions[0], "Firefox-Non-PGO"))
+    pairs.append((revisions[0], "Try"))
+    pairs.append(("000000000000", "Firefox"))
+
+    nodes = plm.get_nodes_from_revisions(pairs)
+
+    assert sorted(nodes.keys()) == sorted(pairs[0:4])
+
+    for revision, branch in pairs[0:4]:
+        assert nodes[(revision, branch)]["node"][0:12] == revision
+        assert nodes[(revision, branch)]["name"] == "Firefox"
+
+    assert plm.get_nodes_from_revisions([]) == {}
+
+    # the nodes found don't need another query
+    def execute(*args, **kwargs):
+        raise AssertionError("unexpected query")
+    monkeypatch.setattr(plm.hg_ds.dhub, "execute", execute)
+
+    assert plm.get_nodes_from_revisions(pairs[0:4]) == nodes
+    assert plm.get_node_from_revision(revisions[1], "Firefox") == \
+        nodes[(revisions[1], "Firefox")]
+
+
+def test_get_branch_pushlog(plm):
+
+    data = json.loads(get_pushlog_json_set())
 
-    result = plm.store_pushlogs("test_host", 1, branch="Firefox")
+    with pushlog_server(get_pushlog_json_set()) as server:
+        result = plm.store_pushlogs(server.repo_host, 1, branch="Firefox")
 
     branch_pushlog = plm.get_branch_pushlog(1)
 
@@ -0,0 +1,106 @@
+import json
+
+from datazilla.model.response_cache import ResponseCache
+
+
+class Computer(object):
+    """Stand-in for an API call, counts how often it's computed."""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.data
+
+
+def test_get_json_cached():
+    """A response is computed once, for each set of parameters."""
+    rc = ResponseCache()
+    compute = Computer({'one': [1, 2, 3]})
+
+    for i in range(2):
+        response = rc.get_json('proj', 'endpoint', {'a': 1}, compute)
+
+    assert json.loads(response) == {'one': [1, 2, 3]}
+    assert compute.calls == 1
+
+    rc.get_json('proj', 'endpoint', {'a': 2}, compute)
+
+    assert compute.calls == 2
+
+
+def test_get_json_memcached():
+    """A second process gets the response from memcached."""
+    compute = Computer([1])
+
+    ResponseCache().get_json('proj', 'endpoint', {}, compute)
+    response = ResponseCache(lru_size=0).get_json(
+        'proj', 'endpoint', {}, compute)
+
+    assert json.loads(response) == [1]
+    assert compute.calls == 1
+
+
+def test_invalidate_revisions():
+    """Only the responses of invalidated revisions are recomputed."""
+    rc = ResponseCache()
+    compute = Computer([1])
+
+    for revision in ['785345035a3b', 'c0a3b8bbb3d6']:
+        rc.get_json('proj', 'endpoint', {}, compute, revision=revision)
+    rc.get_json('proj', 'window', {}, compute)
+
+    assert compute.calls == 3
+
+    # revisions are matched on their first 12 characters
+    rc.invalidate_revisions('proj', ['785345035a3b2fbd4b1d'])
+
+    for revision in ['785345035a3b', 'c0a3b8bbb3d6']:
+        rc.get_json('proj', 'endpoint', {}, compute, revision=revision)
+    rc.get_json('proj', 'window', {}, compute)
+
+    assert compute.calls == 5
+
+
+def test_invalidate_project():
+    """Responses not for one revision are invalidated with the project."""
+    rc = ResponseCache()
+    compute = Computer([1])
+
+    rc.get_json('proj', 'window', {}, compute)
+    rc.get_json('other', 'window', {}, compute)
+    rc.invalidate_project('proj')
+    rc.get_json('proj', 'window', {}, compute)
+    rc.get_json('other', 'window', {}, compute)
+
+    assert compute.calls == 3
+
+
+def test_disabled():
+    """A timeout of 0 computes every response."""
+    rc = ResponseCache(timeout=0)
+    compute = Computer([1])
+
+    rc.get_json('proj', 'endpoint', {}, compute)
+    rc.get_json('proj', 'endpoint', {}, compute)
+
+    assert compute.calls == 2
+
+
+def test_get_json_iter():
+    """A streamed response is cached once all of it has been read."""
+    rc = ResponseCache()
+    compute = Computer(['[1', ', 2', ']'])
+
+    pieces = rc.get_json_iter('proj', 'endpoint', {}, compute)
+    # not read to the end, nothing is cached
+    next(pieces)
+    pieces.close()
+
+    for i in range(2):
+        response = ''.join(rc.get_json_iter('proj', 'endpoint', {}, compute))
+
+    assert json.loads(response) == [1, 2]
+    assert compute.calls == 2
@@ -0,0 +1,115 @@
+import time
+
+from datazilla.model.series import SeriesCache
+
+
+def series_row(**kwargs):
+    """Return a sample test_data_all_dimensions row."""
+    defaults = {
+        'test_run_id': 1,
+        'product_id': 1,
+        'operating_system_id': 1,
+        'test_id': 1,
+        'page_id': 1,
+        'date_received': 1330454755,
+        'revision': '785345035a3b',
+        'product': 'Firefox',
+        'branch': 'Mozilla-Inbound',
+        'branch_version': '14.0a1',
+        'operating_system_name': 'linux',
+        'operating_system_version': 'Ubuntu 11.10',
+        'processor': 'x86_64',
+        'build_type': 'opt',
+        'machine_name': 'qm-pxp01',
+        'pushlog_id': None,
+        'push_date': None,
+        'test_name': 'Talos tp5r',
+        'page_url': 'one.com',
+        'mean': 10.5,
+        'std': 1.25,
+        'h0_rejected': None,
+        'p': None,
+        'n_replicates': None,
+        'fdr': None,
+        'trend_mean': None,
+        'trend_std': None,
+        'test_evaluation': None,
+        }
+
+    defaults.update(kwargs)
+
+    return defaults
+
+
+def test_get_data(tmpdir):
+    """Rows of the matching series are sliced by date, newest first."""
+    cache = SeriesCache(str(tmpdir))
+
+    cache.append([
+        series_row(test_run_id=1, date_received=100),
+        series_row(test_run_id=2, date_received=300),
+        series_row(test_run_id=3, date_received=200, page_url='two.com'),
+        series_row(test_run_id=4, date_received=250, branch='Try'),
+        ])
+
+    rows = cache.get_data(
+        'Firefox', 'Mozilla-Inbound', 'linux', None, 'Talos tp5r', None,
+        150, 300)
+
+    assert [ r['ti'] for r in rows ] == [2, 3]
+    assert rows[0]['pu'] == 'one.com'
+    assert rows[0]['mn'] == 'qm-pxp01'
+    assert rows[0]['m'] == 10.5
+    assert rows[0]['pi'] is None
+
+
+def test_append_incrementally(tmpdir):
+    """Appended rows are merged into the existing series in date order."""
+    cache = SeriesCache(str(tmpdir))
+
+    cache.append([ series_row(test_run_id=2, date_received=200) ])
+    cache.append([
+        series_row(test_run_id=1, date_received=100, machine_name='qm-pxp02')
+        ])
+
+    # a new instance reads everything back from disk
+    rows = SeriesCache(str(tmpdir)).get_data(
+        'Firefox', None, None, None, None, None, 0, 1000)
+
+    assert [ (r['ti'], r['mn']) for r in rows ] == [
+        (2, 'qm-pxp01'), (1, 'qm-pxp02') ]
+
+
+def test_set_push_data(tmpdir):
+    """Push data is set on the rows of a revision on a branch."""
+    cache = SeriesCache(str(tmpdir))
+
+    cache.append([
+        series_row(test_run_id=1, revision='785345035a3b'),
+        series_row(test_run_id=2, revision='785345035a3b', branch='Try'),
+        ])
+
+    cache.set_push_data('785345035a3b', 'Mozilla-Inbound', 5, 1330454800)
+
+    rows = cache.get_data(
+        'Firefox', None, None, None, None, None, 0, 2000000000)
+
+    push_data = dict( (r['ti'], (r['pi'], r['pd'])) for r in rows )
+
+    assert push_data == { 1: (5, 1330454800), 2: (None, None) }
+
+
+def test_retention(tmpdir):
+    """Rows older than the retention period are trimmed on append."""
+    now = int(time.time())
+    cache = SeriesCache(str(tmpdir), retention_period=3600)
+
+    cache.append([
+        series_row(test_run_id=1, date_received=now - 7200),
+        series_row(test_run_id=2, date_received=now),
+        ])
+
+    rows = cache.get_data('Firefox', None, None, None, None, None, 0, now)
+
+    assert [ r['ti'] for r in rows ] == [2]
+    assert cache.since >= now
@@ -4,13 +4,79 @@ Functions for sample pushlog data.
 """
 
 import json
+import threading
 
-def get_pushlog_json_readable(json_data):
-    """Return a handle to a readable object pointint to ``json_data``."""
-    class Readable(object):
-        def read(self):
-            return json_data
-    return Readable()
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from contextlib import contextmanager
+
+
+class PushlogServer(ThreadingMixIn, HTTPServer):
+    """Serve every keep-alive connection on its own thread."""
+    daemon_threads = True
+
+
+class PushlogRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answer json-pushes requests from the responses of the server.
+
+    ``server.responses`` maps the branch uri, the url path up to
+    ``/json-pushes``, to a list of (status, body) tuples that are returned in
+    turn, the last one for all following requests.  Other branches get
+    ``server.default``.
+
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        uri = self.path.split("?")[0].strip("/").rsplit("/", 1)[0]
+        self.server.requests.append(self.path)
+        self.server.clients.add(self.client_address)
+
+        responses = self.server.responses.get(uri, [])
+        if len(responses) > 1:
+            status, body = responses.pop(0)
+        elif responses:
+            status, body = responses[0]
+        else:
+            status, body = self.server.default
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def pushlog_server(json_data, responses=None):
+    """
+    Run a local json-pushes server for the duration of the block.
+
+    Every branch is served ``json_data`` unless ``responses`` has a list
+    of (status, body) for it, see ``PushlogRequestHandler``.  The block
+    gets the server, its ``repo_host`` can be passed to store_pushlogs.
+
+    """
+    server = PushlogServer(("127.0.0.1", 0), PushlogRequestHandler)
+    server.default = (200, json_data)
+    server.responses = responses or {}
+    server.requests = []
+    server.clients = set()
+    server.repo_host = "http://127.0.0.1:{0}".format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
 
 
 def get_pushlog_json_set():
@@ -2,6 +2,8 @@
 Webapp integration test client.
 
 """
+import urllib
+
 from django.core.handlers.wsgi import WSGIHandler
 from django_webtest.middleware import DjangoWsgiFix
 from webtest import TestApp
@@ -29,3 +31,17 @@ class TestClient(TestApp):
         path = "/%s/api/load_test" % ptm.project
         signed_data = oauth_signed(ptm, path, data)
         return self.post(path, signed_data, **kwargs)
+
+
+    def oauth_post_bulk(self, ptm, body, content_type="application/json",
+                        headers=None, **kwargs):
+        """Post a bulk upload body, signed with OAuth in the query string."""
+        path = "/%s/api/load_test/bulk" % ptm.project
+        signed_params = oauth_signed(ptm, path, body=body)
+        return self.post(
+            "%s?%s" % (path, urllib.urlencode(signed_params)),
+            body,
+            headers=headers,
+            content_type=content_type,
+            **kwargs
+            )
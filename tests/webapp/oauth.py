@@ -5,8 +5,13 @@ import urllib
 import oauth2 as oauth
 
 
-def oauth_signed(ptm, path, data=None):
-    """Return params dict for OAuth-signed form-encoded POST request."""
+def oauth_signed(ptm, path, data=None, body=""):
+    """
+    Return params dict for OAuth-signed form-encoded POST request.
+
+    A raw ``body`` is signed through its oauth_body_hash param.
+
+    """
     ds = ptm.sources["objectstore"].datasource
     uri = "http://localhost:80%s" % path
     user = ptm.project
@@ -33,7 +38,7 @@ def oauth_signed(ptm, path, data=None):
     params['oauth_token'] = token.key
     params['oauth_consumer_key'] = consumer.key
 
-    req = oauth.Request(method="POST", url=uri, parameters=params)
+    req = oauth.Request(method="POST", url=uri, parameters=params, body=body)
 
     #Set the signature
     signature_method = oauth.SignatureMethod_HMAC_SHA1()
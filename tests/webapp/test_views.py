@@ -1,7 +1,13 @@
+import gzip
 import json
+import urllib
+
+from StringIO import StringIO
 
 from mock import patch
 
+from .oauth import oauth_signed
+
 
 class TestSetTestData(object):
     """Tests for set_test_data view."""
@@ -95,3 +101,89 @@ class TestSetTestData(object):
         response = client.oauth_post(ptm, {}, status=404)
 
         assert response.json["status"] == "Unknown project 'doesnotexist'"
+
+
+
+class TestSetTestDataBulk(object):
+    """Tests for set_test_data_bulk view."""
+    def _get_blobs(self, ptm):
+        rows = ptm.sources["objectstore"].dhub.execute(
+            proc="objectstore_test.selects.all")
+        return [ json.loads(row["json_blob"]) for row in rows ]
+
+
+    def test_gzip_array(self, client, ptm):
+        """A gzip encoded array is stored as one blob per item."""
+        items = [ {"test": "foo"}, {"test": "bar"} ]
+
+        buf = StringIO()
+        gz = gzip.GzipFile(fileobj=buf, mode="wb")
+        gz.write(json.dumps(items))
+        gz.close()
+
+        response = client.oauth_post_bulk(
+            ptm, buf.getvalue(), headers={"Content-Encoding": "gzip"})
+
+        assert response.json["status"] == u"well-formed JSON stored"
+        assert response.json["count"] == 2
+        assert len(response.json["ids"]) == 2
+        assert self._get_blobs(ptm) == items
+
+
+    def test_truncated_gzip(self, client, ptm):
+        """Nothing is stored if the gzip stream is cut short."""
+        buf = StringIO()
+        gz = gzip.GzipFile(fileobj=buf, mode="wb")
+        gz.write(json.dumps([ {"test": "foo"} ]))
+        gz.close()
+
+        response = client.oauth_post_bulk(
+            ptm, buf.getvalue()[:-4], headers={"Content-Encoding": "gzip"},
+            status=400)
+
+        assert response.json["status"] == u"Malformed gzip body"
+        assert self._get_blobs(ptm) == []
+
+
+    def test_ndjson(self, client, ptm):
+        """Each line of newline delimited JSON is stored as it is."""
+        body = '{"test": "foo"}\n\n{"test": "bar"}\n'
+
+        response = client.oauth_post_bulk(
+            ptm, body, content_type="application/x-ndjson")
+
+        ids = response.json["ids"]
+
+        assert ids == range(ids[0], ids[0] + 2)
+        assert self._get_blobs(ptm) == [ {"test": "foo"}, {"test": "bar"} ]
+
+
+    def test_malformed(self, client, ptm):
+        """Nothing is stored if an item isn't a JSON object."""
+        response = client.oauth_post_bulk(ptm, '[{"test": "foo"}, 1]',
+                                          status=400)
+
+        assert response.json["status"] == u"Malformed JSON"
+        assert self._get_blobs(ptm) == []
+
+
+    def test_tampered_body(self, client, ptm):
+        """A body other than the signed one is rejected."""
+        path = "/%s/api/load_test/bulk" % ptm.project
+        signed_params = oauth_signed(ptm, path, body='{"test": "foo"}')
+
+        response = client.post(
+            "%s?%s" % (path, urllib.urlencode(signed_params)),
+            '{"test": "bar"}', content_type="application/x-ndjson",
+            status=403)
+
+        assert response.json["status"] == u"Oauth body hash mismatch."
+        assert self._get_blobs(ptm) == []
+
+
+    def test_no_oauth(self, client):
+        response = client.post(
+            "/testproj/api/load_test/bulk", '{"test": "foo"}',
+            content_type="application/x-ndjson", status=403)
+
+        assert response.json["status"] == u"No OAuth credentials provided."
@@ -335,6 +335,33 @@ def test_get_metrics_pushlog(client, mtm, ptm, plm, monkeypatch):
     assert match_count == 2
 
 
+def test_get_data_all_dimensions(client, mtm, ptm):
+    """
+    Test the all dimensions data in both formats through the web service.
+    """
+
+    for i in range(2):
+        ptm.store_test_data( json.dumps( TestData( perftest_data() ) ) )
+
+    mtm.load_test_data_all_dimensions(ptm.process_objects(2))
+
+    uri = (
+        "/{0}/testdata/all_data?product=Firefox&branch=Mozilla-Aurora"
+        "&os=linux"
+        ).format(ptm.project)
+
+    rows = client.get(uri).json['data']
+
+    assert len(rows) == 2
+    assert set(r['p'] for r in rows) == set(['Firefox'])
+
+    compact = client.get(uri + "&format=compact").json
+
+    assert compact['columns'] == mtm.ALL_DIMENSION_COLUMNS
+    assert [ dict(zip(compact['columns'], r)) for r in compact['data'] ] == \
+        rows
+
+
 def _get_uri_parameters(sample_data):
     """
     Build a list of dictionaries containing all available